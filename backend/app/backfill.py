@@ -0,0 +1,309 @@
+# backend/app/backfill.py
+"""Re-extract call summaries for historical calls.
+
+Usage (from backend/):
+    python -m app.backfill [--concurrency 8] [--rpm 500] [--tpm 150000] [--reset]
+    python -m app.backfill --retry-failed
+    python -m app.backfill --reset --llm-only
+
+Completed calls are streamed from the database in keyset pages, oldest first.
+Each page is extracted concurrently under a requests/tokens-per-minute budget,
+then written with one bulk upsert. The checkpoint file records the last
+(created_at, id) written, so an interrupted run picks up where it stopped.
+
+Calls whose extraction fails keep their existing summary and are listed in
+the checkpoint; --retry-failed re-extracts just those, dropping each one
+from the list once it is written.
+
+Like the webhook path, extraction tries the rule-based extractor first and
+only sends low-confidence transcripts to the LLM, so rule-extracted calls
+come out the same after a prompt change. Pass --llm-only when re-running
+after a prompt edit to send every call to the LLM.
+"""
+from .config import settings
+from .database import db
+from .services.data_processor import data_processor
+from .services.prompt_builder import warm_up, estimate_tokens
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fixed instructions wrapped around the transcript, and the completion cap,
+# of OpenAIService.extract_call_summary
+EXTRACTION_PROMPT_OVERHEAD_TOKENS = 120
+EXTRACTION_MAX_TOKENS = 200
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute.
+    
+    Requests are charged their estimated token cost up front; `settle` trues
+    the bucket up against the usage the API actually reports.
+    """
+    
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    
+    async def acquire(self, tokens: int) -> None:
+        # A single request larger than the whole budget would never fit
+        tokens = min(tokens, self.tpm)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.rpm,
+                    (tokens - self._tokens) * 60 / self.tpm
+                )
+                await asyncio.sleep(wait)
+    
+    def settle(self, estimated: int, actual: int) -> None:
+        self._tokens -= actual - estimated
+
+
+class Checkpoint:
+    """Resume position and running totals, persisted as JSON"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.state: Dict[str, Any] = {
+            "after": None,
+            "processed": 0,
+            "failed": [],
+            "prompt_tokens": 0,
+            "completion_tokens": 0
+        }
+    
+    def load(self) -> None:
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.state.update(json.load(f))
+    
+    def save(self) -> None:
+        self.state["updated_at"] = datetime.utcnow().isoformat()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class Backfill:
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.limiter = RateLimiter(args.rpm, args.tpm)
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        self.checkpoint = Checkpoint(args.checkpoint)
+        
+        # Totals for this run only; the checkpoint carries lifetime totals
+        self.processed = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+    
+    async def _extract(self, call: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        transcript = call["transcript"]
+        scenario_type = (call.get("agents") or {}).get("scenario_type", "dispatch")
+        estimated = estimate_tokens(transcript) + EXTRACTION_PROMPT_OVERHEAD_TOKENS + EXTRACTION_MAX_TOKENS
+        
+        if self.args.dry_run:
+            self.prompt_tokens += estimated - EXTRACTION_MAX_TOKENS
+            return None
+        
+        async with self.semaphore:
+            await self.limiter.acquire(estimated)
+            summary_data, extraction_result = await data_processor.build_call_summary(
+                call["id"], transcript, scenario_type, use_rules=not self.args.llm_only
+            )
+        
+        # Rule-extracted and failed calls report no usage and are refunded in full
+        usage = extraction_result.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        self.limiter.settle(estimated, prompt_tokens + completion_tokens)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        
+        if summary_data["processing_errors"]:
+            # Keep whatever summary the call already has rather than overwrite it with an error
+            logger.warning(f"Extraction failed for call {call['id']}: {summary_data['processing_errors']}")
+            self.failed += 1
+            if call["id"] not in self.checkpoint.state["failed"]:
+                self.checkpoint.state["failed"].append(call["id"])
+            return None
+        
+        return summary_data
+    
+    async def _process_page(self, calls: List[Dict[str, Any]], advance: bool = True) -> None:
+        prompt_tokens, completion_tokens = self.prompt_tokens, self.completion_tokens
+        results = await asyncio.gather(*(self._extract(call) for call in calls))
+        summaries = [summary for summary in results if summary]
+        
+        if summaries:
+            await db.upsert_summaries(summaries)
+        self.processed += len(summaries)
+        
+        if self.args.dry_run:
+            return
+        
+        # Only advance the checkpoint once the page is durably written
+        state = self.checkpoint.state
+        written = {summary["call_id"] for summary in summaries}
+        state["failed"] = [call_id for call_id in state["failed"] if call_id not in written]
+        if advance:
+            last = calls[-1]
+            state["after"] = {"created_at": last["created_at"], "id": last["id"]}
+        state["processed"] += len(summaries)
+        state["prompt_tokens"] += self.prompt_tokens - prompt_tokens
+        state["completion_tokens"] += self.completion_tokens - completion_tokens
+        self.checkpoint.save()
+    
+    async def run(self) -> Dict[str, Any]:
+        if not self.args.reset:
+            self.checkpoint.load()
+            if self.checkpoint.state["after"]:
+                logger.info(f"Resuming after {self.checkpoint.state['after']}")
+        
+        # tiktoken fetches its encoding on first use; do it before the clock starts
+        await asyncio.to_thread(warm_up)
+        
+        if self.args.retry_failed:
+            return await self._retry_failed()
+        
+        started = time.monotonic()
+        seen = 0
+        after = self.checkpoint.state["after"]
+        page_task = asyncio.create_task(db.get_completed_calls_page(after, self.args.page_size))
+        
+        while True:
+            calls = await page_task
+            if not calls:
+                break
+            if self.args.limit:
+                calls = calls[:self.args.limit - seen]
+            seen += len(calls)
+            
+            # Fetch the next page while this one is being extracted
+            last = calls[-1]
+            more = len(calls) == self.args.page_size and (not self.args.limit or seen < self.args.limit)
+            if more:
+                page_task = asyncio.create_task(db.get_completed_calls_page(
+                    {"created_at": last["created_at"], "id": last["id"]}, self.args.page_size
+                ))
+            
+            await self._process_page(calls)
+            logger.info(f"Page done: {seen} calls seen, {self.processed} written, {self.failed} failed")
+            
+            if not more:
+                break
+        
+        return self._report(seen, time.monotonic() - started)
+    
+    async def _retry_failed(self) -> Dict[str, Any]:
+        """Re-extract the calls the checkpoint lists as failed, leaving the cursor where it is"""
+        started = time.monotonic()
+        failed = list(self.checkpoint.state["failed"])
+        logger.info(f"Retrying {len(failed)} failed calls")
+        
+        seen = 0
+        for start in range(0, len(failed), self.args.page_size):
+            call_ids = failed[start:start + self.args.page_size]
+            calls = await db.get_completed_calls_by_ids(call_ids)
+            
+            # Deleted since, or no longer completed with a transcript: nothing to retry
+            gone = set(call_ids) - {call["id"] for call in calls}
+            if gone and not self.args.dry_run:
+                logger.warning(f"Dropping {len(gone)} failed calls that no longer qualify for extraction")
+                self.checkpoint.state["failed"] = [
+                    call_id for call_id in self.checkpoint.state["failed"] if call_id not in gone
+                ]
+            
+            seen += len(calls)
+            if calls:
+                await self._process_page(calls, advance=False)
+            elif not self.args.dry_run:
+                self.checkpoint.save()
+            logger.info(f"Retry page done: {seen} calls seen, {self.processed} written, {self.failed} failed")
+        
+        return self._report(seen, time.monotonic() - started)
+    
+    def _report(self, seen: int, elapsed: float) -> Dict[str, Any]:
+        elapsed = max(elapsed, 1e-9)
+        tokens = self.prompt_tokens + self.completion_tokens
+        cost = (
+            self.prompt_tokens / 1000 * self.args.prompt_price
+            + self.completion_tokens / 1000 * self.args.completion_price
+        )
+        return {
+            "dry_run": self.args.dry_run,
+            "calls_seen": seen,
+            "summaries_written": self.processed,
+            "failed": self.failed,
+            "failures_outstanding": len(self.checkpoint.state["failed"]),
+            "elapsed_seconds": round(elapsed, 2),
+            "calls_per_second": round(seen / elapsed, 2),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": round(tokens / elapsed, 1),
+            "estimated_cost_usd": round(cost, 4)
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-extract summaries for completed calls")
+    parser.add_argument("--page-size", type=int, default=settings.backfill_page_size)
+    parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+    parser.add_argument("--rpm", type=int, default=settings.backfill_rpm, help="requests per minute budget")
+    parser.add_argument("--tpm", type=int, default=settings.backfill_tpm, help="tokens per minute budget")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many calls (0 = all)")
+    parser.add_argument(
+        "--checkpoint",
+        default=os.path.join(settings.local_state_dir, "backfill_checkpoint.json")
+    )
+    parser.add_argument("--reset", action="store_true", help="ignore the checkpoint and start from the oldest call")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-extract only the calls the checkpoint lists as failed")
+    parser.add_argument("--llm-only", action="store_true",
+                        help="skip the rule-based extractor and send every call to the LLM")
+    parser.add_argument("--dry-run", action="store_true", help="page through calls and estimate tokens without calling OpenAI")
+    parser.add_argument("--prompt-price", type=float, default=settings.extraction_prompt_price_per_1k,
+                        help="USD per 1K prompt tokens")
+    parser.add_argument("--completion-price", type=float, default=settings.extraction_completion_price_per_1k,
+                        help="USD per 1K completion tokens")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    try:
+        return await Backfill(args).run()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print(json.dumps(asyncio.run(main()), indent=2))
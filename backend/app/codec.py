@@ -0,0 +1,249 @@
+# backend/app/codec.py
+from .config import settings
+from collections.abc import Sequence
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:  # optional: typed, lazy frame decoding
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional: faster full decoding
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+JsonInput = Union[str, bytes]
+
+
+class CodecError(ValueError):
+    """Body is not valid JSON, or not the shape we expect"""
+
+
+class LazyConversation(Sequence):
+    """Retell's conversation array, decoding each turn only when it is read.
+    
+    The prompt builder walks back from the newest turn until its token budget
+    is spent, so on a long call most turns are never touched. Turns come back
+    as {"role", "content"} dicts; other utterance fields (word timings) are
+    skipped.
+    """
+    
+    def __init__(self, raw_turns: List[Any], decode_turn: Callable[[Any], Dict[str, Any]]):
+        self._raw_turns = raw_turns
+        self._decode_turn = decode_turn
+        self._decoded: Dict[int, Dict[str, Any]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._raw_turns)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("conversation index out of range")
+        turn = self._decoded.get(index)
+        if turn is None:
+            turn = self._decoded[index] = self._decode_turn(self._raw_turns[index])
+        return turn
+
+
+class LLMFrame:
+    """The fields of a Retell LLM WebSocket frame that we read"""
+    
+    __slots__ = ("interaction_type", "response_id", "call_id", "call", "conversation")
+    
+    def __init__(self,
+                 interaction_type: Optional[str] = None,
+                 response_id: Optional[int] = None,
+                 call_id: Optional[str] = None,
+                 call: Optional[Dict[str, Any]] = None,
+                 conversation: Optional[Sequence] = None):
+        self.interaction_type = interaction_type
+        self.response_id = response_id
+        self.call_id = call_id
+        # Only call_id and metadata of the call_details object
+        self.call = call or {}
+        self.conversation = conversation if conversation is not None else []
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LLMFrame":
+        call = data.get("call") or {}
+        return cls(
+            interaction_type=data.get("interaction_type"),
+            response_id=data.get("response_id"),
+            call_id=data.get("call_id"),
+            call={"call_id": call.get("call_id"), "metadata": call.get("metadata")},
+            conversation=data.get("conversation") or []
+        )
+
+
+class WebhookEnvelope:
+    """Routing fields of a Retell webhook, plus the body as received"""
+    
+    __slots__ = ("event", "call_id", "raw")
+    
+    def __init__(self, event: Optional[str], call_id: Optional[str], raw: str):
+        self.event = event
+        self.call_id = call_id
+        # Stored as-is in the webhook queue; workers decode the full payload
+        self.raw = raw
+
+
+class JsonCodec:
+    """stdlib json backend, and the interface the faster backends implement"""
+    
+    name = "stdlib"
+    
+    def loads(self, data: JsonInput) -> Any:
+        try:
+            return json.loads(data)
+        except (ValueError, TypeError) as e:
+            raise CodecError(str(e)) from e
+    
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+    
+    def _object(self, data: JsonInput) -> Dict[str, Any]:
+        obj = self.loads(data)
+        if not isinstance(obj, dict):
+            raise CodecError("expected a JSON object")
+        return obj
+    
+    def decode_frame(self, data: JsonInput) -> LLMFrame:
+        return LLMFrame.from_dict(self._object(data))
+    
+    def decode_webhook(self, data: bytes) -> WebhookEnvelope:
+        payload = self._object(data)
+        return WebhookEnvelope(
+            payload.get("event"),
+            (payload.get("call") or {}).get("call_id"),
+            data.decode("utf-8")
+        )
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson: same full decode as stdlib, several times faster"""
+    
+    name = "orjson"
+    
+    def loads(self, data: JsonInput) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            raise CodecError(str(e)) from e
+    
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+
+if msgspec is not None:
+    class _Turn(msgspec.Struct):
+        role: Optional[str] = None
+        content: Optional[str] = None
+    
+    class _CallDetails(msgspec.Struct):
+        call_id: Optional[str] = None
+        metadata: Optional[Dict[str, Any]] = None
+    
+    class _Frame(msgspec.Struct):
+        interaction_type: Optional[str] = None
+        response_id: Optional[int] = None
+        call_id: Optional[str] = None
+        call: Optional[_CallDetails] = None
+        # Each turn stays an undecoded slice of the input until it is read
+        conversation: List[msgspec.Raw] = []
+    
+    class _WebhookCall(msgspec.Struct):
+        call_id: Optional[str] = None
+    
+    class _Webhook(msgspec.Struct):
+        event: Optional[str] = None
+        call: Optional[_WebhookCall] = None
+
+
+class MsgspecCodec(JsonCodec):
+    """msgspec: frames decode into typed structs; unread fields are skipped, not built"""
+    
+    name = "msgspec"
+    
+    def __init__(self):
+        self._decoder = msgspec.json.Decoder()
+        self._frame_decoder = msgspec.json.Decoder(_Frame)
+        self._turn_decoder = msgspec.json.Decoder(_Turn)
+        self._webhook_decoder = msgspec.json.Decoder(_Webhook)
+        self._encoder = msgspec.json.Encoder()
+    
+    def loads(self, data: JsonInput) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise CodecError(str(e)) from e
+    
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode("utf-8")
+    
+    def _decode_turn(self, raw: "msgspec.Raw") -> Dict[str, Any]:
+        try:
+            turn = self._turn_decoder.decode(raw)
+        except msgspec.ValidationError:
+            # Not an utterance object; read it as an empty turn
+            return {}
+        return {"role": turn.role, "content": turn.content}
+    
+    def decode_frame(self, data: JsonInput) -> LLMFrame:
+        try:
+            frame = self._frame_decoder.decode(data)
+        except msgspec.ValidationError:
+            # Valid JSON of an unexpected shape (e.g. a string response_id): take it untyped
+            return super().decode_frame(data)
+        except msgspec.DecodeError as e:
+            raise CodecError(str(e)) from e
+        call = frame.call
+        return LLMFrame(
+            interaction_type=frame.interaction_type,
+            response_id=frame.response_id,
+            call_id=frame.call_id,
+            call={"call_id": call.call_id, "metadata": call.metadata} if call else {},
+            conversation=LazyConversation(frame.conversation, self._decode_turn)
+        )
+    
+    def decode_webhook(self, data: bytes) -> WebhookEnvelope:
+        try:
+            envelope = self._webhook_decoder.decode(data)
+        except msgspec.ValidationError:
+            return super().decode_webhook(data)
+        except msgspec.DecodeError as e:
+            raise CodecError(str(e)) from e
+        return WebhookEnvelope(
+            envelope.event,
+            envelope.call.call_id if envelope.call else None,
+            data.decode("utf-8")
+        )
+
+
+BACKENDS = {"msgspec": MsgspecCodec, "orjson": OrjsonCodec, "stdlib": JsonCodec}
+_AVAILABLE = {"msgspec": msgspec is not None, "orjson": orjson is not None, "stdlib": True}
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """Codec by name ("auto" picks the fastest installed backend)"""
+    name = name or settings.json_codec
+    if name == "auto":
+        name = next(backend for backend in BACKENDS if _AVAILABLE[backend])
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON codec: {name}")
+    if not _AVAILABLE[name]:
+        logger.warning(f"JSON codec '{name}' is not installed; using the stdlib json module")
+        name = "stdlib"
+    return BACKENDS[name]()
+
+
+# Global codec instance
+codec = get_codec()
@@ -1,6 +1,6 @@
 # backend/app/config.py
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # API Keys
@@ -16,6 +16,98 @@ class Settings(BaseSettings):
     webhook_base_url: str = "https://4dac8660024a.ngrok-free.app"
     frontend_url: str = "http://localhost:3000"
     
+    # OpenAI-compatible endpoint, e.g. http://127.0.0.1:8100/v1 for the benchmark stand-in (None: api.openai.com)
+    openai_base_url: Optional[str] = None
+    
+    # Live calls: stream LLM output to Retell as it is generated
+    llm_streaming: bool = True
+    # Token budget for each live-turn prompt; older turns are folded into a summary
+    llm_prompt_token_budget: int = 1500
+    llm_summary_token_budget: int = 200
+    
+    # Local state (SQLite files for the webhook queue etc.), relative to the working directory
+    local_state_dir: str = "data"
+    
+    # Webhook queue
+    webhook_workers: int = 4
+    webhook_max_attempts: int = 5
+    webhook_retry_base_seconds: float = 2.0
+    webhook_retry_max_seconds: float = 300.0
+    webhook_poll_interval: float = 1.0
+    webhook_processing_timeout: float = 600.0
+    webhook_done_retention_seconds: float = 86400.0
+    
+    # Webhook dedup on (Retell call_id, event): Retell redelivers for hours, not days
+    webhook_dedup_ttl_seconds: float = 86400.0
+    webhook_dedup_memory_entries: int = 10000
+    
+    # Database: max concurrent Supabase queries (thread pool size)
+    db_max_workers: int = 16
+    # Response compression (gzip, or brotli when the package is installed)
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    
+    # JSON backend for the LLM WebSocket and webhooks: auto, msgspec, orjson or stdlib
+    json_codec: str = "auto"
+    
+    # Read-through agent cache; writes bump a version stamp shared by all workers
+    agent_cache_enabled: bool = True
+    agent_cache_ttl: float = 300.0
+    agent_cache_max_entries: int = 1000
+    
+    # Live call events (GET /api/calls/events)
+    event_bus_queue_size: int = 1000
+    event_bus_replay_size: int = 1000
+    
+    # GET /api/calls/stats is served from memory for this long
+    call_stats_ttl: float = 10.0
+    
+    # Retell HTTP client (one pooled client per process)
+    retell_base_url: str = "https://api.retellai.com"
+    retell_max_connections: int = 100
+    retell_max_keepalive_connections: int = 20
+    retell_keepalive_expiry: float = 30.0
+    retell_http2: bool = True
+    retell_connect_timeout: float = 5.0
+    # Per-endpoint overrides of the default read timeouts, e.g. {"create-phone-call": 20}
+    retell_endpoint_timeouts: Dict[str, float] = {}
+    
+    # Bulk call dispatch
+    batch_max_calls: int = 1000
+    batch_dispatch_concurrency: int = 10
+    batch_dispatch_interval_ms: int = 100
+    batch_retention: int = 100
+    
+    # Rule-based summary extraction; transcripts it scores below the threshold go to the LLM
+    fast_extraction_enabled: bool = True
+    fast_extraction_threshold: float = 0.8
+    
+    # Content-addressed cache of LLM extraction results (memory LRU + SQLite file)
+    extraction_cache_enabled: bool = True
+    extraction_cache_memory_entries: int = 1024
+    extraction_cache_disk_entries: int = 50000
+    
+    # Offline summary backfill (python -m app.backfill)
+    backfill_page_size: int = 100
+    backfill_concurrency: int = 8
+    backfill_rpm: int = 500
+    backfill_tpm: int = 150000
+    # USD per 1K tokens for the extraction model
+    extraction_prompt_price_per_1k: float = 0.03
+    extraction_completion_price_per_1k: float = 0.06
+    
+    # Caller-ID inventory
+    phone_numbers_ttl: float = 300.0
+    caller_id_strategy: str = "least_in_flight"  # or "round_robin"
+    caller_id_max_concurrent_calls: int = 5
+    # In-flight slots not released by a call_ended webhook are reclaimed after this long
+    caller_id_hold_timeout: float = 3600.0
+    # Batch dispatch waits this long for a free caller ID before failing a call,
+    # re-checking at least every caller_id_wait_poll seconds
+    batch_caller_id_wait: float = 3600.0
+    caller_id_wait_poll: float = 2.0
+    
     class Config:
         env_file = ".env"
 
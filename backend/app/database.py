@@ -1,8 +1,14 @@
 # backend/app/database.py
 from supabase import create_client, Client
 from .config import settings
+from .metrics import DB_QUERY_SECONDS
+from .services.agent_cache import agent_cache
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any, Literal
+import time
+from typing import List, Dict, Optional, Any, Literal, Tuple
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -27,12 +33,42 @@ class Database:
             settings.supabase_url,
             settings.supabase_service_role_key
         )
+        # The supabase client is synchronous; its blocking execute() calls run on
+        # this bounded pool so they never stall the event loop (and live calls).
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.db_max_workers,
+            thread_name_prefix="supabase"
+        )
+        # GET /calls/stats results by `since` window: {since: (expires_at, stats)}
+        self._stats_cache: Dict[Optional[str], tuple] = {}
+        self._stats_cache_counts = {"hits": 0, "misses": 0}
+        self._stats_lock = asyncio.Lock()
+    
+    async def _execute(self, method: str, query):
+        """Run a query builder's blocking execute() on the DB thread pool.
+        
+        `method` names the Database method for the query latency histogram.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await loop.run_in_executor(self._executor, query.execute)
+            outcome = "ok"
+            return result
+        finally:
+            DB_QUERY_SECONDS.labels(method, outcome).observe(time.perf_counter() - started)
+    
+    def close(self) -> None:
+        """Stop the DB thread pool (called from the FastAPI lifespan)"""
+        self._executor.shutdown(wait=False)
+        agent_cache.close()
     
     # Test connection
     async def test_connection(self) -> bool:
         """Test database connection"""
         try:
-            result = self.client.table("agents").select("count").execute()
+            result = await self._execute("test_connection", self.client.table("agents").select("count"))
             return True
         except Exception as e:
             logger.error(f"Database connection failed: {str(e)}")
@@ -42,16 +78,23 @@ class Database:
     async def insert_agent(self, agent_data: Dict[str, Any]) -> Optional[Dict]:
         """Insert new agent"""
         try:
-            result = self.client.table("agents").insert(agent_data).execute()
+            result = await self._execute("insert_agent", self.client.table("agents").insert(agent_data))
+            if result.data and settings.agent_cache_enabled:
+                await agent_cache.write(result.data[0]["id"], result.data[0])
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to insert agent: {str(e)}")
             return None
     
     async def get_agent_by_id(self, agent_id: str) -> Optional[Dict]:
-        """Get agent by ID"""
+        """Get agent by ID (served from the agent cache when fresh)"""
+        if settings.agent_cache_enabled:
+            return await agent_cache.get_or_load(agent_id, lambda: self._fetch_agent(agent_id))
+        return await self._fetch_agent(agent_id)
+    
+    async def _fetch_agent(self, agent_id: str) -> Optional[Dict]:
         try:
-            result = self.client.table("agents").select("*").eq("id", agent_id).execute()
+            result = await self._execute("get_agent_by_id", self.client.table("agents").select("*").eq("id", agent_id))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to get agent: {str(e)}")
@@ -60,31 +103,73 @@ class Database:
     async def get_all_agents(self) -> List[Dict]:
         """Get all active agents"""
         try:
-            result = self.client.table("agents").select("*").eq("is_active", True).order("created_at", desc=True).execute()
+            result = await self._execute("get_all_agents", self.client.table("agents").select("*").eq("is_active", True).order("created_at", desc=True))
             return result.data
         except Exception as e:
             logger.error(f"Failed to fetch agents: {str(e)}")
             return []
     
+    async def get_agents_version(self) -> Tuple[int, Optional[str]]:
+        """(count, latest updated_at) of the active agents, for GET /agents ETags"""
+        result = await self._execute(
+            "get_agents_version",
+            self.client.table("agents").select("updated_at", count="exact")
+            .eq("is_active", True).order("updated_at", desc=True).limit(1)
+        )
+        return result.count or 0, result.data[0]["updated_at"] if result.data else None
+    
     async def update_agent(self, agent_id: str, agent_data: Dict[str, Any]) -> Optional[Dict]:
         """Update agent"""
         try:
-            result = self.client.table("agents").update(agent_data).eq("id", agent_id).execute()
+            result = await self._execute("update_agent", self.client.table("agents").update(agent_data).eq("id", agent_id))
+            if settings.agent_cache_enabled:
+                # Bump the version even if no row came back, so no worker trusts its copy
+                await agent_cache.write(agent_id, result.data[0] if result.data else None)
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to update agent: {str(e)}")
             return None
     
+    # Retell provisioning functions
+    async def get_retell_provisioning(self, agent_id: str) -> Optional[Dict]:
+        """Get the Retell LLM/agent provisioned for one of our agents"""
+        try:
+            result = await self._execute("get_retell_provisioning", self.client.table("retell_provisioning").select("*").eq("agent_id", agent_id))
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error(f"Failed to get Retell provisioning: {str(e)}")
+            return None
+    
+    async def upsert_retell_provisioning(self, provisioning_data: Dict[str, Any]) -> Optional[Dict]:
+        """Insert or replace the Retell provisioning record for an agent"""
+        try:
+            result = await self._execute("upsert_retell_provisioning", self.client.table("retell_provisioning").upsert(
+                provisioning_data, on_conflict="agent_id"
+            ))
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error(f"Failed to upsert Retell provisioning: {str(e)}")
+            return None
+    
     # Call functions with enhanced Retell support
     async def insert_call(self, call_data: Dict[str, Any]) -> Optional[Dict]:
         """Insert new call"""
         try:
-            result = self.client.table("calls").insert(call_data).execute()
+            result = await self._execute("insert_call", self.client.table("calls").insert(call_data))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to insert call: {str(e)}")
             return None
     
+    async def insert_calls(self, calls_data: List[Dict[str, Any]]) -> List[Dict]:
+        """Insert many calls in one round trip"""
+        try:
+            result = await self._execute("insert_calls", self.client.table("calls").insert(calls_data))
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to insert calls: {str(e)}")
+            return []
+    
     # async def update_call_status(self, call_id: str, status: CallStatus = None, **kwargs) -> Optional[Dict]:
     async def update_call_status(self, call_id: str, status: Optional[CallStatus] = None, **kwargs) -> Optional[Dict]:
         """Update call status and other fields"""
@@ -93,7 +178,7 @@ class Database:
             
             # Only update status if provided
             if status is not None:
-                update_data["status"] = status.value
+                update_data["status"] = CallStatus(status).value
             
             # Add all other fields
             update_data.update(kwargs)
@@ -102,7 +187,7 @@ class Database:
             if not update_data:
                 return None
             
-            result = self.client.table("calls").update(update_data).eq("id", call_id).execute()
+            result = await self._execute("update_call_status", self.client.table("calls").update(update_data).eq("id", call_id))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to update call: {str(e)}")
@@ -111,7 +196,7 @@ class Database:
     async def get_call_by_id(self, call_id: str) -> Optional[Dict]:
         """Get call by ID with agent info"""
         try:
-            result = self.client.table("calls").select("*, agents(name, scenario_type)").eq("id", call_id).execute()
+            result = await self._execute("get_call_by_id", self.client.table("calls").select("*, agents(name, scenario_type)").eq("id", call_id))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to get call: {str(e)}")
@@ -120,22 +205,62 @@ class Database:
     async def get_call_by_retell_id(self, retell_call_id: str) -> Optional[Dict]:
         """Get call by Retell call ID"""
         try:
-            result = self.client.table("calls").select("*, agents(name, scenario_type)").eq("retell_call_id", retell_call_id).execute()
+            result = await self._execute("get_call_by_retell_id", self.client.table("calls").select("*, agents(name, scenario_type)").eq("retell_call_id", retell_call_id))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to get call by retell_call_id: {str(e)}")
             return None
     
-    async def get_calls_history(self, limit: int = 50) -> List[Dict]:
-        """Get calls history with agent info"""
+    async def get_calls_page(self,
+                             columns: List[str],
+                             filters: Optional[Dict[str, Any]] = None,
+                             before: Optional[Dict[str, str]] = None,
+                             limit: int = 50) -> List[Dict]:
+        """Calls newest first, keyset-paged on (created_at, id).
+        
+        `before` is the (created_at, id) of the last row of the previous page;
+        the seek uses the (created_at, id) index, so page 1000 costs the same
+        as page 1. Fetches up to `limit` rows.
+        """
         try:
-            result = self.client.table("calls").select(
-                "*, agents(name, scenario_type)"
-            ).order("created_at", desc=True).limit(limit).execute()
+            query = self._filter_calls(self.client.table("calls").select(", ".join(columns)), filters)
+            
+            if before:
+                query = query.or_(
+                    f'created_at.lt."{before["created_at"]}",'
+                    f'and(created_at.eq."{before["created_at"]}",id.lt."{before["id"]}")'
+                )
+            
+            result = await self._execute(
+                "get_calls_page",
+                query.order("created_at", desc=True).order("id", desc=True).limit(limit)
+            )
             return result.data
         except Exception as e:
-            logger.error(f"Failed to get calls history: {str(e)}")
-            return []
+            logger.error(f"Failed to get calls page: {str(e)}")
+            raise
+    
+    async def get_calls_version(self, filters: Optional[Dict[str, Any]] = None) -> Tuple[int, Optional[str]]:
+        """(count, latest updated_at) of the calls matching filters, for GET /calls ETags.
+        
+        Any insert, update or delete in the filtered set changes one of the
+        two (updated_at is bumped by a trigger, see schema.sql).
+        """
+        query = self._filter_calls(self.client.table("calls").select("updated_at", count="exact"), filters)
+        result = await self._execute("get_calls_version", query.order("updated_at", desc=True).limit(1))
+        return result.count or 0, result.data[0]["updated_at"] if result.data else None
+    
+    @staticmethod
+    def _filter_calls(query, filters: Optional[Dict[str, Any]]):
+        filters = filters or {}
+        for column in ("status", "agent_id", "driver_phone", "load_number"):
+            if filters.get(column) is not None:
+                query = query.eq(column, filters[column])
+        if filters.get("created_after") is not None:
+            query = query.gte("created_at", filters["created_after"])
+        if filters.get("created_before") is not None:
+            query = query.lt("created_at", filters["created_before"])
+        return query
     
     # Summary functions with enhanced error handling
     async def insert_summary(self, summary_data: Dict[str, Any]) -> Optional[Dict]:
@@ -154,16 +279,62 @@ class Database:
                 if not isinstance(summary_data['processing_errors'], list):
                     summary_data['processing_errors'] = []
             
-            result = self.client.table("summaries").insert(summary_data).execute()
+            result = await self._execute("insert_summary", self.client.table("summaries").insert(summary_data))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to insert summary: {str(e)}")
             return None
     
+    async def upsert_summaries(self, summaries_data: List[Dict[str, Any]]) -> List[Dict]:
+        """Insert or replace many summaries (keyed on call_id) in one round trip"""
+        try:
+            result = await self._execute(
+                "upsert_summaries",
+                self.client.table("summaries").upsert(summaries_data, on_conflict="call_id")
+            )
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to upsert summaries: {str(e)}")
+            raise
+    
+    async def get_completed_calls_page(self,
+                                       after: Optional[Dict[str, str]] = None,
+                                       limit: int = 100) -> List[Dict]:
+        """Completed calls with transcripts, oldest first, keyset-paged on (created_at, id)"""
+        try:
+            query = self.client.table("calls").select(
+                "id, agent_id, transcript, created_at, agents(scenario_type)"
+            ).eq("status", CallStatus.COMPLETED.value).not_.is_("transcript", "null")
+            
+            if after:
+                query = query.or_(
+                    f'created_at.gt."{after["created_at"]}",'
+                    f'and(created_at.eq."{after["created_at"]}",id.gt."{after["id"]}")'
+                )
+            
+            result = await self._execute("get_completed_calls_page", query.order("created_at").order("id").limit(limit))
+            return result.data
+        except Exception as e:
+            logger.error(f"Failed to get completed calls page: {str(e)}")
+            raise
+    
+    async def get_completed_calls_by_ids(self, call_ids: List[str]) -> List[Dict]:
+        """Completed calls with transcripts among call_ids, in get_completed_calls_page's shape"""
+        try:
+            query = self.client.table("calls").select(
+                "id, agent_id, transcript, created_at, agents(scenario_type)"
+            ).in_("id", call_ids).eq("status", CallStatus.COMPLETED.value).not_.is_("transcript", "null")
+            
+            result = await self._execute("get_completed_calls_by_ids", query.order("created_at").order("id"))
+            return result.data
+        except Exception as e:
+            logger.error(f"Failed to get completed calls by ID: {str(e)}")
+            raise
+    
     async def get_summary_by_call_id(self, call_id: str) -> Optional[Dict]:
         """Get summary by call ID"""
         try:
-            result = self.client.table("summaries").select("*").eq("call_id", call_id).execute()
+            result = await self._execute("get_summary_by_call_id", self.client.table("summaries").select("*").eq("call_id", call_id))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to get summary: {str(e)}")
@@ -172,17 +343,39 @@ class Database:
     async def update_summary(self, call_id: str, summary_data: Dict[str, Any]) -> Optional[Dict]:
         """Update existing summary"""
         try:
-            result = self.client.table("summaries").update(summary_data).eq("call_id", call_id).execute()
+            result = await self._execute("update_summary", self.client.table("summaries").update(summary_data).eq("call_id", call_id))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Failed to update summary: {str(e)}")
             return None
     
+    # Per-turn latency timelines recorded by the LLM WebSocket
+    async def insert_call_turn_metrics(self, turns_data: List[Dict[str, Any]]) -> List[Dict]:
+        """Insert a call's response_required turn timings in one round trip"""
+        try:
+            result = await self._execute("insert_call_turn_metrics", self.client.table("call_turn_metrics").insert(turns_data))
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Failed to insert call turn metrics: {str(e)}")
+            return []
+    
+    async def get_call_turn_metrics(self, call_id: str) -> List[Dict]:
+        """A call's turn timings in turn order"""
+        try:
+            result = await self._execute(
+                "get_call_turn_metrics",
+                self.client.table("call_turn_metrics").select("*").eq("call_id", call_id).order("received_at")
+            )
+            return result.data
+        except Exception as e:
+            logger.error(f"Failed to get call turn metrics: {str(e)}")
+            return []
+    
     # Enhanced test functions
     async def insert_test_agent(self) -> Optional[Dict]:
         """Insert a test agent for verification"""
         try:
-            result = self.client.table("agents").insert({
+            result = await self._execute("insert_test_agent", self.client.table("agents").insert({
                 "name": "Test Agent API",
                 "system_prompt": "Hello {driver_name}, I'm calling about load {load_number}. Can you give me an update on your status?",
                 "scenario_type": "dispatch",
@@ -191,7 +384,7 @@ class Database:
                     "speed": 1.0,
                     "interruption_sensitivity": 0.5
                 }
-            }).execute()
+            }))
             
             if result.data:
                 logger.info(f"Test agent inserted with ID: {result.data[0]['id']}")
@@ -201,32 +394,46 @@ class Database:
             logger.error(f"Failed to insert test agent: {str(e)}")
             return None
     
-    async def get_call_statistics(self) -> Dict[str, Any]:
-        """Get call statistics for monitoring"""
-        try:
-            # Get total calls
-            total_calls = self.client.table("calls").select("count").execute()
-            
-            # Get calls by status
-            pending_calls = self.client.table("calls").select("count").eq("status", "pending").execute()
-            in_progress_calls = self.client.table("calls").select("count").eq("status", "in_progress").execute()
-            completed_calls = self.client.table("calls").select("count").eq("status", "completed").execute()
-            failed_calls = self.client.table("calls").select("count").eq("status", "failed").execute()
+    async def get_call_statistics(self, since: Optional[str] = None) -> Dict[str, Any]:
+        """Aggregated call statistics (the call_statistics RPC), cached for call_stats_ttl.
+        
+        `since` counts from the start of its minute. Concurrent requests for
+        the same window share one RPC, so a wall of dashboards polling
+        together costs one query per TTL.
+        """
+        # Floor the window start to the minute: dashboards send rolling
+        # "last N hours" values, and the exact timestamp would never repeat
+        if since:
+            since = datetime.fromisoformat(since).replace(second=0, microsecond=0).isoformat()
+        
+        now = time.monotonic()
+        cached = self._stats_cache.get(since)
+        if cached and cached[0] > now:
+            self._stats_cache_counts["hits"] += 1
+            return cached[1]
+        
+        async with self._stats_lock:
+            cached = self._stats_cache.get(since)
+            if cached and cached[0] > time.monotonic():
+                self._stats_cache_counts["hits"] += 1
+                return cached[1]
             
-            # Get recent calls
-            recent_calls = self.client.table("calls").select("*").order("created_at", desc=True).limit(10).execute()
+            self._stats_cache_counts["misses"] += 1
+            try:
+                result = await self._execute("get_call_statistics", self.client.rpc("call_statistics", {"since": since}))
+            except Exception as e:
+                logger.error(f"Failed to get call statistics: {str(e)}")
+                raise
             
-            return {
-                "total_calls": len(total_calls.data) if total_calls.data else 0,
-                "pending": len(pending_calls.data) if pending_calls.data else 0,
-                "in_progress": len(in_progress_calls.data) if in_progress_calls.data else 0,
-                "completed": len(completed_calls.data) if completed_calls.data else 0,
-                "failed": len(failed_calls.data) if failed_calls.data else 0,
-                "recent_calls": recent_calls.data[:5] if recent_calls.data else []
+            # A handful of windows at most; drop expired ones as we go
+            self._stats_cache = {
+                key: value for key, value in self._stats_cache.items() if value[0] > time.monotonic()
             }
-        except Exception as e:
-            logger.error(f"Failed to get call statistics: {str(e)}")
-            return {"error": str(e)}
+            self._stats_cache[since] = (time.monotonic() + settings.call_stats_ttl, result.data)
+            return result.data
+    
+    def get_stats_cache_counts(self) -> Dict[str, int]:
+        return dict(self._stats_cache_counts)
     
     async def cleanup_old_calls(self, days: int = 30) -> int:
         """Clean up old call records (optional maintenance function)"""
@@ -1,18 +1,46 @@
 # backend/app/main.py
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 from .config import settings
 from .database import db  # Missing import added
+from .metrics import render_metrics
+from .middleware import CompressionMiddleware
 from .routers import agent, calls, webhook, llm_socket
+from .services.retell_service import retell_service
+from .services.webhook_queue import webhook_queue
+from .services.openai_service import openai_service
+from .services.extraction_cache import extraction_cache
+from .services.webhook_dedup import webhook_dedup
+from .services.event_bus import event_bus
+from .services.agent_cache import agent_cache
+from .services.caller_id_slots import caller_id_slots
+from .services import prompt_builder
+import asyncio
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Voice Agent API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared, pooled clients live for the whole process
+    await retell_service.start()
+    # Off the event loop: the first tokenizer load may download its encoding
+    await asyncio.to_thread(prompt_builder.warm_up)
+    await webhook_queue.start(webhook.process_webhook_event)
+    yield
+    await webhook_queue.close()
+    await retell_service.close()
+    extraction_cache.close()
+    webhook_dedup.close()
+    caller_id_slots.close()
+    db.close()
+
+app = FastAPI(title="AI Voice Agent API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -21,8 +49,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Negotiated gzip/brotli for larger JSON bodies (list endpoints with transcripts)
+app.add_middleware(CompressionMiddleware)
+
 @app.get("/")
 async def root():
     return {"message": "AI Voice Agent API"}
@@ -35,6 +67,25 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/stats")
+async def runtime_stats():
+    """Runtime statistics for connection pools and caches"""
+    return {
+        "retell_pool": retell_service.get_pool_stats(),
+        "webhook_queue": await webhook_queue.get_stats(),
+        "webhook_dedup": webhook_dedup.get_stats(),
+        "call_stats_cache": db.get_stats_cache_counts(),
+        "agent_cache": agent_cache.get_stats(),
+        "event_bus": event_bus.get_stats(),
+        "extraction": openai_service.get_extraction_stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: dependency latency, token usage, WebSocket turns, webhooks"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/test-db")
 async def test_database():
     """Test database connection"""
@@ -0,0 +1,101 @@
+# backend/app/metrics.py
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+import os
+import time
+from typing import Any, Optional
+
+# Seconds; dependency hops range from a few ms (Supabase) to tens of seconds (extraction)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# interaction_type label values are limited to these (anything else counts
+# as "other"), so a misbehaving client cannot create unbounded series
+INTERACTION_TYPES = {"ping", "call_details", "update_only", "response_required", "reminder_required"}
+
+DB_QUERY_SECONDS = Histogram(
+    "voice_agent_db_query_seconds",
+    "Supabase query latency (thread-pool wait plus round trip) by Database method",
+    ["method", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+RETELL_REQUEST_SECONDS = Histogram(
+    "voice_agent_retell_request_seconds",
+    "Retell API request latency by endpoint and HTTP status",
+    ["endpoint", "status"],
+    buckets=LATENCY_BUCKETS
+)
+OPENAI_REQUEST_SECONDS = Histogram(
+    "voice_agent_openai_request_seconds",
+    "OpenAI chat completion latency (whole stream for streamed calls)",
+    ["operation", "model", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+OPENAI_FIRST_TOKEN_SECONDS = Histogram(
+    "voice_agent_openai_first_token_seconds",
+    "Time to the first streamed OpenAI token",
+    ["operation", "model"],
+    buckets=LATENCY_BUCKETS
+)
+OPENAI_TOKENS = Counter(
+    "voice_agent_openai_tokens_total",
+    "OpenAI tokens used, by operation and kind (prompt or completion)",
+    ["operation", "model", "kind"]
+)
+LLM_SOCKET_FRAMES = Counter(
+    "voice_agent_llm_socket_frames_total",
+    "Frames received on the LLM WebSocket by interaction_type",
+    ["interaction_type"]
+)
+LLM_SOCKET_TURN_SECONDS = Histogram(
+    "voice_agent_llm_socket_turn_seconds",
+    "LLM WebSocket turn latency, frame received to final frame queued",
+    ["interaction_type", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_SOCKET_FIRST_CHUNK_SECONDS = Histogram(
+    "voice_agent_llm_socket_first_chunk_seconds",
+    "response_required frame received to first response chunk queued",
+    buckets=LATENCY_BUCKETS
+)
+LLM_SOCKET_SESSIONS = Gauge(
+    "voice_agent_llm_socket_sessions",
+    "Open LLM WebSocket sessions",
+    multiprocess_mode="livesum"
+)
+WEBHOOK_EVENTS_TOTAL = Counter(
+    "voice_agent_webhook_events_total",
+    "Retell webhooks received, by event and intake outcome (queued, duplicate, ignored, invalid, error)",
+    ["event", "outcome"]
+)
+WEBHOOK_PROCESSING_SECONDS = Histogram(
+    "voice_agent_webhook_processing_seconds",
+    "Webhook queue worker processing time by event",
+    ["event", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+
+def interaction_label(interaction_type: Optional[str]) -> str:
+    return interaction_type if interaction_type in INTERACTION_TYPES else "other"
+
+
+def observe_openai(operation: str, model: str, started: float, outcome: str, usage: Any = None) -> None:
+    """Record one OpenAI call; `usage` is the response's usage block, if any"""
+    OPENAI_REQUEST_SECONDS.labels(operation, model, outcome).observe(time.perf_counter() - started)
+    if usage is not None:
+        OPENAI_TOKENS.labels(operation, model, "prompt").inc(usage.prompt_tokens or 0)
+        OPENAI_TOKENS.labels(operation, model, "completion").inc(usage.completion_tokens or 0)
+
+
+def render_metrics() -> tuple:
+    """(body, content type) for GET /metrics.
+    
+    With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR (an empty
+    directory, cleared on deploy) so every worker's samples are aggregated.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,137 @@
+# backend/app/middleware.py
+from .config import settings
+from .etag import ENCODING_SUFFIXES
+import gzip
+import logging
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best of br / gzip the client accepts (q > 0), or None for identity"""
+    offered: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        offered[name.strip().lower()] = q
+    
+    def accepted(encoding: str) -> float:
+        return offered.get(encoding, offered.get("*", 0.0))
+    
+    candidates = [("br", accepted("br")), ("gzip", accepted("gzip"))] if brotli else [("gzip", accepted("gzip"))]
+    candidates = [c for c in candidates if c[1] > 0]
+    if not candidates:
+        return None
+    # Highest q wins; on a tie the earlier (smaller) encoding
+    return max(candidates, key=lambda c: c[1])[0]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Negotiated gzip / brotli for complete responses above a size threshold.
+    
+    Only single-message bodies are compressed; streamed responses (SSE,
+    batch progress) pass through untouched so events are not held back in
+    a compressor buffer. A strong ETag gets an encoding suffix so caches
+    never confuse the compressed and identity bodies.
+    """
+    
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.compression_min_bytes if minimum_size is None else minimum_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict((k.lower(), v) for k, v in scope.get("headers", []))
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        start_message: Optional[dict] = None
+        
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers until we know whether the body is compressed
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            response_headers = list(start.get("headers", []))
+            compressible = self._compressible(response_headers)
+            if compressible or start["status"] == 304:
+                response_headers = self._add_vary(response_headers)
+            
+            if (encoding and compressible and not message.get("more_body", False)
+                    and len(body) >= self.minimum_size):
+                body = compress(body, encoding)
+                response_headers = self._encoded_headers(response_headers, encoding, len(body))
+                message = {**message, "body": body}
+            
+            await send({**start, "headers": response_headers})
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+    
+    @staticmethod
+    def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+        content_type = b""
+        for key, value in headers:
+            name = key.lower()
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        content_type = content_type.decode("latin-1").lower()
+        if content_type.startswith("text/event-stream"):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+    
+    @staticmethod
+    def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+        for i, (key, value) in enumerate(headers):
+            if key.lower() == b"vary":
+                if b"accept-encoding" not in value.lower():
+                    headers[i] = (key, value + b", Accept-Encoding")
+                return headers
+        return headers + [(b"vary", b"Accept-Encoding")]
+    
+    @staticmethod
+    def _encoded_headers(headers: List[Tuple[bytes, bytes]], encoding: str,
+                         length: int) -> List[Tuple[bytes, bytes]]:
+        suffix = ENCODING_SUFFIXES[0] if encoding == "gzip" else ENCODING_SUFFIXES[1]
+        result = []
+        for key, value in headers:
+            name = key.lower()
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/") and value.endswith(b'"'):
+                value = value[:-1] + suffix.encode("latin-1") + b'"'
+            result.append((key, value))
+        result.append((b"content-encoding", encoding.encode("latin-1")))
+        result.append((b"content-length", str(length).encode("latin-1")))
+        return result
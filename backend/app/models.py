@@ -1,8 +1,9 @@
 
 # backend/app/models.py
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
+from .services.prompt_template import validate_call_prompt
 
 # ENUM types matching database schema
 ScenarioType = Literal["dispatch", "emergency"]
@@ -16,11 +17,8 @@ class AgentCreate(BaseModel):
     
     @validator('system_prompt')
     def validate_prompt_placeholders(cls, v):
-        required_placeholders = ["{driver_name}", "{load_number}"]
-        missing_placeholders = [p for p in required_placeholders if p not in v]
-        if missing_placeholders:
-            raise ValueError(f"System prompt must contain placeholders: {missing_placeholders}")
-        return v
+        # Compiles the template: unknown or malformed placeholders fail here, not mid-call
+        return validate_call_prompt(v)
     
     @validator('voice_settings')
     def validate_voice_settings(cls, v):
@@ -41,10 +39,7 @@ class AgentUpdate(BaseModel):
     @validator('system_prompt')
     def validate_prompt_placeholders(cls, v):
         if v is not None:
-            required_placeholders = ["{driver_name}", "{load_number}"]
-            missing_placeholders = [p for p in required_placeholders if p not in v]
-            if missing_placeholders:
-                raise ValueError(f"System prompt must contain placeholders: {missing_placeholders}")
+            validate_call_prompt(v)
         return v
 
 # Response Models
@@ -83,6 +78,45 @@ class CallTrigger(BaseModel):
     driver_phone: str = Field(..., pattern=r'^\+?[1-9]\d{1,14}$')
     load_number: str = Field(..., min_length=1, max_length=50)
 
+class CallTriggerBatch(BaseModel):
+    calls: List[CallTrigger] = Field(..., min_length=1, description="Calls to place")
+    concurrency: Optional[int] = Field(None, ge=1, le=100, description="Max Retell calls being created at once")
+    interval_ms: Optional[int] = Field(None, ge=0, le=60000, description="Minimum delay between dispatch starts")
+
+class BatchCallProgress(BaseModel):
+    call_id: str
+    driver_phone: str
+    load_number: str
+    status: Literal["queued", "dispatching", "waiting_for_caller_id", "dispatched", "failed"]
+    retell_call_id: Optional[str] = None
+    error: Optional[str] = None
+
+class CallBatchResponse(BaseModel):
+    batch_id: str
+    total: int
+    counts: Dict[str, int]
+    concurrency: int
+    interval_ms: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    done: bool
+    calls: List[BatchCallProgress]
+
+class CallTurnMetrics(BaseModel):
+    """Timeline of one response_required turn; durations are ms from frame receipt"""
+    response_id: Optional[int] = None
+    received_at: datetime
+    context_ms: Optional[float] = None
+    first_token_ms: Optional[float] = None
+    first_chunk_ms: Optional[float] = None
+    generation_ms: Optional[float] = None
+    sent_ms: Optional[float] = None
+    sent_at: Optional[datetime] = None
+    prompt_tokens: Optional[int] = None
+    model: Optional[str] = None
+    streamed: bool = True
+    outcome: str
+
 class CallResponse(BaseModel):
     id: str
     agent_id: str
@@ -94,13 +128,59 @@ class CallResponse(BaseModel):
     transcript: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+    # Only filled by GET /calls/{id}?include_turns=true
+    turn_metrics: Optional[List[CallTurnMetrics]] = None
     
     class Config:
         from_attributes = True
 
+# Columns GET /calls can project with ?fields=; id and created_at are always
+# returned because the page cursor is built from them
+CALL_LIST_FIELDS = (
+    "id", "agent_id", "retell_call_id", "driver_name", "driver_phone",
+    "load_number", "status", "transcript", "created_at", "updated_at"
+)
+
+class CallListItem(BaseModel):
+    """A call row restricted to the requested fields"""
+    id: str
+    agent_id: Optional[str] = None
+    retell_call_id: Optional[str] = None
+    driver_name: Optional[str] = None
+    driver_phone: Optional[str] = None
+    load_number: Optional[str] = None
+    status: Optional[CallStatus] = None
+    transcript: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
 class CallListResponse(BaseModel):
-    calls: list[CallResponse]
+    calls: list[CallListItem]
+    total: int = Field(..., description="Number of calls in this page")
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to fetch the next page")
+    has_more: bool = False
+
+class CallStatsGroup(BaseModel):
     total: int
+    completed: int
+    failed: int
+    success_rate: Optional[float] = Field(None, description="completed / (completed + failed)")
+    avg_duration_seconds: Optional[float] = None
+
+class AgentCallStats(CallStatsGroup):
+    agent_id: Optional[str] = None
+    agent_name: Optional[str] = None
+    scenario_type: Optional[ScenarioType] = None
+
+class ScenarioCallStats(CallStatsGroup):
+    scenario_type: Optional[ScenarioType] = None
+
+class CallStatisticsResponse(BaseModel):
+    generated_at: datetime
+    overall: CallStatsGroup
+    by_status: Dict[str, int]
+    by_agent: List[AgentCallStats]
+    by_scenario: List[ScenarioCallStats]
 
 # Summary Models
 class SummaryResponse(BaseModel):
@@ -1,8 +1,10 @@
 
 # backend/app/routers/agent.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Request, Response
 from typing import List
 from ..database import db
+from ..etag import etag_matches, make_etag, not_modified, set_etag
+from ..services.retell_service import retell_service
 from ..models import AgentCreate, AgentUpdate, AgentResponse, AgentListResponse, MessageResponse, ErrorResponse
 import logging
 
@@ -10,9 +12,15 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/agents", tags=["agents"])
 
 @router.get("/", response_model=AgentListResponse)
-async def get_all_agents():
-    """Get all active agents"""
+async def get_all_agents(request: Request, response: Response):
+    """Get all active agents (conditional: 304 if If-None-Match is current)"""
     try:
+        # Version before data: a change in between only makes the ETag stale, never too new
+        etag = make_etag("agents", *await db.get_agents_version())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        
         agents_data = await db.get_all_agents()
         agents = [AgentResponse(**agent) for agent in agents_data]
         return AgentListResponse(agents=agents, total=len(agents))
@@ -21,7 +29,7 @@ async def get_all_agents():
         raise HTTPException(status_code=500, detail="Failed to fetch agents")
 
 @router.post("/", response_model=AgentResponse, status_code=201)
-async def create_agent(agent_data: AgentCreate):
+async def create_agent(agent_data: AgentCreate, background_tasks: BackgroundTasks):
     """Create a new agent configuration"""
     try:
         # Convert Pydantic model to dict
@@ -33,6 +41,9 @@ async def create_agent(agent_data: AgentCreate):
         if not created_agent:
             raise HTTPException(status_code=400, detail="Failed to create agent")
         
+        # Create the Retell LLM/agent now so the first call does not pay for it
+        background_tasks.add_task(retell_service.provision_agent, created_agent)
+        
         return AgentResponse(**created_agent)
     except ValueError as e:
         # Validation errors from Pydantic
@@ -58,7 +69,7 @@ async def get_agent(agent_id: str):
         raise HTTPException(status_code=500, detail="Failed to fetch agent")
 
 @router.put("/{agent_id}", response_model=AgentResponse)
-async def update_agent(agent_id: str, agent_data: AgentUpdate):
+async def update_agent(agent_id: str, agent_data: AgentUpdate, background_tasks: BackgroundTasks):
     """Update an existing agent configuration"""
     try:
         # Check if agent exists
@@ -78,6 +89,11 @@ async def update_agent(agent_id: str, agent_data: AgentUpdate):
         if not updated_agent:
             raise HTTPException(status_code=400, detail="Failed to update agent")
         
+        # Prompt/voice changes make the provisioned Retell objects stale
+        if "system_prompt" in update_dict or "voice_settings" in update_dict:
+            retell_service.invalidate_agent(agent_id)
+            background_tasks.add_task(retell_service.provision_agent, updated_agent)
+        
         return AgentResponse(**updated_agent)
     except HTTPException:
         raise
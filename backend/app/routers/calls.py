@@ -1,8 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import List, Optional
+from ..config import settings
 from ..database import db
-from ..models import CallTrigger, CallResponse, CallListResponse, SummaryResponse, MessageResponse, ApiResponse
+from ..etag import etag_matches, make_etag, not_modified, set_etag
+from ..models import (
+    CallTrigger, CallTriggerBatch, CallBatchResponse, CallResponse, CallListItem, CallListResponse,
+    CallStatus, CallStatisticsResponse, SummaryResponse, MessageResponse, ApiResponse, CALL_LIST_FIELDS
+)
+from ..services.call_dispatcher import call_dispatcher
+from ..services.event_bus import event_bus, publish_call_created
 from ..services.retell_service import retell_service
+import asyncio
+import base64
+import json
 import logging
 import uuid
 
@@ -50,32 +62,11 @@ async def trigger_call(call_data: CallTrigger):
         
         if not created_call:
             raise HTTPException(status_code=400, detail="Failed to create call")
+        publish_call_created(created_call, agent)
         
         # Integrate Retell AI call creation
-        metadata = {
-            "call_id": created_call["id"],
-            "driver_name": call_data.driver_name,
-            "load_number": call_data.load_number
-        }
+        await call_dispatcher.dispatch(created_call, agent)
         
-        retell_response = await retell_service.create_retell_call(
-            phone_number=call_data.driver_phone,
-            agent_config=agent,
-            metadata=metadata
-        )
-        
-        if retell_response and not retell_response.get("error"):
-            # Update call with Retell call ID
-            await db.update_call_status(
-                created_call["id"], 
-                "in_progress",
-                retell_call_id=retell_response.get("call_id")
-            )
-            logger.info(f"Retell call created: {retell_response.get('call_id')}")
-        else:
-            error_msg = retell_response.get("details", "Unknown error") if retell_response else "No response"
-            logger.warning(f"Failed to create Retell call: {error_msg}, but call record saved")
-
         logger.info(f"Call triggered: {created_call['id']}")
         
         return CallResponse(**created_call)
@@ -86,27 +77,253 @@ async def trigger_call(call_data: CallTrigger):
         logger.error(f"Failed to trigger call: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to trigger call")
 
-@router.get("/", response_model=CallListResponse)
-async def get_all_calls():
-    """Get all calls history"""
+@router.post("/trigger-batch", response_model=CallBatchResponse, status_code=202)
+async def trigger_call_batch(batch_data: CallTriggerBatch):
+    """Save many calls in one insert and dispatch them to Retell in the background"""
+    try:
+        if len(batch_data.calls) > settings.batch_max_calls:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.batch_max_calls} calls")
+        
+        # Look up each distinct agent once
+        agent_ids = {call.agent_id for call in batch_data.calls}
+        agent_rows = await asyncio.gather(*(db.get_agent_by_id(agent_id) for agent_id in agent_ids))
+        agents = {agent["id"]: agent for agent in agent_rows if agent}
+        missing = sorted(agent_ids - agents.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Agent not found: {', '.join(missing)}")
+        
+        call_rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "agent_id": call.agent_id,
+                "driver_name": call.driver_name,
+                "driver_phone": call.driver_phone,
+                "load_number": call.load_number,
+                "status": "pending"
+            }
+            for call in batch_data.calls
+        ]
+        
+        created_calls = await db.insert_calls(call_rows)
+        if len(created_calls) != len(call_rows):
+            raise HTTPException(status_code=400, detail="Failed to create calls")
+        for created_call in created_calls:
+            publish_call_created(created_call, agents[created_call["agent_id"]])
+        
+        batch = call_dispatcher.start_batch(
+            created_calls,
+            agents,
+            concurrency=batch_data.concurrency,
+            interval_ms=batch_data.interval_ms
+        )
+        return CallBatchResponse(**batch.snapshot())
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to trigger call batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to trigger call batch")
+
+@router.get("/batches/{batch_id}", response_model=CallBatchResponse)
+async def get_call_batch(batch_id: str):
+    """Get per-call dispatch progress for a batch"""
+    batch = call_dispatcher.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return CallBatchResponse(**batch.snapshot())
+
+@router.get("/batches/{batch_id}/events")
+async def stream_call_batch(batch_id: str, request: Request):
+    """Stream batch progress as Server-Sent Events until the batch finishes"""
+    batch = call_dispatcher.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    async def event_stream():
+        queue = batch.subscribe()
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(batch.snapshot())}\n\n"
+            while not batch.done:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event[event['type']])}\n\n"
+            # Drain anything published alongside the final batch event
+            while not queue.empty():
+                event = queue.get_nowait()
+                yield f"event: {event['type']}\ndata: {json.dumps(event[event['type']])}\n\n"
+        finally:
+            batch.unsubscribe(queue)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.get("/events")
+async def stream_call_events(request: Request):
+    """Stream call lifecycle deltas as Server-Sent Events.
+    
+    Events: call.created (new row), call.updated (changed fields) and
+    resync (events were missed - refetch GET /calls). Reconnecting clients
+    send Last-Event-ID and get the events they missed replayed.
+    """
+    last_event_id = request.headers.get("last-event-id")
     try:
-        calls_data = await db.get_calls_history()
-        calls = [CallResponse(**call) for call in calls_data]
-        return CallListResponse(calls=calls, total=len(calls))
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    subscription = event_bus.subscribe(last_event_id)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if subscription.overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    subscription.overflowed = False
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps({**event['data'], 'at': event['at']})}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def with_success_rate(group: dict) -> dict:
+    finished = group["completed"] + group["failed"]
+    return {**group, "success_rate": round(group["completed"] / finished, 4) if finished else None}
+
+@router.get("/stats", response_model=CallStatisticsResponse)
+async def get_call_statistics(
+    since: Optional[datetime] = Query(None, description="Only count calls created at or after this time")
+):
+    """Call counts, success rates and durations by status, agent and scenario"""
+    try:
+        stats = await db.get_call_statistics(since.isoformat() if since else None)
+    except Exception as e:
+        logger.error(f"Failed to fetch call statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch call statistics")
+    
+    return CallStatisticsResponse(
+        generated_at=stats["generated_at"],
+        overall=with_success_rate(stats["overall"]),
+        by_status=stats["by_status"],
+        by_agent=[with_success_rate(group) for group in stats["by_agent"]],
+        by_scenario=[with_success_rate(group) for group in stats["by_scenario"]]
+    )
+
+def encode_cursor(row: dict) -> str:
+    """Opaque page cursor from the last row's (created_at, id)"""
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, call_id = json.loads(raw)
+        datetime.fromisoformat(created_at)
+        uuid.UUID(call_id)
+        return {"created_at": created_at, "id": call_id}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(CALL_LIST_FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(CALL_LIST_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # The cursor needs id and created_at whatever the caller asked for
+    return [field for field in CALL_LIST_FIELDS if field in requested or field in ("id", "created_at")]
+
+@router.get("/", response_model=CallListResponse, response_model_exclude_unset=True)
+async def get_all_calls(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    status: Optional[CallStatus] = None,
+    agent_id: Optional[str] = None,
+    driver_phone: Optional[str] = None,
+    load_number: Optional[str] = None,
+    created_after: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_before: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,status,driver_name")
+):
+    """Get calls history, newest first, one cursor page at a time.
+    
+    Conditional: the ETag covers the query and the (count, max updated_at)
+    of the filtered calls, so a matching If-None-Match gets a 304 without
+    reading or serializing the page.
+    """
+    columns = parse_fields(fields)
+    before = decode_cursor(cursor) if cursor else None
+    filters = {
+        "status": status,
+        "agent_id": agent_id,
+        "driver_phone": driver_phone,
+        "load_number": load_number,
+        "created_after": created_after.isoformat() if created_after else None,
+        "created_before": created_before.isoformat() if created_before else None
+    }
+    
+    try:
+        # Version before data: a change in between only makes the ETag stale, never too new
+        version = await db.get_calls_version(filters)
+        etag = make_etag("calls", ",".join(columns), json.dumps(before), limit, json.dumps(filters, default=str), *version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        
+        # One extra row tells us whether another page exists
+        rows = await db.get_calls_page(columns, filters, before, limit + 1)
     except Exception as e:
         logger.error(f"Failed to fetch calls: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch calls")
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return CallListResponse(
+        calls=[CallListItem(**row) for row in rows],
+        total=len(rows),
+        next_cursor=encode_cursor(rows[-1]) if has_more else None,
+        has_more=has_more
+    )
 
-@router.get("/{call_id}", response_model=CallResponse)
-async def get_call(call_id: str):
+@router.get("/{call_id}", response_model=CallResponse, response_model_exclude_unset=True)
+async def get_call(
+    call_id: str,
+    include_turns: bool = Query(False, description="Include the per-turn latency timeline of the live call")
+):
     """Get specific call by ID"""
     try:
-        call_data = await db.get_call_by_id(call_id)
+        # turn_metrics is left unset (and so omitted) unless it was asked for
+        extra = {}
+        if include_turns:
+            call_data, extra["turn_metrics"] = await asyncio.gather(
+                db.get_call_by_id(call_id),
+                db.get_call_turn_metrics(call_id)
+            )
+        else:
+            call_data = await db.get_call_by_id(call_id)
         
         if not call_data:
             raise HTTPException(status_code=404, detail="Call not found")
         
-        return CallResponse(**call_data)
+        return CallResponse(**call_data, **extra)
     except HTTPException:
         raise
     except Exception as e:
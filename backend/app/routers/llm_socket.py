@@ -1,49 +1,125 @@
 # backend/app/routers/llm_websocket.py
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from ..services.openai_service import openai_service
-from ..database import db
-import json
+from ..codec import LLMFrame, codec
+from ..config import settings
+from ..metrics import (
+    LLM_SOCKET_FIRST_CHUNK_SECONDS, LLM_SOCKET_FRAMES, LLM_SOCKET_SESSIONS, LLM_SOCKET_TURN_SECONDS, interaction_label
+)
+from ..services.call_session import CallSession
+from ..services.openai_service import CALL_MODEL, openai_service
+from datetime import datetime, timezone
 import logging
 import asyncio
+import time
+from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+class LLMConnection:
+    """Reader/writer state for one Retell LLM WebSocket.
+    
+    The reader never waits on OpenAI: generations run as tasks keyed by
+    Retell's response_id and all frames go out through a single writer task.
+    A newer response_required/reminder_required cancels the stale generation,
+    and frames still queued for a superseded response_id are dropped.
+    """
+    
+    def __init__(self, websocket: WebSocket, session: CallSession):
+        self.websocket = websocket
+        self.session = session
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.latest_response_id: Optional[int] = None
+        self.generation: Optional[asyncio.Task] = None
+    
+    def send(self, frame: dict, response_id: Optional[int] = None, on_sent: Optional[Callable[[], None]] = None) -> None:
+        """Queue a frame; frames tagged with a response_id are dropped once superseded.
+        
+        `on_sent` is called once the frame has been written to the socket.
+        """
+        self.outbox.put_nowait((response_id, codec.dumps(frame), on_sent))
+    
+    async def writer(self) -> None:
+        while True:
+            response_id, text, on_sent = await self.outbox.get()
+            if response_id is not None and response_id != self.latest_response_id:
+                continue
+            await self.websocket.send_text(text)
+            if on_sent is not None:
+                on_sent()
+    
+    def start_generation(self, response_id: Optional[int], coro) -> None:
+        self.cancel_generation()
+        self.latest_response_id = response_id
+        self.generation = asyncio.create_task(coro)
+    
+    def cancel_generation(self) -> None:
+        if self.generation is not None and not self.generation.done():
+            logger.info(f"Cancelling generation for superseded response {self.latest_response_id}")
+            self.generation.cancel()
+        self.generation = None
+
 @router.websocket("/llm-websocket")
-async def llm_websocket_handler(websocket: WebSocket):
+@router.websocket("/llm-websocket/{call_id}")
+async def llm_websocket_handler(websocket: WebSocket, call_id: Optional[str] = None):
     """Handle LLM WebSocket connections from Retell AI"""
     await websocket.accept()
-    logger.info("LLM WebSocket connection established")
+    LLM_SOCKET_SESSIONS.inc()
+    logger.info(f"LLM WebSocket connection established for call {call_id}")
+    
+    # Loads call record + agent config once for the whole connection
+    session = CallSession(retell_call_id=call_id)
+    connection = LLMConnection(websocket, session)
+    writer_task = asyncio.create_task(connection.writer())
     
     try:
+        # Ask Retell for a call_details frame so metadata is available before the first turn
+        connection.send({
+            "response_type": "config",
+            "config": {"call_details": True}
+        })
+        
         while True:
             # Receive message from Retell
             data = await websocket.receive_text()
-            request_data = json.loads(data)
+            received_at = time.perf_counter()
+            # Typed decode: only the fields below are built; turns decode on demand
+            frame = codec.decode_frame(data)
+            interaction_type = frame.interaction_type
+            LLM_SOCKET_FRAMES.labels(interaction_label(interaction_type)).inc()
             
-            logger.info(f"Received LLM request: {request_data.get('interaction_type', 'unknown')}")
+            logger.info(f"Received LLM request: {interaction_type or 'unknown'}")
             
             # Handle different interaction types
-            interaction_type = request_data.get("interaction_type")
+            session.observe(frame)
             
             if interaction_type == "ping":
-                # Respond to ping
-                response = {"response_type": "pong"}
-                await websocket.send_text(json.dumps(response))
+                # Respond to ping straight away, even mid-generation
+                connection.send({"response_type": "pong"})
+                LLM_SOCKET_TURN_SECONDS.labels("ping", "ok").observe(time.perf_counter() - received_at)
                 
             elif interaction_type == "reminder_required":
                 # Handle reminder requests
-                response = await handle_reminder_required(request_data)
-                await websocket.send_text(json.dumps(response))
+                connection.start_generation(
+                    frame.response_id,
+                    handle_reminder_required(frame, connection, received_at)
+                )
                 
             elif interaction_type == "response_required":
-                # Handle conversation responses
-                response = await handle_response_required(request_data)
-                await websocket.send_text(json.dumps(response))
+                # Handle conversation responses (sends its own, possibly streamed, frames)
+                connection.start_generation(
+                    frame.response_id,
+                    handle_response_required(frame, connection, received_at)
+                )
+                
+            elif interaction_type == "call_details":
+                # Call metadata arrives here; session.observe() already started loading
+                pass
                 
             elif interaction_type == "update_only":
                 # Handle conversation updates (no response needed)
-                await handle_update_only(request_data)
+                await handle_update_only(frame)
+                LLM_SOCKET_TURN_SECONDS.labels("update_only", "ok").observe(time.perf_counter() - received_at)
                 
             else:
                 logger.warning(f"Unknown interaction type: {interaction_type}")
@@ -57,85 +133,171 @@ async def llm_websocket_handler(websocket: WebSocket):
                 "response_type": "error",
                 "error": str(e)
             }
-            await websocket.send_text(json.dumps(error_response))
+            await websocket.send_text(codec.dumps(error_response))
         except:
             pass
+    finally:
+        connection.cancel_generation()
+        writer_task.cancel()
+        try:
+            await writer_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        session.close()
+        LLM_SOCKET_SESSIONS.dec()
+        # The call is over; store its turn timeline for GET /api/calls/{id}
+        await session.flush_turn_metrics()
 
-async def handle_reminder_required(request_data: dict) -> dict:
+async def handle_reminder_required(frame: LLMFrame, connection: LLMConnection, received_at: float) -> None:
     """Handle reminder_required interaction"""
+    session = connection.session
+    response_id = frame.response_id
+    outcome = "cancelled"  # stays so if a newer response_id supersedes this one
     try:
-        call_id = request_data.get("call_id")
+        call_id = frame.call_id
         logger.info(f"Reminder required for call {call_id}")
         
-        # Get call context from metadata
-        call_details = request_data.get("call", {})
-        metadata = call_details.get("metadata", {})
-        
-        driver_name = metadata.get("driver_name", "Driver")
-        load_number = metadata.get("load_number", "Unknown")
+        # Get call context from the session
+        await session.ensure_loaded()
+        driver_name = session.driver_name
+        load_number = session.load_number
         
         # Generate a contextual reminder
         reminder_content = f"Remember, you are speaking with {driver_name} about load {load_number}. Stay focused on getting the required dispatch information."
         
-        return {
+        connection.send({
             "response_type": "reminder_required",
+            "response_id": response_id,
             "content": reminder_content
-        }
+        }, response_id)
+        outcome = "ok"
         
     except Exception as e:
+        outcome = "error"
         logger.error(f"Error in handle_reminder_required: {str(e)}")
-        return {
+        connection.send({
             "response_type": "error",
             "error": str(e)
-        }
+        }, response_id)
+    finally:
+        LLM_SOCKET_TURN_SECONDS.labels("reminder_required", outcome).observe(time.perf_counter() - received_at)
 
-async def handle_response_required(request_data: dict) -> dict:
-    """Handle response_required interaction - main conversation logic"""
+async def handle_response_required(frame: LLMFrame, connection: LLMConnection, received_at: float) -> dict:
+    """Handle response_required interaction - main conversation logic.
+    
+    Streams the reply as partial `response` frames (content_complete False)
+    followed by a completing frame, and returns the turn timings. Runs as a
+    task that is cancelled if Retell supersedes this response_id.
+    
+    The turn's timeline (all durations in ms from frame receipt, except
+    generation_ms) is recorded on the session and stored when the call ends.
+    """
+    session = connection.session
+    response_id = frame.response_id
+    timings = {"time_to_first_chunk_ms": None, "total_ms": None, "prompt_tokens": None}
+    outcome = "cancelled"  # stays so if a newer response_id supersedes this one
+    received_wall = time.time() - (time.perf_counter() - received_at)
+    turn = {
+        "response_id": response_id,
+        "received_at": datetime.fromtimestamp(received_wall, timezone.utc).isoformat(),
+        "context_ms": None,
+        "first_token_ms": None,
+        "first_chunk_ms": None,
+        "generation_ms": None,
+        "sent_ms": None,
+        "sent_at": None,
+        "prompt_tokens": None,
+        "model": CALL_MODEL,
+        "streamed": settings.llm_streaming,
+        "outcome": outcome
+    }
+    session.record_turn(turn)
+    
+    def since_received(at: float) -> float:
+        return round((at - received_at) * 1000, 1)
+    
+    def mark_sent() -> None:
+        sent_at = time.perf_counter()
+        turn["sent_ms"] = since_received(sent_at)
+        turn["sent_at"] = datetime.fromtimestamp(received_wall + sent_at - received_at, timezone.utc).isoformat()
+    
+    def send_response(content: str, complete: bool) -> None:
+        connection.send({
+            "response_type": "response",
+            "response_id": response_id,
+            "content": content,
+            "content_complete": complete,
+            "end_call": False
+        }, response_id, mark_sent if complete else None)
+    
     try:
-        call_id = request_data.get("call_id")
-        conversation = request_data.get("conversation", [])
+        call_id = frame.call_id
+        conversation = frame.conversation
         
         logger.info(f"Response required for call {call_id}")
         
-        # Get call context
-        call_details = request_data.get("call", {})
-        metadata = call_details.get("metadata", {})
+        # Call context was loaded once for this connection
+        await session.ensure_loaded()
         
-        # Get agent configuration from our database using metadata
-        internal_call_id = metadata.get("call_id")
-        agent_config = None
+        # Bounded prompt: system prompt + pinned facts + summary + recent turns
+        prompt = openai_service.build_call_prompt(
+            conversation,
+            session.agent_config,
+            session.call_metadata,
+            session.system_prompt
+        )
+        timings["prompt_tokens"] = prompt["prompt_tokens"]
+        generation_args = {"messages": prompt["messages"]}
+        generation_started = time.perf_counter()
+        turn["context_ms"] = since_received(generation_started)
+        turn["prompt_tokens"] = prompt["prompt_tokens"]
         
-        if internal_call_id:
-            call_record = await db.get_call_by_id(internal_call_id)
-            if call_record:
-                agent_config = await db.get_agent_by_id(call_record["agent_id"])
+        if settings.llm_streaming:
+            stream_timings = {}
+            async for chunk in openai_service.stream_call_response(**generation_args, timings=stream_timings):
+                if timings["time_to_first_chunk_ms"] is None:
+                    timings["time_to_first_chunk_ms"] = (time.perf_counter() - received_at) * 1000
+                send_response(chunk, False)
+            if timings["time_to_first_chunk_ms"] is None:
+                timings["time_to_first_chunk_ms"] = (time.perf_counter() - received_at) * 1000
+            if "first_token_at" in stream_timings:
+                turn["first_token_ms"] = since_received(stream_timings["first_token_at"])
+            send_response("", True)
+        else:
+            response_content = await openai_service.generate_call_response(**generation_args)
+            timings["time_to_first_chunk_ms"] = (time.perf_counter() - received_at) * 1000
+            send_response(response_content, True)
         
-        # Use OpenAI to generate response
-        response_content = await openai_service.generate_call_response(
-            conversation=conversation,
-            agent_config=agent_config,
-            call_metadata=metadata
+        timings["total_ms"] = (time.perf_counter() - received_at) * 1000
+        turn["first_chunk_ms"] = round(timings["time_to_first_chunk_ms"], 1)
+        turn["generation_ms"] = round((time.perf_counter() - generation_started) * 1000, 1)
+        logger.info(
+            f"Turn {response_id} for call {call_id}: first audio text after "
+            f"{timings['time_to_first_chunk_ms']:.0f}ms, complete after {timings['total_ms']:.0f}ms "
+            f"({timings['prompt_tokens']} prompt tokens)"
         )
-        
-        return {
-            "response_type": "response",
-            "content": response_content,
-            "content_complete": True,
-            "end_call": False
-        }
+        outcome = "ok"
+        return timings
         
     except Exception as e:
+        outcome = "error"
         logger.error(f"Error in handle_response_required: {str(e)}")
-        return {
+        connection.send({
             "response_type": "error",
             "error": str(e)
-        }
+        }, response_id)
+        return timings
+    finally:
+        turn["outcome"] = outcome
+        LLM_SOCKET_TURN_SECONDS.labels("response_required", outcome).observe(time.perf_counter() - received_at)
+        if timings["time_to_first_chunk_ms"] is not None:
+            LLM_SOCKET_FIRST_CHUNK_SECONDS.observe(timings["time_to_first_chunk_ms"] / 1000)
 
-async def handle_update_only(request_data: dict):
+async def handle_update_only(frame: LLMFrame):
     """Handle update_only interaction - conversation logging"""
     try:
-        call_id = request_data.get("call_id")
-        conversation = request_data.get("conversation", [])
+        call_id = frame.call_id
+        conversation = frame.conversation
         
         logger.info(f"Conversation update for call {call_id}")
         
@@ -1,46 +1,103 @@
 
 # backend/app/routers/webhook.py
 from fastapi import APIRouter, Request, HTTPException
+from ..codec import CodecError, codec
 from ..database import db
+from ..metrics import WEBHOOK_EVENTS_TOTAL, WEBHOOK_PROCESSING_SECONDS
 from ..services.data_processor import data_processor
+from ..services.retell_service import retell_service
+from ..services.webhook_queue import webhook_queue
+from ..services.webhook_dedup import webhook_dedup
+from ..services.event_bus import publish_call_update
 import logging
-import json
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/webhook", tags=["webhooks"])
 
+WEBHOOK_EVENTS = {"call_started", "call_ended", "call_analyzed"}
+
 @router.post("/retell")
 async def handle_retell_webhook(request: Request):
-    """Handle webhooks from Retell AI based on official documentation"""
+    """Validate a Retell webhook, persist it to the local queue and acknowledge.
+    
+    Processing (DB updates, transcript extraction) happens in the webhook
+    queue workers, so the response time does not depend on OpenAI.
+    """
     try:
-        # Get raw body
+        # Only the routing fields are decoded here; the body is queued as received
         body = await request.body()
-        payload = json.loads(body.decode('utf-8'))
-        
-        event_type = payload.get("event")
-        call_data = payload.get("call", {})
-        call_id = call_data.get("call_id")
-        
-        logger.info(f"Retell webhook received: {event_type} for call {call_id}")
-        
+        envelope = codec.decode_webhook(body)
+    except (CodecError, UnicodeDecodeError) as e:
+        logger.error(f"Invalid webhook payload: {str(e)}")
+        WEBHOOK_EVENTS_TOTAL.labels("unknown", "invalid").inc()
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    
+    event_type = envelope.event
+    call_id = envelope.call_id
+    
+    logger.info(f"Retell webhook received: {event_type} for call {call_id}")
+    
+    if event_type not in WEBHOOK_EVENTS:
+        logger.warning(f"Unknown webhook event: {event_type}")
+        WEBHOOK_EVENTS_TOTAL.labels("other", "ignored").inc()
+        return {"status": "ignored"}
+    
+    # Redeliveries are acknowledged without touching the DB or the LLM
+    claimed = False
+    if call_id:
+        try:
+            if not await webhook_dedup.claim(call_id, event_type):
+                logger.info(f"Duplicate webhook {event_type} for call {call_id} ignored")
+                WEBHOOK_EVENTS_TOTAL.labels(event_type, "duplicate").inc()
+                return {"status": "duplicate"}
+            claimed = True
+        except Exception as e:
+            # Fail open: processing an event twice beats dropping it
+            logger.error(f"Webhook dedup check failed for call {call_id}: {str(e)}")
+    
+    try:
+        event_id = await webhook_queue.enqueue(event_type, envelope.raw, retell_call_id=call_id)
+    except Exception as e:
+        # Not persisted - let Retell retry the delivery
+        logger.error(f"Failed to queue webhook {event_type} for call {call_id}: {str(e)}")
+        if claimed:
+            await webhook_dedup.release(call_id, event_type)
+        WEBHOOK_EVENTS_TOTAL.labels(event_type, "error").inc()
+        raise HTTPException(status_code=500, detail="Failed to queue webhook event")
+    
+    WEBHOOK_EVENTS_TOTAL.labels(event_type, "queued").inc()
+    return {"status": "queued", "event_id": event_id}
+
+@router.get("/retell/dead-letters")
+async def get_dead_letters(limit: int = 100):
+    """Webhook events that failed every retry"""
+    dead_letters = await webhook_queue.get_dead_letters(limit)
+    return {"events": dead_letters, "total": len(dead_letters)}
+
+@router.post("/retell/dead-letters/{event_id}/retry")
+async def retry_dead_letter(event_id: int):
+    """Requeue a dead-lettered webhook event"""
+    if not await webhook_queue.retry_dead_letter(event_id):
+        raise HTTPException(status_code=404, detail="Dead-letter event not found")
+    return {"status": "queued", "event_id": event_id}
+
+async def process_webhook_event(event_type: str, payload: dict):
+    """Queue worker entry point; raising makes the queue retry the event"""
+    call_data = payload.get("call") or {}
+    started = time.perf_counter()
+    outcome = "error"
+    
+    try:
         if event_type == "call_started":
             await handle_call_started(call_data)
         elif event_type == "call_ended":
             await handle_call_ended(call_data)
         elif event_type == "call_analyzed":
             await handle_call_analyzed(call_data)
-        else:
-            logger.warning(f"Unknown webhook event: {event_type}")
-        
-        return {"status": "ok"}
-        
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON in webhook payload")
-        raise HTTPException(status_code=400, detail="Invalid JSON payload")
-    except Exception as e:
-        logger.error(f"Webhook processing error: {str(e)}")
-        # Return 200 to avoid retries for processing errors
-        return {"status": "error", "message": str(e)}
+        outcome = "ok"
+    finally:
+        WEBHOOK_PROCESSING_SECONDS.labels(event_type, outcome).observe(time.perf_counter() - started)
 
 async def handle_call_started(call_data: dict):
     """Handle call started event"""
@@ -60,13 +117,16 @@ async def handle_call_started(call_data: dict):
                 "start_timestamp": call_data.get("start_timestamp")
             }
             
-            await db.update_call_status(internal_call_id, "in_progress", **update_data)
+            if not await db.update_call_status(internal_call_id, "in_progress", **update_data):
+                raise RuntimeError(f"Failed to update call {internal_call_id}")
+            publish_call_update(internal_call_id, status="in_progress", retell_call_id=retell_call_id)
             logger.info(f"Updated call {internal_call_id} to in_progress")
         else:
             logger.warning(f"No internal call ID found in metadata for {retell_call_id}")
         
     except Exception as e:
         logger.error(f"Error handling call_started: {str(e)}")
+        raise
 
 async def handle_call_ended(call_data: dict):
     """Handle call ended event"""
@@ -77,6 +137,9 @@ async def handle_call_ended(call_data: dict):
         
         logger.info(f"Call ended - Retell ID: {retell_call_id}, Internal ID: {internal_call_id}")
         
+        # Free the caller-ID slot this call was holding
+        await retell_service.release_caller_id(retell_call_id=retell_call_id)
+        
         if internal_call_id:
             # Extract call information
             transcript = call_data.get("transcript", "")
@@ -102,12 +165,21 @@ async def handle_call_ended(call_data: dict):
                 "call_status": call_status
             }
             
-            await db.update_call_status(internal_call_id, internal_status, **update_data)
+            if not await db.update_call_status(internal_call_id, internal_status, **update_data):
+                raise RuntimeError(f"Failed to update call {internal_call_id}")
+            publish_call_update(
+                internal_call_id,
+                status=internal_status,
+                disconnection_reason=disconnection_reason,
+                has_transcript=bool(transcript)
+            )
             
             # Process transcript if available and call was successful
             if transcript and internal_status == "completed":
                 logger.info(f"Processing transcript for call {internal_call_id}")
-                await data_processor.process_completed_call(internal_call_id, transcript)
+                if not await data_processor.process_completed_call(internal_call_id, transcript):
+                    raise RuntimeError(f"Failed to process transcript for call {internal_call_id}")
+                publish_call_update(internal_call_id, summary_ready=True)
             else:
                 logger.info(f"No transcript to process for call {internal_call_id} (status: {internal_status})")
             
@@ -117,6 +189,7 @@ async def handle_call_ended(call_data: dict):
         
     except Exception as e:
         logger.error(f"Error handling call_ended: {str(e)}")
+        raise
 
 async def handle_call_analyzed(call_data: dict):
     """Handle call analysis completion"""
@@ -136,11 +209,15 @@ async def handle_call_analyzed(call_data: dict):
             logger.info(f"Call analysis available for {internal_call_id}: {list(call_analysis.keys())}")
             
             # Optionally update the call record with analysis data
-            await db.update_call_status(
+            updated = await db.update_call_status(
                 internal_call_id, 
                 None,  # Don't change status
                 call_analysis=call_analysis
             )
+            if not updated:
+                raise RuntimeError(f"Failed to store call analysis for {internal_call_id}")
+            publish_call_update(internal_call_id, has_analysis=True)
         
     except Exception as e:
-        logger.error(f"Error handling call_analyzed: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error handling call_analyzed: {str(e)}")
+        raise
\ No newline at end of file
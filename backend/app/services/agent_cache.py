@@ -0,0 +1,156 @@
+# backend/app/services/agent_cache.py
+from ..config import settings
+from .local_store import LocalSQLite
+from collections import OrderedDict
+import asyncio
+import copy
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+create table if not exists agent_versions (
+    agent_id text primary key,
+    version integer not null,
+    updated_at real not null
+);
+"""
+
+
+class AgentCache:
+    """Read-through cache of agent rows keyed by agent ID.
+    
+    Entries live for agent_cache_ttl seconds in a bounded LRU. Every write
+    through Database bumps the agent's version stamp in a SQLite file under
+    local_state_dir, shared by all uvicorn workers; a hit is only served if
+    the stamp still matches the one read before the row was fetched, so an
+    update in one worker is seen by the next read in every other worker.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.local_state_dir, "agent_cache.db")
+        self.ttl = settings.agent_cache_ttl
+        self.max_entries = settings.agent_cache_max_entries
+        # agent_id -> (version, expires_at, row)
+        self._entries: "OrderedDict[str, Tuple[int, float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._db = LocalSQLite(self.path, _SCHEMA)
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "expired": 0,
+            "shared_inflight": 0,
+            "writes": 0
+        }
+        self._fetches = 0
+        self._fetch_seconds = 0.0
+    
+    async def _version(self, agent_id: str) -> int:
+        # On the thread pool: the connection lock may be held by a bump()
+        # waiting out another worker's write lock
+        row = await self._db.call(lambda conn: conn.execute(
+            "select version from agent_versions where agent_id = ?", (agent_id,)
+        ).fetchone())
+        return row[0] if row else 0
+    
+    def _store(self, agent_id: str, version: int, row: Dict[str, Any]) -> None:
+        self._entries[agent_id] = (version, time.monotonic() + self.ttl, row)
+        self._entries.move_to_end(agent_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def get_or_load(self, agent_id: str,
+                          load: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """Cached agent row, or load() it and cache the result (None is not cached)"""
+        try:
+            version = await self._version(agent_id)
+        except Exception as e:
+            # Without the stamp a hit cannot be trusted across workers
+            logger.error(f"Agent cache version read failed: {str(e)}")
+            return await load()
+        
+        entry = self._entries.get(agent_id)
+        if entry is not None:
+            cached_version, expires_at, row = entry
+            if cached_version == version and expires_at > time.monotonic():
+                self._entries.move_to_end(agent_id)
+                self.stats["hits"] += 1
+                return copy.deepcopy(row)
+            self.stats["stale" if cached_version != version else "expired"] += 1
+            del self._entries[agent_id]
+        
+        inflight = self._inflight.get(agent_id)
+        if inflight is not None:
+            self.stats["shared_inflight"] += 1
+            row = await asyncio.shield(inflight)
+            return copy.deepcopy(row)
+        
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[agent_id] = future
+        try:
+            started = time.perf_counter()
+            row = await load()
+            self._fetches += 1
+            self._fetch_seconds += time.perf_counter() - started
+            # Stored under the version read before the fetch: a write that
+            # raced with it leaves the entry stale, never wrongly fresh
+            if row is not None:
+                self._store(agent_id, version, row)
+            future.set_result(row)
+            return copy.deepcopy(row)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(agent_id, None)
+    
+    async def write(self, agent_id: str, row: Optional[Dict[str, Any]]) -> None:
+        """Record a write: bump the shared version stamp and cache the new row"""
+        self.stats["writes"] += 1
+        self._entries.pop(agent_id, None)
+        
+        def bump(conn: sqlite3.Connection) -> int:
+            return conn.execute(
+                "insert into agent_versions (agent_id, version, updated_at) values (?, 1, ?) "
+                "on conflict (agent_id) do update set version = version + 1, updated_at = excluded.updated_at "
+                "returning version",
+                (agent_id, time.time())
+            ).fetchone()[0]
+        
+        try:
+            version = await self._db.call(bump)
+        except Exception as e:
+            logger.error(f"Failed to bump agent cache version for {agent_id}: {str(e)}")
+            return
+        if row is not None:
+            self._store(agent_id, version, copy.deepcopy(row))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["shared_inflight"] + self.stats["misses"]
+        hits = self.stats["hits"] + self.stats["shared_inflight"]
+        mean_fetch_ms = self._fetch_seconds * 1000 / self._fetches if self._fetches else None
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_ratio": round(hits / lookups, 3) if lookups else None,
+            "mean_fetch_ms": round(mean_fetch_ms, 2) if mean_fetch_ms is not None else None,
+            # Each hit skipped one database round trip
+            "estimated_ms_saved": round(hits * mean_fetch_ms, 1) if mean_fetch_ms is not None else None
+        }
+    
+    def close(self) -> None:
+        self._db.close()
+
+
+# Global agent cache instance
+agent_cache = AgentCache()
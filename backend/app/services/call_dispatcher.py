@@ -0,0 +1,220 @@
+# backend/app/services/call_dispatcher.py
+from ..config import settings
+from ..database import db, CallStatus
+from .retell_service import CALLER_IDS_BUSY, retell_service
+from .event_bus import publish_call_update
+from collections import OrderedDict
+from datetime import datetime
+import asyncio
+import logging
+import time
+import uuid
+from typing import Callable, Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+
+class CallBatch:
+    """Progress of one bulk trigger; per-call state lives in `calls`"""
+    
+    def __init__(self, batch_id: str, calls: List[Dict[str, Any]], concurrency: int, interval_ms: int):
+        self.batch_id = batch_id
+        self.concurrency = concurrency
+        self.interval_ms = interval_ms
+        self.created_at = datetime.utcnow().isoformat()
+        self.finished_at: Optional[str] = None
+        self.calls: Dict[str, Dict[str, Any]] = OrderedDict(
+            (call["id"], {
+                "call_id": call["id"],
+                "driver_phone": call["driver_phone"],
+                "load_number": call["load_number"],
+                "status": "queued",
+                "retell_call_id": None,
+                "error": None
+            })
+            for call in calls
+        )
+        self._subscribers: List[asyncio.Queue] = []
+    
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+    
+    def update(self, call_id: str, **fields) -> None:
+        self.calls[call_id].update(fields)
+        self._publish({"type": "call", "call": dict(self.calls[call_id])})
+    
+    def finish(self) -> None:
+        self.finished_at = datetime.utcnow().isoformat()
+        self._publish({"type": "batch", "batch": self.snapshot(include_calls=False)})
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+    
+    def _publish(self, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+    
+    def snapshot(self, include_calls: bool = True) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for call in self.calls.values():
+            counts[call["status"]] = counts.get(call["status"], 0) + 1
+        
+        snapshot = {
+            "batch_id": self.batch_id,
+            "total": len(self.calls),
+            "counts": counts,
+            "concurrency": self.concurrency,
+            "interval_ms": self.interval_ms,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "done": self.done
+        }
+        if include_calls:
+            snapshot["calls"] = list(self.calls.values())
+        return snapshot
+
+
+class CallDispatcher:
+    """Places Retell calls for call rows, one at a time or as paced batches"""
+    
+    def __init__(self):
+        self._batches: "OrderedDict[str, CallBatch]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    async def dispatch(self,
+                       call: Dict[str, Any],
+                       agent: Dict[str, Any],
+                       caller_id_wait: float = 0.0,
+                       on_wait: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """Create the Retell call for a saved call row and record its Retell ID.
+        
+        While every caller ID is busy, keeps retrying for up to
+        `caller_id_wait` seconds (calling `on_wait` once when it starts
+        waiting). A call that still could not be placed is marked failed.
+        """
+        metadata = {
+            "call_id": call["id"],
+            "driver_name": call["driver_name"],
+            "load_number": call["load_number"]
+        }
+        
+        deadline = time.monotonic() + caller_id_wait
+        while True:
+            retell_response = await retell_service.create_retell_call(
+                phone_number=call["driver_phone"],
+                agent_config=agent,
+                metadata=metadata
+            )
+            remaining = deadline - time.monotonic()
+            if (retell_response or {}).get("error") != CALLER_IDS_BUSY or remaining <= 0:
+                break
+            if on_wait is not None:
+                on_wait()
+                on_wait = None
+            await retell_service.wait_for_caller_id(min(remaining, settings.caller_id_wait_poll))
+        
+        if retell_response and not retell_response.get("error"):
+            # Update call with Retell call ID
+            await db.update_call_status(
+                call["id"],
+                CallStatus.IN_PROGRESS,
+                retell_call_id=retell_response.get("call_id")
+            )
+            publish_call_update(
+                call["id"],
+                status=CallStatus.IN_PROGRESS.value,
+                retell_call_id=retell_response.get("call_id")
+            )
+            logger.info(f"Retell call created: {retell_response.get('call_id')}")
+        else:
+            error_msg = retell_response.get("details", "Unknown error") if retell_response else "No response"
+            logger.warning(f"Failed to create Retell call for {call['id']}: {error_msg}")
+            await db.update_call_status(call["id"], CallStatus.FAILED)
+            publish_call_update(call["id"], status=CallStatus.FAILED.value)
+        
+        return retell_response or {"error": "No response"}
+    
+    def start_batch(self,
+                    calls: List[Dict[str, Any]],
+                    agents: Dict[str, Dict[str, Any]],
+                    concurrency: Optional[int] = None,
+                    interval_ms: Optional[int] = None) -> CallBatch:
+        """Queue saved call rows for dispatch in the background and return the batch"""
+        batch = CallBatch(
+            batch_id=str(uuid.uuid4()),
+            calls=calls,
+            concurrency=concurrency or settings.batch_dispatch_concurrency,
+            interval_ms=settings.batch_dispatch_interval_ms if interval_ms is None else interval_ms
+        )
+        
+        self._batches[batch.batch_id] = batch
+        while len(self._batches) > settings.batch_retention:
+            old_id, old_batch = next(iter(self._batches.items()))
+            if not old_batch.done:
+                break
+            del self._batches[old_id]
+        
+        task = asyncio.create_task(self._run_batch(batch, calls, agents))
+        self._tasks[batch.batch_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(batch.batch_id, None))
+        
+        logger.info(f"Batch {batch.batch_id} queued: {len(calls)} calls, concurrency {batch.concurrency}")
+        return batch
+    
+    def get_batch(self, batch_id: str) -> Optional[CallBatch]:
+        return self._batches.get(batch_id)
+    
+    async def _run_batch(self, batch: CallBatch, calls: List[Dict[str, Any]], agents: Dict[str, Dict[str, Any]]) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        for call in calls:
+            queue.put_nowait(call)
+        
+        # Pacing: dispatch starts are spaced at least interval_ms apart across all workers
+        pace_lock = asyncio.Lock()
+        next_start = time.monotonic()
+        
+        async def worker():
+            nonlocal next_start
+            while True:
+                try:
+                    call = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
+                async with pace_lock:
+                    delay = next_start - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    next_start = time.monotonic() + batch.interval_ms / 1000
+                
+                batch.update(call["id"], status="dispatching")
+                try:
+                    result = await self.dispatch(
+                        call,
+                        agents[call["agent_id"]],
+                        caller_id_wait=settings.batch_caller_id_wait,
+                        on_wait=lambda: batch.update(call["id"], status="waiting_for_caller_id")
+                    )
+                    if result.get("error"):
+                        batch.update(call["id"], status="failed", error=str(result.get("details") or result["error"]))
+                    else:
+                        batch.update(call["id"], status="dispatched", retell_call_id=result.get("call_id"))
+                except Exception as e:
+                    logger.error(f"Batch {batch.batch_id} failed to dispatch call {call['id']}: {str(e)}")
+                    batch.update(call["id"], status="failed", error=str(e))
+        
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(batch.concurrency, len(calls)))))
+        finally:
+            batch.finish()
+            logger.info(f"Batch {batch.batch_id} finished: {batch.snapshot(include_calls=False)['counts']}")
+
+# Global dispatcher instance
+call_dispatcher = CallDispatcher()
@@ -0,0 +1,114 @@
+# backend/app/services/call_session.py
+from ..codec import LLMFrame
+from ..database import db
+from .openai_service import openai_service
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CallSession:
+    """Call context for one LLM WebSocket connection.
+    
+    The call record, agent config and formatted system prompt cannot change
+    during a call, so they are loaded once - as soon as the connection gives us
+    something to key on - and reused by every turn. Turn timings collected
+    during the call are written to call_turn_metrics when the socket closes.
+    """
+    
+    def __init__(self, retell_call_id: Optional[str] = None):
+        self.retell_call_id = retell_call_id
+        self.metadata: Dict[str, Any] = {}
+        self.call_record: Optional[Dict[str, Any]] = None
+        self.agent_config: Optional[Dict[str, Any]] = None
+        self.system_prompt: Optional[str] = None
+        self._load_task: Optional[asyncio.Task] = None
+        self.turn_metrics: List[Dict[str, Any]] = []
+        
+        if retell_call_id:
+            # Retell puts its call ID in the socket URL, so loading can start before the first frame
+            self._load_task = asyncio.create_task(self._load())
+    
+    @property
+    def internal_call_id(self) -> Optional[str]:
+        if self.call_record:
+            return self.call_record.get("id")
+        return self.metadata.get("call_id")
+    
+    @property
+    def driver_name(self) -> str:
+        return (self.call_record or {}).get("driver_name") or self.metadata.get("driver_name", "Driver")
+    
+    @property
+    def load_number(self) -> str:
+        return (self.call_record or {}).get("load_number") or self.metadata.get("load_number", "Unknown")
+    
+    @property
+    def call_metadata(self) -> Dict[str, Any]:
+        """Retell metadata with driver/load resolved from the call record when loaded"""
+        return {**self.metadata, "driver_name": self.driver_name, "load_number": self.load_number}
+    
+    def observe(self, frame: LLMFrame) -> None:
+        """Pick up call details from a frame; starts loading if we have nothing yet"""
+        if not self.retell_call_id:
+            self.retell_call_id = frame.call.get("call_id") or frame.call_id
+        
+        metadata = frame.call.get("metadata")
+        if metadata and not self.metadata:
+            self.metadata = metadata
+            # Retry with the internal ID when the Retell-ID lookup found nothing
+            if self.call_record is None and (self._load_task is None or self._load_task.done()):
+                self._load_task = asyncio.create_task(self._load())
+    
+    async def ensure_loaded(self) -> None:
+        """Wait for an in-flight load; returns immediately once loaded"""
+        if self._load_task is not None:
+            await asyncio.shield(self._load_task)
+    
+    async def _load(self) -> None:
+        try:
+            internal_call_id = self.metadata.get("call_id")
+            if internal_call_id:
+                self.call_record = await db.get_call_by_id(internal_call_id)
+            elif self.retell_call_id:
+                self.call_record = await db.get_call_by_retell_id(self.retell_call_id)
+                # The Retell ID may not be saved yet; metadata can arrive while we were looking
+                if not self.call_record and self.metadata.get("call_id"):
+                    self.call_record = await db.get_call_by_id(self.metadata["call_id"])
+            
+            if self.call_record:
+                self.agent_config = await db.get_agent_by_id(self.call_record["agent_id"])
+            
+            self.system_prompt = openai_service.format_call_prompt(
+                self.agent_config,
+                {"driver_name": self.driver_name, "load_number": self.load_number}
+            )
+            logger.info(
+                f"Call session loaded - Retell ID: {self.retell_call_id}, "
+                f"Internal ID: {self.internal_call_id}, agent: {(self.agent_config or {}).get('id')}"
+            )
+        except Exception as e:
+            logger.error(f"Failed to load call session {self.retell_call_id}: {str(e)}")
+    
+    def record_turn(self, turn: Dict[str, Any]) -> None:
+        """Keep a turn's timing row; the caller may keep filling it until the flush"""
+        self.turn_metrics.append(turn)
+    
+    async def flush_turn_metrics(self) -> None:
+        """Write the recorded turns to call_turn_metrics in one insert"""
+        if not self.turn_metrics:
+            return
+        if not self.internal_call_id:
+            logger.warning(f"Dropping {len(self.turn_metrics)} turn timings for unknown call {self.retell_call_id}")
+            return
+        
+        rows = [{"call_id": self.internal_call_id, **turn} for turn in self.turn_metrics]
+        self.turn_metrics = []
+        if await db.insert_call_turn_metrics(rows):
+            logger.info(f"Stored {len(rows)} turn timings for call {rows[0]['call_id']}")
+    
+    def close(self) -> None:
+        if self._load_task is not None and not self._load_task.done():
+            self._load_task.cancel()
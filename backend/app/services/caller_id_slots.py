@@ -0,0 +1,111 @@
+# backend/app/services/caller_id_slots.py
+from ..config import settings
+from .local_store import LocalSQLite
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+create table if not exists caller_id_slots (
+    slot_id integer primary key autoincrement,
+    phone_number text not null,
+    retell_call_id text unique,
+    acquired_at real not null
+);
+create index if not exists caller_id_slots_number on caller_id_slots (phone_number);
+create index if not exists caller_id_slots_acquired on caller_id_slots (acquired_at);
+"""
+
+
+class CallerIdSlots:
+    """In-flight calls per caller ID, shared by all uvicorn workers.
+    
+    A slot is one row in a SQLite file under local_state_dir: reserved
+    before create-phone-call, bound to Retell's call_id once the call
+    exists, and deleted by the call_ended handler - whichever worker's
+    queue consumer runs it. Rows older than caller_id_hold_timeout are
+    reclaimed, for calls whose call_ended never arrived.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.local_state_dir, "caller_id_slots.db")
+        self._db = LocalSQLite(self.path, _SCHEMA)
+        # Round-robin position; per process, while the counts it skips over are shared
+        self._cursor = 0
+    
+    async def acquire(self, numbers: List[str]) -> Optional[Tuple[int, str]]:
+        """Reserve a slot on the number to dial from: (slot_id, number), or None when all are full"""
+        now = time.time()
+        
+        def reserve(conn: sqlite3.Connection) -> Optional[Tuple[int, str]]:
+            conn.execute("begin immediate")
+            try:
+                conn.execute(
+                    "delete from caller_id_slots where acquired_at < ?",
+                    (now - settings.caller_id_hold_timeout,)
+                )
+                in_flight = dict(conn.execute(
+                    "select phone_number, count(*) from caller_id_slots group by phone_number"
+                ).fetchall())
+                available = [
+                    number for number in numbers
+                    if in_flight.get(number, 0) < settings.caller_id_max_concurrent_calls
+                ]
+                if not available:
+                    conn.execute("commit")
+                    return None
+                
+                if settings.caller_id_strategy == "round_robin":
+                    start = self._cursor % len(numbers)
+                    ordered = numbers[start:] + numbers[:start]
+                    chosen = next(number for number in ordered if number in available)
+                    self._cursor = numbers.index(chosen) + 1
+                else:
+                    chosen = min(available, key=lambda number: in_flight.get(number, 0))
+                
+                slot_id = conn.execute(
+                    "insert into caller_id_slots (phone_number, acquired_at) values (?, ?)",
+                    (chosen, now)
+                ).lastrowid
+                conn.execute("commit")
+                return slot_id, chosen
+            except Exception:
+                conn.execute("rollback")
+                raise
+        
+        return await self._db.call(reserve)
+    
+    async def bind(self, slot_id: int, retell_call_id: str) -> None:
+        """Attach a reserved slot to the Retell call so call_ended can release it"""
+        await self._db.call(lambda conn: conn.execute(
+            "update caller_id_slots set retell_call_id = ? where slot_id = ?", (retell_call_id, slot_id)
+        ))
+    
+    async def release(self, retell_call_id: Optional[str] = None, slot_id: Optional[int] = None) -> bool:
+        """Free a slot by Retell call ID once bound, or by slot ID before that"""
+        if retell_call_id:
+            query, params = "delete from caller_id_slots where retell_call_id = ?", (retell_call_id,)
+        elif slot_id is not None:
+            query, params = "delete from caller_id_slots where slot_id = ?", (slot_id,)
+        else:
+            return False
+        return await self._db.call(lambda conn: conn.execute(query, params).rowcount) > 0
+    
+    async def usage(self) -> Dict[str, int]:
+        """In-flight calls per caller ID"""
+        rows = await self._db.call(lambda conn: conn.execute(
+            "select phone_number, count(*) from caller_id_slots where acquired_at >= ? group by phone_number",
+            (time.time() - settings.caller_id_hold_timeout,)
+        ).fetchall())
+        return dict(rows)
+    
+    def close(self) -> None:
+        self._db.close()
+
+
+# Global caller-ID slot store instance
+caller_id_slots = CallerIdSlots()
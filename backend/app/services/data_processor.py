@@ -2,7 +2,7 @@
 from ..database import db
 from .openai_service import openai_service
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -18,36 +18,10 @@ class DataProcessor:
                 return None
             
             # Get agent details to determine scenario type
-            agent_data = call_data.get("agents", {})
+            agent_data = call_data.get("agents") or {}
             scenario_type = agent_data.get("scenario_type", "dispatch")
             
-            # Extract structured data using OpenAI
-            extraction_result = await openai_service.extract_call_summary(transcript, scenario_type)
-            
-            # Prepare summary data
-            summary_data = {
-                "call_id": call_id,
-                "structured_data": extraction_result["structured_data"],
-                "confidence_score": extraction_result["confidence_score"],
-                "processing_errors": extraction_result["processing_errors"]
-            }
-            
-            # Add scenario-specific fields
-            structured_data = extraction_result["structured_data"]
-            if scenario_type == "dispatch":
-                summary_data.update({
-                    "call_outcome": structured_data.get("call_outcome"),
-                    "driver_status": structured_data.get("driver_status"),
-                    "current_location": structured_data.get("current_location"),
-                    "eta": structured_data.get("eta")
-                })
-            elif scenario_type == "emergency":
-                summary_data.update({
-                    "call_outcome": structured_data.get("call_outcome"),
-                    "emergency_type": structured_data.get("emergency_type"),
-                    "emergency_location": structured_data.get("emergency_location"),
-                    "escalation_status": structured_data.get("escalation_status")
-                })
+            summary_data, _ = await self.build_call_summary(call_id, transcript, scenario_type)
             
             # Save summary to database
             saved_summary = await self.save_call_summary(summary_data)
@@ -59,11 +33,48 @@ class DataProcessor:
             logger.error(f"Failed to process call {call_id}: {str(e)}")
             return None
     
+    async def build_call_summary(self, call_id: str, transcript: str, scenario_type: str,
+                                 use_rules: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Extract a transcript into a summaries row.
+        
+        Returns (summary row, raw extraction result); the latter carries token
+        usage for callers that meter spend.
+        """
+        # Extract structured data using OpenAI
+        extraction_result = await openai_service.extract_call_summary(transcript, scenario_type, use_rules)
+        
+        # Prepare summary data
+        summary_data = {
+            "call_id": call_id,
+            "structured_data": extraction_result["structured_data"],
+            "confidence_score": extraction_result["confidence_score"],
+            "processing_errors": extraction_result["processing_errors"]
+        }
+        
+        # Add scenario-specific fields
+        structured_data = extraction_result["structured_data"]
+        if scenario_type == "dispatch":
+            summary_data.update({
+                "call_outcome": structured_data.get("call_outcome"),
+                "driver_status": structured_data.get("driver_status"),
+                "current_location": structured_data.get("current_location"),
+                "eta": structured_data.get("eta")
+            })
+        elif scenario_type == "emergency":
+            summary_data.update({
+                "call_outcome": structured_data.get("call_outcome"),
+                "emergency_type": structured_data.get("emergency_type"),
+                "emergency_location": structured_data.get("emergency_location"),
+                "escalation_status": structured_data.get("escalation_status")
+            })
+        
+        return summary_data, extraction_result
+    
     async def save_call_summary(self, summary_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Save call summary to database"""
+        """Save call summary to database (replacing any earlier summary of the call)"""
         try:
-            result = await db.insert_summary(summary_data)
-            return result
+            result = await db.upsert_summaries([summary_data])
+            return result[0] if result else None
         except Exception as e:
             logger.error(f"Failed to save summary: {str(e)}")
             return None
@@ -0,0 +1,113 @@
+# backend/app/services/event_bus.py
+from ..config import settings
+from collections import deque
+from datetime import datetime
+import asyncio
+import logging
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One listener's bounded inbox.
+    
+    A listener that falls more than event_bus_queue_size events behind is
+    marked overflowed instead of slowing publishers down; it should resync
+    from the REST API.
+    """
+    
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+    
+    def put(self, event: Dict[str, Any]) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Free the memory; the listener is told to resync on its next read
+            while not self.queue.empty():
+                self.queue.get_nowait()
+
+
+class EventBus:
+    """In-process pub/sub for call lifecycle events.
+    
+    Publishing is synchronous and never blocks: each subscriber has its own
+    bounded queue. Every event gets a sequence number, and the most recent
+    ones are kept so a reconnecting SSE client can replay what it missed
+    (Last-Event-ID). Events only reach listeners in the same process.
+    """
+    
+    def __init__(self):
+        self._seq = 0
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=settings.event_bus_replay_size)
+        self._subscribers: List[Subscription] = []
+        self.published = 0
+        self.overflows = 0
+    
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self._seq += 1
+        event = {
+            "id": self._seq,
+            "type": event_type,
+            "at": datetime.utcnow().isoformat(),
+            "data": data
+        }
+        self._recent.append(event)
+        self.published += 1
+        for subscription in self._subscribers:
+            was_overflowed = subscription.overflowed
+            subscription.put(event)
+            if subscription.overflowed and not was_overflowed:
+                self.overflows += 1
+                logger.warning("Event bus subscriber fell behind; it will be asked to resync")
+        return event
+    
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """Register a listener, replaying events after last_event_id if still held"""
+        subscription = Subscription(settings.event_bus_queue_size)
+        if last_event_id is not None:
+            oldest = self._recent[0]["id"] if self._recent else self._seq + 1
+            if last_event_id < oldest - 1 or last_event_id > self._seq:
+                # Missed events were already dropped from the replay buffer,
+                # or the ID is from before a restart
+                subscription.overflowed = True
+            else:
+                for event in self._recent:
+                    if event["id"] > last_event_id:
+                        subscription.put(event)
+        self._subscribers.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "last_event_id": self._seq,
+            "overflows": self.overflows
+        }
+
+
+def publish_call_update(call_id: str, **changes) -> None:
+    """Announce changed fields of a call (status, retell_call_id, ...)"""
+    event_bus.publish("call.updated", {"call_id": call_id, "changes": changes})
+
+
+def publish_call_created(call: Dict[str, Any], agent: Optional[Dict[str, Any]] = None) -> None:
+    """Announce a new call row, shaped like a GET /calls item (no transcript)"""
+    row = {key: value for key, value in call.items() if key != "transcript"}
+    if agent:
+        row["agents"] = {"name": agent.get("name"), "scenario_type": agent.get("scenario_type")}
+    event_bus.publish("call.created", {"call_id": call["id"], "call": row})
+
+
+# Global event bus instance
+event_bus = EventBus()
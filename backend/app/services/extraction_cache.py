@@ -0,0 +1,194 @@
+# backend/app/services/extraction_cache.py
+from ..config import settings
+from .local_store import LocalSQLite
+from collections import OrderedDict
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+create table if not exists extraction_cache (
+    key text primary key,
+    result text not null,
+    created_at real not null,
+    last_used_at real not null
+);
+create index if not exists extraction_cache_last_used on extraction_cache (last_used_at);
+"""
+# Trim the disk tier back to its bound after this many writes
+PRUNE_EVERY_WRITES = 100
+
+
+def extraction_key(transcript: str, scenario_type: str, prompt_version: str, model: str) -> str:
+    """Content address of one extraction: identical inputs give the identical key"""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, scenario_type, transcript):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") cannot collide
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Two-tier cache of LLM extraction results.
+    
+    A bounded in-memory LRU serves repeats within a process; a SQLite file
+    under local_state_dir survives restarts and is shared by all uvicorn
+    workers. Keys cover the prompt version and model, so editing the prompt
+    templates makes old entries unreachable and they age out of the LRU
+    bounds. Concurrent lookups for the same key share one computation.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.local_state_dir, "extraction_cache.db")
+        self.max_memory_entries = settings.extraction_cache_memory_entries
+        self.max_disk_entries = settings.extraction_cache_disk_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._db = LocalSQLite(self.path, _SCHEMA)
+        self._writes = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "shared_inflight": 0,
+            "misses": 0,
+            "stores": 0,
+            "tokens_saved": 0
+        }
+    
+    # Memory tier
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+        return result
+    
+    def _memory_put(self, key: str, result: Dict[str, Any]) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    # Disk tier
+    async def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        def select(conn: sqlite3.Connection) -> Optional[str]:
+            row = conn.execute("select result from extraction_cache where key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("update extraction_cache set last_used_at = ? where key = ?", (time.time(), key))
+            return row[0] if row else None
+        
+        try:
+            raw = await self._db.call(select)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.error(f"Extraction cache read failed: {str(e)}")
+            return None
+    
+    async def _disk_put(self, key: str, result: Dict[str, Any]) -> None:
+        now = time.time()
+        self._writes += 1
+        prune = self._writes % PRUNE_EVERY_WRITES == 0
+        
+        def upsert(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "insert or replace into extraction_cache (key, result, created_at, last_used_at) values (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now)
+            )
+            if prune:
+                conn.execute(
+                    "delete from extraction_cache where key not in "
+                    "(select key from extraction_cache order by last_used_at desc limit ?)",
+                    (self.max_disk_entries,)
+                )
+        
+        try:
+            await self._db.call(upsert)
+        except Exception as e:
+            logger.error(f"Extraction cache write failed: {str(e)}")
+    
+    def _hit(self, result: Dict[str, Any], tier: str) -> Dict[str, Any]:
+        usage = result.get("usage") or {}
+        self.stats["tokens_saved"] += usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        hit = copy.deepcopy(result)
+        # Nothing was spent on this result
+        hit["usage"] = {"prompt_tokens": 0, "completion_tokens": 0}
+        hit["cache"] = tier
+        return hit
+    
+    async def get_or_compute(self, key: str,
+                             compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], str]:
+        """Cached result for key, or compute and store it.
+        
+        Returns (result, source) with source "memory", "disk", "inflight" or
+        "computed". Results carrying processing_errors are returned but not
+        stored, so failures are retried next time.
+        """
+        result = self._memory_get(key)
+        if result is not None:
+            self.stats["memory_hits"] += 1
+            return self._hit(result, "memory"), "memory"
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["shared_inflight"] += 1
+            result = await asyncio.shield(inflight)
+            return self._hit(result, "inflight"), "inflight"
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._disk_get(key)
+            if result is not None:
+                self.stats["disk_hits"] += 1
+                self._memory_put(key, result)
+                future.set_result(result)
+                return self._hit(result, "disk"), "disk"
+            
+            self.stats["misses"] += 1
+            result = await compute()
+            if not result.get("processing_errors"):
+                self.stats["stores"] += 1
+                self._memory_put(key, result)
+                await self._disk_put(key, result)
+            future.set_result(result)
+            return result, "computed"
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting on the shared future; don't log it as unretrieved
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def clear(self) -> None:
+        """Drop every cached result, in memory and on disk"""
+        self._memory.clear()
+        await self._db.call(lambda conn: conn.execute("delete from extraction_cache"))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["shared_inflight"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else None
+        }
+    
+    def close(self) -> None:
+        self._db.close()
+
+
+# Global cache instance
+extraction_cache = ExtractionCache()
@@ -0,0 +1,50 @@
+# backend/app/services/local_store.py
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Optional
+
+
+class LocalSQLite:
+    """A SQLite file under local_state_dir, shared by all uvicorn workers.
+    
+    The connection is opened on first use in WAL mode and the schema script
+    is applied then. One connection per process is serialised by a lock;
+    async callers use call(), which runs the function on a worker thread so
+    a busy wait on another process's write lock never stalls the event loop.
+    """
+    
+    def __init__(self, path: str, schema: str, row_factory: Optional[Callable] = None):
+        self.path = path
+        self.schema = schema
+        self.row_factory = row_factory
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30.0)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("pragma synchronous=normal")
+            conn.executescript(self.schema)
+            self._conn = conn
+        return self._conn
+    
+    def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) in the calling thread"""
+        with self._lock:
+            return fn(self._connect())
+    
+    async def call(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) on a worker thread"""
+        return await asyncio.to_thread(self.run, fn)
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,17 +1,79 @@
 # backend/app/services/openai_service.py
 import openai
 from ..config import settings
+from .prompt_builder import prompt_builder
+from .prompt_template import compile_templates, render_call_prompt
+from .rule_extractor import rule_extractor
+from .extraction_cache import extraction_cache, extraction_key
+from ..metrics import OPENAI_FIRST_TOKEN_SECONDS, observe_openai
+import hashlib
 import logging
 import json
-from typing import Dict, Any, Optional
+import re
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CALL_PROMPT = "You are a helpful logistics dispatch assistant speaking with truck driver {driver_name} about load {load_number}."
+FALLBACK_RESPONSE = "I'm sorry, I'm having trouble processing that right now."
+CALL_MODEL = "gpt-4"
+
+# Streamed text is flushed at sentence ends, and at phrase breaks once a chunk is long enough to speak
+_SENTENCE_END = re.compile(r"[.!?;:](?=\s)")
+_PHRASE_END = re.compile(r",(?=\s)")
+MIN_PHRASE_CHARS = 40
+
+
+def split_speakable(buffer: str) -> tuple:
+    """Split streamed text into (ready to speak, still buffering)"""
+    matches = list(_SENTENCE_END.finditer(buffer))
+    if not matches and len(buffer) >= MIN_PHRASE_CHARS:
+        matches = list(_PHRASE_END.finditer(buffer))
+    if not matches:
+        return "", buffer
+    cut = matches[-1].end()
+    return buffer[:cut], buffer[cut:]
+
+# Summary extraction prompts. Any edit changes EXTRACTION_PROMPT_VERSION,
+# which retires every cached result produced by the old wording.
+EXTRACTION_MODEL = "gpt-4"
+EXTRACTION_PROMPTS = {
+    "dispatch": """
+    Analyze this driver call transcript and extract the following information in JSON format:
+    - call_outcome: "In-Transit Update" OR "Arrival Confirmation" OR "No Update"
+    - driver_status: "Driving" OR "Delayed" OR "Arrived" OR "Unknown"
+    - current_location: exact location mentioned or "Not provided"
+    - eta: estimated time of arrival or "Not provided"
+    
+    Return only valid JSON. If information is unclear, use the fallback values.
+    
+    Transcript: {transcript}
+    """,
+    "emergency": """
+    Analyze this emergency call transcript and extract the following information in JSON format:
+    - call_outcome: "Emergency Detected"
+    - emergency_type: "Accident" OR "Breakdown" OR "Medical" OR "Other"
+    - emergency_location: exact location mentioned or "Not provided"
+    - escalation_status: "Escalation Flagged"
+    
+    Return only valid JSON.
+    
+    Transcript: {transcript}
+    """
+}
+# Parsed once; extract_call_summary only substitutes the transcript
+EXTRACTION_TEMPLATES = compile_templates(EXTRACTION_PROMPTS, ("transcript",))
+EXTRACTION_PROMPT_VERSION = hashlib.sha256(
+    json.dumps(EXTRACTION_PROMPTS, sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
 openai.api_key = settings.openai_api_key
 
 class OpenAIService:
     def __init__(self):
-        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+        self.extraction_counts = {"rules": 0, "cache": 0, "llm": 0}
     
     async def generate_agent_response(self, 
                                     system_prompt: str, 
@@ -19,11 +81,13 @@ class OpenAIService:
                                     driver_name: str = "",
                                     load_number: str = "") -> str:
         """Generate AI response for live conversation"""
+        started = time.perf_counter()
         try:
-            # Format system prompt with variables
-            formatted_prompt = system_prompt.format(
-                driver_name=driver_name,
-                load_number=load_number
+            # Render the compiled system prompt with the call's variables
+            formatted_prompt = render_call_prompt(
+                system_prompt,
+                {"driver_name": driver_name, "load_number": load_number},
+                fallback=DEFAULT_CALL_PROMPT
             )
             
             messages = [
@@ -32,58 +96,180 @@ class OpenAIService:
             ]
             
             response = await self.client.chat.completions.create(
-                model="gpt-4",
+                model=CALL_MODEL,
                 messages=messages,
                 max_tokens=150,
                 temperature=0.7
             )
+            observe_openai("agent_response", CALL_MODEL, started, "ok", response.usage)
             
             return response.choices[0].message.content.strip()
             
         except Exception as e:
+            observe_openai("agent_response", CALL_MODEL, started, "error")
             logger.error(f"OpenAI API error: {str(e)}")
-            return "I'm sorry, I'm having trouble processing that right now."
+            return FALLBACK_RESPONSE
+    
+    def format_call_prompt(self, agent_config: Optional[Dict[str, Any]], call_metadata: Dict[str, Any]) -> str:
+        """Fill the agent's system prompt (or the default one) with the call's variables"""
+        system_prompt = (agent_config or {}).get("system_prompt") or DEFAULT_CALL_PROMPT
+        return render_call_prompt(system_prompt, call_metadata, fallback=DEFAULT_CALL_PROMPT)
     
-    async def extract_call_summary(self, transcript: str, scenario_type: str) -> Dict[str, Any]:
-        """Extract structured data from call transcript"""
+    def build_call_prompt(self,
+                          conversation: List[Dict[str, Any]],
+                          agent_config: Optional[Dict[str, Any]],
+                          call_metadata: Dict[str, Any],
+                          system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """Token-budgeted chat messages for a live turn (see PromptBuilder.build)"""
+        formatted_prompt = system_prompt or self.format_call_prompt(agent_config, call_metadata)
+        return prompt_builder.build(formatted_prompt, conversation, call_metadata)
+    
+    def _call_messages(self,
+                       conversation: Optional[List[Dict[str, Any]]],
+                       agent_config: Optional[Dict[str, Any]],
+                       call_metadata: Optional[Dict[str, Any]],
+                       system_prompt: Optional[str],
+                       messages: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        if messages is not None:
+            return messages
+        return self.build_call_prompt(conversation or [], agent_config, call_metadata or {}, system_prompt)["messages"]
+    
+    async def generate_call_response(self,
+                                     conversation: Optional[List[Dict[str, Any]]] = None,
+                                     agent_config: Optional[Dict[str, Any]] = None,
+                                     call_metadata: Optional[Dict[str, Any]] = None,
+                                     system_prompt: Optional[str] = None,
+                                     messages: Optional[List[Dict[str, str]]] = None) -> str:
+        """Generate the agent's next utterance for a live call.
+        
+        Pass `system_prompt` when the caller already holds the formatted prompt,
+        or `messages` when it already built the whole prompt.
+        """
+        started = time.perf_counter()
         try:
-            prompts = {
-                "dispatch": """
-                Analyze this driver call transcript and extract the following information in JSON format:
-                - call_outcome: "In-Transit Update" OR "Arrival Confirmation" OR "No Update"
-                - driver_status: "Driving" OR "Delayed" OR "Arrived" OR "Unknown"
-                - current_location: exact location mentioned or "Not provided"
-                - eta: estimated time of arrival or "Not provided"
-                
-                Return only valid JSON. If information is unclear, use the fallback values.
-                
-                Transcript: {transcript}
-                """,
-                "emergency": """
-                Analyze this emergency call transcript and extract the following information in JSON format:
-                - call_outcome: "Emergency Detected"
-                - emergency_type: "Accident" OR "Breakdown" OR "Medical" OR "Other"
-                - emergency_location: exact location mentioned or "Not provided"
-                - escalation_status: "Escalation Flagged"
-                
-                Return only valid JSON.
-                
-                Transcript: {transcript}
-                """
-            }
+            response = await self.client.chat.completions.create(
+                model=CALL_MODEL,
+                messages=self._call_messages(conversation, agent_config, call_metadata, system_prompt, messages),
+                max_tokens=150,
+                temperature=0.7
+            )
+            observe_openai("call_response", CALL_MODEL, started, "ok", response.usage)
             
-            prompt = prompts.get(scenario_type, prompts["dispatch"])
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            observe_openai("call_response", CALL_MODEL, started, "error")
+            logger.error(f"OpenAI API error: {str(e)}")
+            return FALLBACK_RESPONSE
+    
+    async def stream_call_response(self,
+                                   conversation: Optional[List[Dict[str, Any]]] = None,
+                                   agent_config: Optional[Dict[str, Any]] = None,
+                                   call_metadata: Optional[Dict[str, Any]] = None,
+                                   system_prompt: Optional[str] = None,
+                                   messages: Optional[List[Dict[str, str]]] = None,
+                                   timings: Optional[Dict[str, float]] = None) -> AsyncIterator[str]:
+        """Stream the agent's next utterance in speakable chunks (sentences or long phrases).
+        
+        When given, `timings["first_token_at"]` is set to the perf_counter()
+        time the model's first token arrived.
+        """
+        buffer = ""
+        yielded = False
+        started = time.perf_counter()
+        first_token = True
+        usage = None
+        outcome = "cancelled"  # stays so if the caller stops iterating early
+        try:
+            stream = await self.client.chat.completions.create(
+                model=CALL_MODEL,
+                messages=self._call_messages(conversation, agent_config, call_metadata, system_prompt, messages),
+                max_tokens=150,
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            # Closing the stream on exit also stops generation if the caller abandons us
+            async with stream:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        # Sent last, in a chunk with no choices
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    if first_token and chunk.choices[0].delta.content:
+                        first_token = False
+                        if timings is not None:
+                            timings["first_token_at"] = time.perf_counter()
+                        OPENAI_FIRST_TOKEN_SECONDS.labels("call_stream", CALL_MODEL).observe(time.perf_counter() - started)
+                    buffer += chunk.choices[0].delta.content or ""
+                    ready, buffer = split_speakable(buffer)
+                    if ready.strip():
+                        yielded = True
+                        yield ready
+            
+            outcome = "ok"
+            if buffer.strip():
+                yielded = True
+                yield buffer
+                
+        except Exception as e:
+            outcome = "error"
+            logger.error(f"OpenAI streaming error: {str(e)}")
+            if not yielded:
+                yield FALLBACK_RESPONSE
+        finally:
+            observe_openai("call_stream", CALL_MODEL, started, outcome, usage)
+    
+    async def extract_call_summary(self, transcript: str, scenario_type: str, use_rules: bool = True) -> Dict[str, Any]:
+        """Extract structured data from call transcript.
+        
+        The rule-based extractor runs first; only transcripts it scores below
+        fast_extraction_threshold go on to the LLM, whose results are cached
+        by content (transcript, scenario, prompt version, model). With
+        use_rules=False every transcript goes to the LLM.
+        """
+        if use_rules and settings.fast_extraction_enabled:
+            fast_result = rule_extractor.extract(transcript, scenario_type)
+            if fast_result["confidence_score"] >= settings.fast_extraction_threshold:
+                self.extraction_counts["rules"] += 1
+                return fast_result
+        
+        if scenario_type not in EXTRACTION_PROMPTS:
+            scenario_type = "dispatch"
+        
+        if not settings.extraction_cache_enabled:
+            self.extraction_counts["llm"] += 1
+            return await self._extract_with_llm(transcript, scenario_type)
+        
+        key = extraction_key(transcript, scenario_type, EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL)
+        result, source = await extraction_cache.get_or_compute(
+            key, lambda: self._extract_with_llm(transcript, scenario_type)
+        )
+        self.extraction_counts["llm" if source == "computed" else "cache"] += 1
+        return result
+    
+    async def _extract_with_llm(self, transcript: str, scenario_type: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            template = EXTRACTION_TEMPLATES[scenario_type]
             
             response = await self.client.chat.completions.create(
-                model="gpt-4",
+                model=EXTRACTION_MODEL,
                 messages=[
-                    {"role": "user", "content": prompt.format(transcript=transcript)}
+                    {"role": "user", "content": template.render({"transcript": transcript})}
                 ],
                 max_tokens=200,
                 temperature=0.1
             )
             
+            observe_openai("extraction", EXTRACTION_MODEL, started, "ok", response.usage)
             content = response.choices[0].message.content.strip()
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
+                "completion_tokens": response.usage.completion_tokens if response.usage else 0
+            }
             
             # Try to parse JSON
             try:
@@ -91,23 +277,38 @@ class OpenAIService:
                 return {
                     "structured_data": structured_data,
                     "confidence_score": 0.9,
-                    "processing_errors": []
+                    "processing_errors": [],
+                    "usage": usage,
+                    "extractor": "llm"
                 }
             except json.JSONDecodeError:
                 logger.error(f"Failed to parse OpenAI response as JSON: {content}")
                 return {
                     "structured_data": {"error": "Failed to parse response"},
                     "confidence_score": 0.1,
-                    "processing_errors": ["JSON parsing failed"]
+                    "processing_errors": ["JSON parsing failed"],
+                    "usage": usage,
+                    "extractor": "llm"
                 }
                 
         except Exception as e:
+            observe_openai("extraction", EXTRACTION_MODEL, started, "error")
             logger.error(f"OpenAI extraction error: {str(e)}")
             return {
                 "structured_data": {"error": "OpenAI API error"},
                 "confidence_score": 0.0,
-                "processing_errors": [str(e)]
+                "processing_errors": [str(e)],
+                "extractor": "llm"
             }
+    
+    def get_extraction_stats(self) -> Dict[str, Any]:
+        """How many summaries came from the rule-based fast path, the cache and the LLM"""
+        total = sum(self.extraction_counts.values())
+        return {
+            **self.extraction_counts,
+            "fast_path_rate": round(self.extraction_counts["rules"] / total, 3) if total else None,
+            "result_cache": extraction_cache.get_stats()
+        }
 
 # Global service instance
 openai_service = OpenAIService()
\ No newline at end of file
@@ -0,0 +1,179 @@
+# backend/app/services/prompt_builder.py
+from ..config import settings
+from functools import lru_cache
+import logging
+import re
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+# Chat format overhead per message (role + separators), per OpenAI's counting guide
+MESSAGE_OVERHEAD_TOKENS = 4
+# Only this many recent driver utterances are scanned for a location
+LOCATION_SCAN_TURNS = 40
+SUMMARY_LINE_CHARS = 100
+
+_LOCATION_PATTERN = re.compile(
+    r"\b(?:at|near|in|on|of|outside|passing|passed|past)\s+"
+    r"((?:the\s+)?(?:[A-Z0-9][\w'&.-]*)(?:\s+(?:[A-Z0-9][\w'&.-]*|of|de|near|in|on|at|outside|past))*)"
+)
+# A location never runs past the end of a sentence ("Exit 72. Probably...")
+_SENTENCE_BREAK = re.compile(r"[.!?]\s")
+_TRAILING_JOINER = re.compile(r"(?:\s+(?:of|de|near|in|on|at|outside|past))+$")
+_TIME_PATTERN = re.compile(r"^\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-4")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating token counts: {str(e)}")
+        return None
+
+
+def warm_up() -> None:
+    """Load the tokenizer up front; tiktoken fetches its encoding file on first use"""
+    _encoding()
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Token count for a piece of text (memoised - turns are recounted every frame)"""
+    return estimate_tokens(text)
+
+
+def estimate_tokens(text: str) -> int:
+    """Uncached token count, for one-off texts such as whole transcripts"""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # ~4 characters per token for English text
+    return max(1, (len(text) + 3) // 4)
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _to_message(utterance: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Retell utterance -> chat message (None for empty utterances)"""
+    content = utterance.get("content")
+    if not content:
+        return None
+    return {"role": "assistant" if utterance.get("role") == "agent" else "user", "content": content}
+
+
+def last_known_location(conversation: List[Dict[str, Any]]) -> Optional[str]:
+    """Most recent location the driver mentioned, if any"""
+    scanned = 0
+    for utterance in reversed(conversation):
+        if utterance.get("role") != "user":
+            continue
+        # Within an utterance the last place named is usually the most specific
+        for match in reversed(list(_LOCATION_PATTERN.finditer(utterance.get("content") or ""))):
+            location = _TRAILING_JOINER.sub("", _SENTENCE_BREAK.split(match.group(1))[0].rstrip("."))
+            if not _TIME_PATTERN.match(location):
+                return location
+        scanned += 1
+        if scanned >= LOCATION_SCAN_TURNS:
+            break
+    return None
+
+
+class PromptBuilder:
+    """Assembles the chat prompt for a live turn within a fixed token budget.
+    
+    Layout: system prompt + pinned facts, a compact summary of older turns,
+    then as many recent turns as fit. Work per turn is bounded by the budget,
+    not by how long the call has run.
+    """
+    
+    def __init__(self, token_budget: Optional[int] = None, summary_budget: Optional[int] = None):
+        self.token_budget = token_budget or settings.llm_prompt_token_budget
+        self.summary_budget = summary_budget or settings.llm_summary_token_budget
+    
+    def build(self,
+              system_prompt: str,
+              conversation: List[Dict[str, Any]],
+              call_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Return {"messages", "prompt_tokens", "turns_kept", "turns_summarized"}"""
+        call_metadata = call_metadata or {}
+        
+        facts = [
+            f"Driver: {call_metadata.get('driver_name') or 'Unknown'}",
+            f"Load: {call_metadata.get('load_number') or 'Unknown'}"
+        ]
+        location = last_known_location(conversation)
+        if location:
+            facts.append(f"Last known location: {location}")
+        system_message = {
+            "role": "system",
+            "content": f"{system_prompt}\n\nCall facts: {'; '.join(facts)}."
+        }
+        
+        used = message_tokens(system_message)
+        turn_budget = self.token_budget - used - self.summary_budget
+        
+        # Newest first until the budget is spent; the latest turn is always kept.
+        # Nothing here walks the whole conversation.
+        kept: List[Dict[str, str]] = []
+        index = len(conversation) - 1
+        while index >= 0:
+            turn = _to_message(conversation[index])
+            if turn:
+                cost = message_tokens(turn)
+                if kept and cost > turn_budget:
+                    break
+                kept.append(turn)
+                turn_budget -= cost
+                used += cost
+            index -= 1
+        kept.reverse()
+        
+        messages = [system_message]
+        summarized = index + 1
+        if summarized:
+            summary = self._summarize(conversation, summarized)
+            messages.append(summary)
+            used += message_tokens(summary)
+        messages.extend(kept)
+        
+        return {
+            "messages": messages,
+            "prompt_tokens": used,
+            "turns_kept": len(kept),
+            "turns_summarized": summarized
+        }
+    
+    def _summarize(self, conversation: List[Dict[str, Any]], count: int) -> Dict[str, str]:
+        """Compact, local summary of the first `count` turns: first sentence of the most recent ones"""
+        header = f"Summary of {count} earlier turns (most recent last):"
+        budget = self.summary_budget - count_tokens(header) - MESSAGE_OVERHEAD_TOKENS
+        
+        lines: List[str] = []
+        for index in range(count - 1, -1, -1):
+            turn = _to_message(conversation[index])
+            if not turn:
+                continue
+            first_sentence = re.split(r"(?<=[.!?])\s", turn["content"].strip(), maxsplit=1)[0]
+            speaker = "Agent" if turn["role"] == "assistant" else "Driver"
+            line = f"- {speaker}: {first_sentence[:SUMMARY_LINE_CHARS]}"
+            cost = count_tokens(line) + 1
+            if cost > budget:
+                break
+            lines.append(line)
+            budget -= cost
+        lines.reverse()
+        
+        return {"role": "system", "content": "\n".join([header] + lines)}
+
+# Global builder instance
+prompt_builder = PromptBuilder()
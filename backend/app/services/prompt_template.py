@@ -0,0 +1,105 @@
+# backend/app/services/prompt_template.py
+from functools import lru_cache
+from string import Formatter
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Variables an agent's system prompt may use, with the value used when a call lacks one
+CALL_PROMPT_VARIABLES: Dict[str, str] = {
+    "driver_name": "Driver",
+    "load_number": "Unknown"
+}
+REQUIRED_CALL_PROMPT_VARIABLES = ("driver_name", "load_number")
+
+
+class TemplateError(ValueError):
+    """A prompt uses a placeholder outside its schema, or is not a valid template"""
+
+
+class PromptTemplate:
+    """A prompt parsed once into literal text and named slots.
+    
+    Accepts str.format syntax restricted to bare names ({driver_name}); {{
+    and }} are literal braces. Rendering joins the pieces, so a prompt is
+    parsed and validated when it is saved, never during a live call.
+    """
+    
+    def __init__(self, text: str, variables: Iterable[str]):
+        self.text = text
+        allowed = set(variables)
+        self.literals: List[str] = []
+        self.fields: List[str] = []
+        
+        try:
+            parsed = list(Formatter().parse(text))
+        except ValueError as e:
+            raise TemplateError(f"Invalid prompt template: {str(e)} (use {{{{ and }}}} for literal braces)") from e
+        
+        pending = ""
+        unknown = []
+        for literal, field, format_spec, conversion in parsed:
+            pending += literal
+            if field is None:
+                continue
+            if not field.isidentifier() or format_spec or conversion:
+                placeholder = field + (f"!{conversion}" if conversion else "") + (f":{format_spec}" if format_spec else "")
+                raise TemplateError(f"Unsupported placeholder {{{placeholder}}}: use a bare variable name")
+            if field not in allowed:
+                unknown.append(field)
+            self.literals.append(pending)
+            self.fields.append(field)
+            pending = ""
+        self.literals.append(pending)
+        
+        if unknown:
+            raise TemplateError(
+                f"Unknown placeholders: {sorted(set(unknown))}; allowed: {sorted(allowed)}"
+            )
+        self.variables = frozenset(self.fields)
+    
+    def render(self, values: Dict[str, Any]) -> str:
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=512)
+def compile_call_prompt(text: str) -> PromptTemplate:
+    """Compiled agent system prompt (raises TemplateError); one parse per distinct prompt"""
+    return PromptTemplate(text, CALL_PROMPT_VARIABLES)
+
+
+def validate_call_prompt(text: str) -> str:
+    """Save-time check of an agent prompt: compiles, and uses every required variable"""
+    template = compile_call_prompt(text)
+    missing = [f"{{{name}}}" for name in REQUIRED_CALL_PROMPT_VARIABLES if name not in template.variables]
+    if missing:
+        raise TemplateError(f"System prompt must contain placeholders: {missing}")
+    return text
+
+
+def render_call_prompt(text: str, call_metadata: Optional[Dict[str, Any]] = None,
+                       fallback: Optional[str] = None) -> str:
+    """Fill an agent prompt with the call's variables.
+    
+    A prompt saved before templates were validated may not compile; it is
+    logged and `fallback` is used instead, so a live call never fails on it.
+    """
+    call_metadata = call_metadata or {}
+    values = {name: call_metadata.get(name, default) for name, default in CALL_PROMPT_VARIABLES.items()}
+    try:
+        return compile_call_prompt(text).render(values)
+    except TemplateError as e:
+        if fallback is None or fallback == text:
+            raise
+        logger.error(f"Agent prompt does not compile, using the default prompt: {str(e)}")
+        return compile_call_prompt(fallback).render(values)
+
+
+def compile_templates(texts: Dict[str, str], variables: Tuple[str, ...]) -> Dict[str, PromptTemplate]:
+    """Compile a fixed set of prompts (e.g. the extraction prompts) at import time"""
+    return {name: PromptTemplate(text, variables) for name, text in texts.items()}
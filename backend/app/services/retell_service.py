@@ -2,18 +2,179 @@
 # backend/app/services/retell_service.py
 import httpx
 from ..config import settings
+from ..database import db
+from ..metrics import RETELL_REQUEST_SECONDS
+from .caller_id_slots import caller_id_slots
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Read timeouts (seconds) per Retell endpoint; settings.retell_endpoint_timeouts overrides these
+DEFAULT_ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    "list-phone-numbers": 10.0,
+    "get-call": 10.0,
+    "create-retell-llm": 15.0,
+    "update-retell-llm": 15.0,
+    "create-agent": 15.0,
+    "update-agent": 15.0,
+    "create-phone-call": 15.0,
+}
+
+# create_retell_call's error when every caller ID is at its concurrency cap;
+# the call can be retried once a slot is released
+CALLER_IDS_BUSY = "All caller IDs busy"
+
+
+def agent_config_hash(agent_config: Dict[str, Any]) -> str:
+    """Content hash of the parts of an agent that end up in Retell objects"""
+    material = json.dumps(
+        {
+            "system_prompt": agent_config.get("system_prompt"),
+            "voice_settings": agent_config.get("voice_settings") or {},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
 class RetellService:
     def __init__(self):
         self.api_key = settings.retell_api_key
-        self.base_url = "https://api.retellai.com"
+        self.base_url = settings.retell_base_url
         self.webhook_url = f"{settings.webhook_base_url}/websocket/retell"
         self._account_cache = None
-        self._phone_cache = None
+        self._phone_cache: Optional[List[Dict[str, Any]]] = None
+        self._phone_cache_at = 0.0
+        self._phone_refresh_task: Optional[asyncio.Task] = None
+        # (our agent id, config hash) -> {"retell_llm_id", "retell_agent_id"}
+        self._provisioning_cache: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._provisioning_locks: Dict[str, asyncio.Lock] = {}
+        # Notified whenever this process releases a caller-ID slot
+        self._caller_id_released = asyncio.Condition()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._http2 = False
+        self._endpoint_timeouts = {**DEFAULT_ENDPOINT_TIMEOUTS, **settings.retell_endpoint_timeouts}
+        self._pool_stats = {
+            "requests_total": 0,
+            "requests_in_flight": 0,
+            "connections_opened": 0,
+            "wait_time_total_ms": 0.0,
+            "wait_time_max_ms": 0.0,
+        }
+    
+    async def start(self) -> None:
+        """Create the shared HTTP client (called from the FastAPI lifespan)"""
+        if self._client is not None:
+            return
+        
+        http2 = settings.retell_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("retell_http2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+                http2 = False
+        self._http2 = http2
+        
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self._get_headers(),
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.retell_max_connections,
+                max_keepalive_connections=settings.retell_max_keepalive_connections,
+                keepalive_expiry=settings.retell_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(10.0, connect=settings.retell_connect_timeout)
+        )
+        logger.info(f"Retell HTTP client started (http2={http2}, max_connections={settings.retell_max_connections})")
+        
+        if self._phone_refresh_task is None:
+            self._phone_refresh_task = asyncio.create_task(self._refresh_phone_numbers_loop())
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections"""
+        if self._phone_refresh_task is not None:
+            self._phone_refresh_task.cancel()
+            try:
+                await self._phone_refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._phone_refresh_task = None
+        
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Retell HTTP client closed")
+    
+    async def _request(self, method: str, endpoint: str, path: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Send a request to Retell over the shared client.
+        
+        `endpoint` names the Retell endpoint for timeout lookup; `path` defaults
+        to "/<endpoint>" and only needs passing when the URL carries an ID.
+        """
+        if self._client is None:
+            # Scripts and tests may use the service without the app lifespan
+            await self.start()
+        
+        started = time.perf_counter()
+        headers_sent_at: List[float] = []
+        
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self._pool_stats["connections_opened"] += 1
+            elif event_name.endswith("send_request_headers.started") and not headers_sent_at:
+                headers_sent_at.append(time.perf_counter())
+        
+        timeout = httpx.Timeout(
+            self._endpoint_timeouts.get(endpoint, 10.0),
+            connect=settings.retell_connect_timeout
+        )
+        
+        self._pool_stats["requests_total"] += 1
+        self._pool_stats["requests_in_flight"] += 1
+        status = "error"  # no response (timeout, connection failure)
+        try:
+            response = await self._client.request(
+                method,
+                path or f"/{endpoint}",
+                timeout=timeout,
+                extensions={"trace": trace},
+                **kwargs
+            )
+            status = str(response.status_code)
+            return response
+        finally:
+            self._pool_stats["requests_in_flight"] -= 1
+            RETELL_REQUEST_SECONDS.labels(endpoint, status).observe(time.perf_counter() - started)
+            if headers_sent_at:
+                # Time spent waiting for a pooled connection (plus connect/TLS when a new one was opened)
+                wait_ms = (headers_sent_at[0] - started) * 1000
+                self._pool_stats["wait_time_total_ms"] += wait_ms
+                self._pool_stats["wait_time_max_ms"] = max(self._pool_stats["wait_time_max_ms"], wait_ms)
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for sizing the client"""
+        stats = dict(self._pool_stats)
+        stats["wait_time_avg_ms"] = (
+            stats["wait_time_total_ms"] / stats["requests_total"] if stats["requests_total"] else 0.0
+        )
+        stats["max_connections"] = settings.retell_max_connections
+        stats["max_keepalive_connections"] = settings.retell_max_keepalive_connections
+        
+        # httpx does not expose pool state publicly; read it from the httpcore pool when available
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        stats["open_connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+        stats["active_connections"] = stats["open_connections"] - stats["idle_connections"]
+        stats["queued_requests"] = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+        stats["http2"] = self._http2
+        return stats
     
     def _get_headers(self) -> Dict[str, str]:
         """Get standard headers for Retell API requests"""
@@ -23,46 +184,32 @@ class RetellService:
         }
     
     async def test_connection(self) -> Dict[str, Any]:
-        """Test Retell API connection by listing phone numbers"""
+        """Test Retell API connection by listing phone numbers (served from the inventory cache when fresh)"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/list-phone-numbers",
-                    headers=self._get_headers(),
-                    timeout=10.0
-                )
+            if self._phone_cache_is_fresh():
+                return await self._connection_status(self._phone_cache)
+            
+            response = await self._request("GET", "list-phone-numbers")
+            
+            if response.status_code == 200:
+                phone_data = response.json()
+                phone_numbers = phone_data if isinstance(phone_data, list) else [phone_data]
+                self._store_phone_numbers(phone_numbers)
                 
-                if response.status_code == 200:
-                    phone_data = response.json()
-                    phone_numbers = phone_data if isinstance(phone_data, list) else [phone_data]
+                return await self._connection_status(phone_numbers)
                     
-                    status = {
-                        "connected": True,
-                        "api_key_valid": True,
-                        "phone_numbers": phone_numbers,
-                        "phone_numbers_count": len(phone_numbers),
-                        "primary_phone": phone_numbers[0].get("phone_number") if phone_numbers else None,
-                        "can_make_calls": len(phone_numbers) > 0,
-                        "webhook_url": self.webhook_url
-                    }
-                    
-                    if not phone_numbers:
-                        status["warnings"] = ["No phone numbers found - purchase a phone number in Retell dashboard"]
-                    
-                    return status
-                    
-                elif response.status_code == 401:
-                    return {
-                        "connected": False,
-                        "error": "Invalid API key",
-                        "can_make_calls": False
-                    }
-                else:
-                    return {
-                        "connected": False,
-                        "error": f"API returned {response.status_code}: {response.text}",
-                        "can_make_calls": False
-                    }
+            elif response.status_code == 401:
+                return {
+                    "connected": False,
+                    "error": "Invalid API key",
+                    "can_make_calls": False
+                }
+            else:
+                return {
+                    "connected": False,
+                    "error": f"API returned {response.status_code}: {response.text}",
+                    "can_make_calls": False
+                }
                     
         except Exception as e:
             logger.error(f"Error testing connection: {str(e)}")
@@ -72,54 +219,155 @@ class RetellService:
                 "can_make_calls": False
             }
     
-    async def get_phone_numbers(self) -> List[Dict[str, Any]]:
-        """Get all purchased phone numbers"""
+    async def _connection_status(self, phone_numbers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the connection status payload for a phone-number inventory"""
+        status = {
+            "connected": True,
+            "api_key_valid": True,
+            "phone_numbers": phone_numbers,
+            "phone_numbers_count": len(phone_numbers),
+            "primary_phone": phone_numbers[0].get("phone_number") if phone_numbers else None,
+            "can_make_calls": len(phone_numbers) > 0,
+            "webhook_url": self.webhook_url,
+            "caller_id_usage": await caller_id_slots.usage()
+        }
+        
+        if not phone_numbers:
+            status["warnings"] = ["No phone numbers found - purchase a phone number in Retell dashboard"]
+        
+        return status
+    
+    async def _fetch_phone_numbers(self) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the phone-number inventory from Retell; None when the request failed"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/list-phone-numbers",
-                    headers=self._get_headers(),
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    phone_data = response.json()
-                    return phone_data if isinstance(phone_data, list) else [phone_data]
-                else:
-                    logger.error(f"Failed to get phone numbers: {response.status_code}")
-                    return []
+            response = await self._request("GET", "list-phone-numbers")
+            
+            if response.status_code == 200:
+                phone_data = response.json()
+                return phone_data if isinstance(phone_data, list) else [phone_data]
+            else:
+                logger.error(f"Failed to get phone numbers: {response.status_code}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error fetching phone numbers: {str(e)}")
+            return None
+    
+    async def get_phone_numbers(self) -> List[Dict[str, Any]]:
+        """Get all purchased phone numbers"""
+        phone_numbers = await self._fetch_phone_numbers()
+        if phone_numbers is None:
             return []
+        self._store_phone_numbers(phone_numbers)
+        return phone_numbers
+    
+    def _store_phone_numbers(self, phone_numbers: List[Dict[str, Any]]) -> None:
+        self._phone_cache = phone_numbers
+        self._phone_cache_at = time.monotonic()
+    
+    def _phone_cache_is_fresh(self) -> bool:
+        return (
+            self._phone_cache is not None
+            and time.monotonic() - self._phone_cache_at < settings.phone_numbers_ttl
+        )
+    
+    async def get_cached_phone_numbers(self) -> List[Dict[str, Any]]:
+        """Phone-number inventory from cache; only blocks on Retell when nothing is cached yet"""
+        if self._phone_cache is None:
+            return await self.get_phone_numbers()
+        # Stale entries are still served; the background loop keeps them fresh
+        return self._phone_cache
+    
+    async def _refresh_phone_numbers_loop(self) -> None:
+        """Keep the phone-number inventory fresh in the background"""
+        while True:
+            phone_numbers = await self._fetch_phone_numbers()
+            if phone_numbers is not None:
+                self._store_phone_numbers(phone_numbers)
+            else:
+                logger.warning("Phone-number refresh failed; keeping the cached inventory")
+            await asyncio.sleep(settings.phone_numbers_ttl / 2)
+    
+    async def acquire_caller_id(self) -> Optional[Tuple[int, str]]:
+        """Pick the number to dial from and reserve one of its concurrent-call slots.
+        
+        Returns (slot_id, number), or None when every number is at
+        caller_id_max_concurrent_calls. Must be called after the inventory is
+        loaded (see get_cached_phone_numbers).
+        """
+        numbers = [p["phone_number"] for p in (self._phone_cache or []) if p.get("phone_number")]
+        if not numbers:
+            return None
+        return await caller_id_slots.acquire(numbers)
+    
+    async def bind_caller_id(self, slot_id: int, retell_call_id: Optional[str]) -> None:
+        """Attach a reserved slot to the Retell call so call_ended can release it"""
+        if not retell_call_id:
+            # Nothing to release it by on call_ended; caller_id_hold_timeout reclaims it
+            logger.warning(f"Retell returned no call_id; caller ID slot {slot_id} stays reserved")
+            return
+        try:
+            await caller_id_slots.bind(slot_id, retell_call_id)
+        except Exception as e:
+            logger.error(f"Failed to bind caller ID slot {slot_id} to call {retell_call_id}: {str(e)}")
+    
+    async def release_caller_id(self, retell_call_id: Optional[str] = None, slot_id: Optional[int] = None) -> None:
+        """Free a caller-ID slot, by Retell call ID once bound or by slot ID before that"""
+        try:
+            released = await caller_id_slots.release(retell_call_id=retell_call_id, slot_id=slot_id)
+        except Exception as e:
+            logger.error(f"Failed to release caller ID slot for call {retell_call_id or slot_id}: {str(e)}")
+            return
+        if released:
+            async with self._caller_id_released:
+                self._caller_id_released.notify_all()
+    
+    async def wait_for_caller_id(self, timeout: float) -> None:
+        """Wait until a slot is released in this process, or `timeout` seconds.
+        
+        Slots released by other uvicorn workers are not signalled here, so
+        callers should retry after the timeout as well.
+        """
+        async with self._caller_id_released:
+            try:
+                await asyncio.wait_for(self._caller_id_released.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _llm_payload(self, agent_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the Retell LLM payload for an agent configuration"""
+        system_prompt = agent_config.get("system_prompt", "You are a helpful logistics assistant.")
+        
+        return {
+            "general_prompt": system_prompt,
+            "general_tools": [],
+            "llm_websocket_url": f"{settings.webhook_base_url}/llm-websocket"
+        }
+    
+    def _voice_id(self, voice_settings: Dict[str, Any]) -> str:
+        """Map our voice settings to a Retell voice ID"""
+        voice_id = "11labs-Adrian"  # Default voice that works
+        if voice_settings.get("voice") == "male":
+            voice_id = "11labs-Adam"
+        elif voice_settings.get("voice") == "female":
+            voice_id = "11labs-Sophia"
+        return voice_id
     
     async def create_llm_config(self, agent_config: Dict[str, Any]) -> Optional[str]:
         """Create an LLM configuration and return the LLM ID"""
         try:
-            system_prompt = agent_config.get("system_prompt", "You are a helpful logistics assistant.")
+            payload = self._llm_payload(agent_config)
             
-            payload = {
-                "general_prompt": system_prompt,
-                "general_tools": [],
-                "llm_websocket_url": f"{settings.webhook_base_url}/llm-websocket"
-            }
+            response = await self._request("POST", "create-retell-llm", json=payload)
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/create-retell-llm",
-                    headers=self._get_headers(),
-                    json=payload,
-                    timeout=15.0
-                )
-                
-                if response.status_code == 201:
-                    result = response.json()
-                    llm_id = result.get("llm_id")
-                    logger.info(f"LLM configuration created: {llm_id}")
-                    return llm_id
-                else:
-                    logger.error(f"Failed to create LLM config: {response.status_code} - {response.text}")
-                    return None
+            if response.status_code == 201:
+                result = response.json()
+                llm_id = result.get("llm_id")
+                logger.info(f"LLM configuration created: {llm_id}")
+                return llm_id
+            else:
+                logger.error(f"Failed to create LLM config: {response.status_code} - {response.text}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error creating LLM config: {str(e)}")
@@ -133,15 +381,8 @@ class RetellService:
             if not llm_id:
                 return {"error": "Failed to create LLM configuration"}
             
-            # Extract voice settings
-            voice_settings = agent_config.get("voice_settings", {})
-            
             # Map voice settings to Retell format
-            voice_id = "11labs-Adrian"  # Default voice that works
-            if voice_settings.get("voice") == "male":
-                voice_id = "11labs-Adam"
-            elif voice_settings.get("voice") == "female":
-                voice_id = "11labs-Sophia"
+            voice_id = self._voice_id(agent_config.get("voice_settings") or {})
             
             # Use minimal payload that works (from debug test)
             payload = {
@@ -152,82 +393,192 @@ class RetellService:
                 "voice_id": voice_id
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/create-agent",
-                    headers=self._get_headers(),
-                    json=payload,
-                    timeout=15.0
-                )
-                
-                if response.status_code == 201:
-                    result = response.json()
-                    logger.info(f"Agent created successfully: {result.get('agent_id')}")
-                    return result
-                else:
-                    logger.error(f"Failed to create agent: {response.status_code} - {response.text}")
-                    return {"error": f"API Error {response.status_code}", "details": response.text}
+            response = await self._request("POST", "create-agent", json=payload)
+            
+            if response.status_code == 201:
+                result = response.json()
+                logger.info(f"Agent created successfully: {result.get('agent_id')}")
+                return result
+            else:
+                logger.error(f"Failed to create agent: {response.status_code} - {response.text}")
+                return {"error": f"API Error {response.status_code}", "details": response.text}
                     
         except Exception as e:
             logger.error(f"Error creating agent: {str(e)}")
             return {"error": "Exception", "details": str(e)}
     
+    async def update_llm_config(self, llm_id: str, agent_config: Dict[str, Any]) -> bool:
+        """Update an existing LLM configuration in place"""
+        try:
+            response = await self._request(
+                "PATCH",
+                "update-retell-llm",
+                f"/update-retell-llm/{llm_id}",
+                json=self._llm_payload(agent_config)
+            )
+            
+            if response.status_code == 200:
+                logger.info(f"LLM configuration updated: {llm_id}")
+                return True
+            logger.error(f"Failed to update LLM config {llm_id}: {response.status_code} - {response.text}")
+            return False
+            
+        except Exception as e:
+            logger.error(f"Error updating LLM config {llm_id}: {str(e)}")
+            return False
+    
+    async def update_agent(self, retell_agent_id: str, agent_config: Dict[str, Any]) -> bool:
+        """Update the voice of an existing Retell agent in place"""
+        try:
+            payload = {"voice_id": self._voice_id(agent_config.get("voice_settings") or {})}
+            
+            response = await self._request(
+                "PATCH",
+                "update-agent",
+                f"/update-agent/{retell_agent_id}",
+                json=payload
+            )
+            
+            if response.status_code == 200:
+                logger.info(f"Agent updated: {retell_agent_id}")
+                return True
+            logger.error(f"Failed to update agent {retell_agent_id}: {response.status_code} - {response.text}")
+            return False
+            
+        except Exception as e:
+            logger.error(f"Error updating agent {retell_agent_id}: {str(e)}")
+            return False
+    
+    async def get_or_provision_agent(self, agent_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the Retell agent for one of our agents, creating it only when needed.
+        
+        Lookups go memory -> retell_provisioning table -> Retell API. A stored
+        record whose config hash no longer matches is updated in place rather
+        than replaced, so config edits do not leave orphaned Retell objects.
+        """
+        agent_id = agent_config.get("id")
+        config_hash = agent_config_hash(agent_config)
+        
+        if not agent_id:
+            # Ad-hoc config without a row to key on - nothing to reuse
+            return await self.create_agent(agent_config)
+        
+        cached = self._provisioning_cache.get((agent_id, config_hash))
+        if cached:
+            return {"agent_id": cached["retell_agent_id"], "llm_id": cached["retell_llm_id"]}
+        
+        lock = self._provisioning_locks.setdefault(agent_id, asyncio.Lock())
+        async with lock:
+            # Another trigger may have provisioned while we waited
+            cached = self._provisioning_cache.get((agent_id, config_hash))
+            if cached:
+                return {"agent_id": cached["retell_agent_id"], "llm_id": cached["retell_llm_id"]}
+            
+            record = await db.get_retell_provisioning(agent_id)
+            
+            if record and record.get("config_hash") != config_hash:
+                llm_updated = await self.update_llm_config(record["retell_llm_id"], agent_config)
+                agent_updated = llm_updated and await self.update_agent(record["retell_agent_id"], agent_config)
+                if agent_updated:
+                    record["config_hash"] = config_hash
+                    await db.upsert_retell_provisioning(record)
+                else:
+                    record = None
+            
+            if not record:
+                agent_result = await self.create_agent(agent_config)
+                if not agent_result or agent_result.get("error"):
+                    return agent_result or {"error": "Failed to create agent"}
+            
+                record = {
+                    "agent_id": agent_id,
+                    "config_hash": config_hash,
+                    "retell_llm_id": agent_result.get("response_engine", {}).get("llm_id"),
+                    "retell_agent_id": agent_result.get("agent_id")
+                }
+                await db.upsert_retell_provisioning(record)
+            
+            self.invalidate_agent(agent_id)
+            self._provisioning_cache[(agent_id, config_hash)] = {
+                "retell_llm_id": record["retell_llm_id"],
+                "retell_agent_id": record["retell_agent_id"]
+            }
+            return {"agent_id": record["retell_agent_id"], "llm_id": record["retell_llm_id"]}
+    
+    async def provision_agent(self, agent_config: Dict[str, Any]) -> None:
+        """Create Retell objects ahead of the first call (run as a background task)"""
+        result = await self.get_or_provision_agent(agent_config)
+        if result.get("error"):
+            logger.warning(f"Ahead-of-time provisioning failed for agent {agent_config.get('id')}: {result}")
+        else:
+            logger.info(f"Agent {agent_config.get('id')} provisioned as Retell agent {result.get('agent_id')}")
+    
+    def invalidate_agent(self, agent_id: str) -> None:
+        """Drop cached Retell objects for an agent whose config changed"""
+        for key in [key for key in self._provisioning_cache if key[0] == agent_id]:
+            del self._provisioning_cache[key]
+    
     async def create_retell_call(self, 
                                phone_number: str,
                                agent_config: Dict[str, Any],
                                metadata: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
         """Create outbound call using Retell API"""
         try:
-            # Get available phone numbers
-            phone_numbers = await self.get_phone_numbers()
+            # Get available phone numbers (cached inventory)
+            phone_numbers = await self.get_cached_phone_numbers()
             
             if not phone_numbers:
                 return {"error": "No phone numbers available", "details": "Purchase a phone number first"}
             
-            from_number = phone_numbers[0].get("phone_number")
-            if not from_number:
-                return {"error": "Invalid phone number format", "details": "Phone number not found in response"}
-            
-            # Create or get agent
-            agent_result = await self.create_agent(agent_config)
-            if not agent_result or agent_result.get("error"):
-                return {"error": "Failed to create agent", "details": agent_result}
+            slot = await self.acquire_caller_id()
+            if not slot:
+                return {
+                    "error": CALLER_IDS_BUSY,
+                    "details": f"Every phone number has {settings.caller_id_max_concurrent_calls} calls in flight"
+                }
             
-            agent_id = agent_result.get("agent_id")
-            
-            # Prepare dynamic variables for the call
-            dynamic_variables = {}
-            if metadata:
-                dynamic_variables["driver_name"] = metadata.get("driver_name", "")
-                dynamic_variables["load_number"] = metadata.get("load_number", "")
-            
-            # Create call payload
-            payload = {
-                "from_number": from_number,
-                "to_number": phone_number,
-                "agent_id": agent_id,
-                "retell_llm_dynamic_variables": dynamic_variables,
-                "metadata": metadata or {}
-            }
-            
-            logger.info(f"Creating call from {from_number} to {phone_number} with agent {agent_id}")
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/create-phone-call",
-                    headers=self._get_headers(),
-                    json=payload,
-                    timeout=15.0
-                )
+            slot_id, from_number = slot
+            call_created = False
+            try:
+                # Reuse the provisioned agent for this config
+                agent_result = await self.get_or_provision_agent(agent_config)
+                if not agent_result or agent_result.get("error"):
+                    return {"error": "Failed to create agent", "details": agent_result}
+                
+                agent_id = agent_result.get("agent_id")
+                
+                # Prepare dynamic variables for the call
+                dynamic_variables = {}
+                if metadata:
+                    dynamic_variables["driver_name"] = metadata.get("driver_name", "")
+                    dynamic_variables["load_number"] = metadata.get("load_number", "")
+                
+                # Create call payload
+                payload = {
+                    "from_number": from_number,
+                    "to_number": phone_number,
+                    "agent_id": agent_id,
+                    "retell_llm_dynamic_variables": dynamic_variables,
+                    "metadata": metadata or {}
+                }
+                
+                logger.info(f"Creating call from {from_number} to {phone_number} with agent {agent_id}")
+                
+                response = await self._request("POST", "create-phone-call", json=payload)
                 
                 if response.status_code == 201:
                     result = response.json()
                     logger.info(f"Call created successfully: {result.get('call_id')}")
+                    call_created = True
+                    await self.bind_caller_id(slot_id, result.get("call_id"))
                     return result
                 else:
                     error_text = response.text
                     logger.error(f"Call creation failed: {response.status_code} - {error_text}")
                     return {"error": f"API Error {response.status_code}", "details": error_text}
+            finally:
+                if not call_created:
+                    await self.release_caller_id(slot_id=slot_id)
                     
         except Exception as e:
             logger.error(f"Failed to create call: {str(e)}")
@@ -236,18 +587,13 @@ class RetellService:
     async def get_call_details(self, call_id: str) -> Optional[Dict[str, Any]]:
         """Get call details by call ID"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/get-call/{call_id}",
-                    headers=self._get_headers(),
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logger.error(f"Failed to get call details: {response.status_code}")
-                    return None
+            response = await self._request("GET", "get-call", f"/get-call/{call_id}")
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Failed to get call details: {response.status_code}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error getting call details: {str(e)}")
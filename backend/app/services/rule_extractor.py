@@ -0,0 +1,247 @@
+# backend/app/services/rule_extractor.py
+from .prompt_builder import last_known_location
+import logging
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NOT_PROVIDED = "Not provided"
+
+# Per-field confidences. The overall score is the weakest field, so one
+# shaky field is enough to send the transcript to the LLM.
+CONFIDENT = 0.95
+# Field absent and nothing in the transcript suggests it was mentioned
+ABSENT = 0.85
+# Field inferred from other fields rather than stated
+INFERRED = 0.85
+# Conflicting signals, or cues for a field we could not parse
+UNSURE = 0.5
+# No signal at all for a field the schema needs
+UNKNOWN = 0.4
+
+_SPEAKER_PATTERN = re.compile(r"^\s*(agent|user|driver|caller|assistant)\s*:\s*", re.IGNORECASE)
+# Any contraction ending in n't (haven't, can't, won't...) counts; it has no word boundary before the n
+_NEGATION_PATTERN = re.compile(
+    r"(?:\b(?:no|not yet|not|never|without|nobody|no one|none|nothing|haven't|hasn't)\b|\w+n't\b)[\w\s']{0,12}$",
+    re.IGNORECASE
+)
+
+_DRIVER_STATUS_PATTERNS = {
+    "Arrived": re.compile(
+        r"\b(?:(?:i've|i have|we've|just|finally)\s+(?:arrived|pulled in|got here)|arrived\b|i'm here\b|i am here\b"
+        r"|(?:at|in)\s+the\s+(?:dock|door|receiver|consignee|shipper|customer|yard|delivery)"
+        r"|checked in|backing in|backed in|getting unloaded|unloading|being unloaded)",
+        re.IGNORECASE
+    ),
+    "Delayed": re.compile(
+        r"\b(?:delay(?:ed|s)?|running (?:late|behind)|behind schedule|stuck|held up|slowed down|backed up"
+        r"|traffic jam|heavy traffic|bad traffic|construction|detour|road closure|closed|waiting on|detention"
+        r"|wrong address|(?:be|take) a while)\b",
+        re.IGNORECASE
+    ),
+    "Driving": re.compile(
+        r"\b(?:driving|on the road|en route|heading|headed|rolling|on my way|on the way|just passed|passing"
+        r"|making good time|moving|cruising|northbound|southbound|eastbound|westbound)\b",
+        re.IGNORECASE
+    ),
+}
+
+_TIME_EXPRESSION = (
+    r"(?:\d{1,2}(?::\d{2})?\s*(?:a\.?m\.?|p\.?m\.?)|\d{1,2}:\d{2}|\d{1,2}\s*o'clock"
+    r"|noon|midnight|tonight|tomorrow(?:\s+(?:morning|afternoon|evening))?|end of (?:the )?day"
+    r"|(?:about |around |roughly |like )?(?:\d+(?:\.\d+)?|an?|one|two|three|four|five|six|half an?)"
+    r"\s+(?:and a half\s+)?(?:hours?|hrs?|minutes?|mins?))"
+)
+_ETA_PATTERNS = [
+    re.compile(r"\beta\b(?:\s+(?:is|of|should be|will be|looks like|around|about|~))*\s*[:,-]?\s*(" + _TIME_EXPRESSION + r")",
+               re.IGNORECASE),
+    re.compile(r"\b(?:be there|get there|arrive|arriving|arrival|deliver|delivering|there|be at (?:the )?\w+)"
+               r"(?:\s+(?:by|around|at|in|about|before|within))?\s+(?:about\s+|around\s+)?(" + _TIME_EXPRESSION + r")",
+               re.IGNORECASE),
+    re.compile(r"\b(" + _TIME_EXPRESSION + r")\s+(?:out|away|from (?:the )?(?:receiver|consignee|delivery|there))\b",
+               re.IGNORECASE),
+]
+# Time-ish language we failed to parse into an ETA
+_ETA_CUES = re.compile(r"\b(?:eta|o'clock|tonight|tomorrow|noon|hours?|minutes?|mins?|\d{1,2}:\d{2}|\d\s*(?:am|pm))\b", re.IGNORECASE)
+# Place-ish language we failed to parse into a location
+_LOCATION_CUES = re.compile(
+    r"\b(?:exit|mile marker|mm\s*\d|highway|interstate|i-\d+|route|rest area|truck stop|near|outside|just past|miles from)\b",
+    re.IGNORECASE
+)
+
+_EMERGENCY_TYPE_PATTERNS = {
+    "Accident": re.compile(
+        r"\b(?:accident|crash(?:ed)?|collision|collided|wreck(?:ed)?|rear[- ]ended|jackknifed|rolled over"
+        r"|hit (?:a|an|the|by|me)|ran into|sideswiped|t-boned)\b",
+        re.IGNORECASE
+    ),
+    "Breakdown": re.compile(
+        r"\b(?:broke(?:n)? down|breakdown|flat tire|blowout|blew (?:a|out)|blown tire|engine (?:died|trouble|failure|light)"
+        r"|overheat(?:ing|ed)|won't start|wont start|out of fuel|ran out of (?:fuel|gas|diesel)|brakes? (?:failed|went out|are gone)"
+        r"|transmission|dead battery|lost power|smoke (?:from|coming out of) the engine)\b",
+        re.IGNORECASE
+    ),
+    "Medical": re.compile(
+        r"\b(?:chest pains?|heart attack|can't breathe|cannot breathe|trouble breathing|dizzy|passed out|pass out|fainted"
+        r"|seizure|bleeding|injur(?:ed|y|ies)|hurt|ambulance|medical|unconscious|stroke|diabetic|sick)\b",
+        re.IGNORECASE
+    ),
+}
+_EMERGENCY_CUES = re.compile(r"\b(?:emergency|help|911|police|fire|smoke|stolen|robbed|hijack(?:ed)?|threat(?:ened)?)\b",
+                             re.IGNORECASE)
+
+
+def parse_transcript(transcript: str) -> List[Dict[str, str]]:
+    """Retell transcript text ("Agent: ...\\nUser: ...") -> utterances.
+    
+    Text without speaker labels is treated as a single driver utterance.
+    """
+    utterances: List[Dict[str, str]] = []
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        match = _SPEAKER_PATTERN.match(line)
+        if match:
+            role = "agent" if match.group(1).lower() in ("agent", "assistant") else "user"
+            utterances.append({"role": role, "content": line[match.end():].strip()})
+        elif utterances:
+            utterances[-1]["content"] += " " + line.strip()
+        else:
+            utterances.append({"role": "user", "content": line.strip()})
+    return utterances
+
+
+def _affirmed_matches(pattern: re.Pattern, text: str) -> List[re.Match]:
+    """Matches not preceded by a nearby negation ("no delays", "not hurt")"""
+    return [
+        match for match in pattern.finditer(text)
+        if not _NEGATION_PATTERN.search(text[max(0, match.start() - 24):match.start()])
+    ]
+
+
+def _classify(patterns: Dict[str, re.Pattern], text: str) -> Tuple[Optional[str], float]:
+    """Label whose patterns matched, with confidence by how contested it was.
+    
+    When several labels match, the one mentioned last wins - drivers
+    correct themselves ("I was delayed but I'm rolling now").
+    """
+    last_seen = {}
+    for label, pattern in patterns.items():
+        matches = _affirmed_matches(pattern, text)
+        if matches:
+            last_seen[label] = matches[-1].start()
+    
+    if not last_seen:
+        return None, UNKNOWN
+    label = max(last_seen, key=last_seen.get)
+    return label, CONFIDENT if len(last_seen) == 1 else UNSURE
+
+
+def _extract_eta(text: str) -> Optional[str]:
+    found = []
+    for pattern in _ETA_PATTERNS:
+        for match in _affirmed_matches(pattern, text):
+            found.append((match.start(1), match.group(1).strip()))
+    if not found:
+        return None
+    return max(found)[1].rstrip(".")
+
+
+def _extract_location(utterances: List[Dict[str, str]]) -> Optional[str]:
+    location = last_known_location(utterances)
+    if location and location.lower().startswith("the "):
+        location = location[4:]
+    return location
+
+
+def _score_missing(value: Optional[str], cues: re.Pattern, text: str) -> float:
+    if value:
+        return CONFIDENT
+    return UNSURE if cues.search(text) else ABSENT
+
+
+class RuleExtractor:
+    """Pattern-based extraction of the dispatch and emergency summary schemas.
+    
+    Produces the same result contract as OpenAIService.extract_call_summary.
+    The confidence score is the weakest per-field confidence, so callers can
+    hand anything below their threshold to the LLM.
+    """
+    
+    def extract(self, transcript: str, scenario_type: str) -> Dict[str, Any]:
+        """Extract structured data from call transcript"""
+        try:
+            utterances = parse_transcript(transcript)
+            driver_text = " ".join(u["content"] for u in utterances if u["role"] == "user")
+            
+            if scenario_type == "emergency":
+                structured_data, confidence = self._extract_emergency(utterances, driver_text)
+            else:
+                structured_data, confidence = self._extract_dispatch(utterances, driver_text)
+            
+            return {
+                "structured_data": structured_data,
+                "confidence_score": confidence,
+                "processing_errors": [],
+                "extractor": "rules"
+            }
+        except Exception as e:
+            logger.error(f"Rule extraction error: {str(e)}")
+            return {
+                "structured_data": {},
+                "confidence_score": 0.0,
+                "processing_errors": [str(e)],
+                "extractor": "rules"
+            }
+    
+    def _extract_dispatch(self, utterances: List[Dict[str, str]], driver_text: str) -> Tuple[Dict[str, Any], float]:
+        driver_status, status_confidence = _classify(_DRIVER_STATUS_PATTERNS, driver_text)
+        location = _extract_location(utterances)
+        eta = _extract_eta(driver_text)
+        
+        # A driver giving an ETA without saying how it's going is still on the road
+        if driver_status is None and eta:
+            driver_status, status_confidence = "Driving", INFERRED
+        
+        if driver_status == "Arrived":
+            call_outcome = "Arrival Confirmation"
+        elif driver_status in ("Driving", "Delayed"):
+            call_outcome = "In-Transit Update"
+        else:
+            call_outcome = "No Update"
+        
+        structured_data = {
+            "call_outcome": call_outcome,
+            "driver_status": driver_status or "Unknown",
+            "current_location": location or NOT_PROVIDED,
+            "eta": eta or NOT_PROVIDED
+        }
+        confidence = min(
+            status_confidence,
+            _score_missing(location, _LOCATION_CUES, driver_text),
+            # Nobody gives an ETA after arriving, so an arrival with one is suspect
+            (UNSURE if eta else CONFIDENT) if driver_status == "Arrived" else _score_missing(eta, _ETA_CUES, driver_text)
+        )
+        return structured_data, confidence
+    
+    def _extract_emergency(self, utterances: List[Dict[str, str]], driver_text: str) -> Tuple[Dict[str, Any], float]:
+        emergency_type, type_confidence = _classify(_EMERGENCY_TYPE_PATTERNS, driver_text)
+        location = _extract_location(utterances)
+        
+        if emergency_type is None and _EMERGENCY_CUES.search(driver_text):
+            # Clearly an emergency, but not one of the named kinds
+            emergency_type, type_confidence = "Other", UNSURE
+        
+        structured_data = {
+            "call_outcome": "Emergency Detected",
+            "emergency_type": emergency_type or "Other",
+            "emergency_location": location or NOT_PROVIDED,
+            "escalation_status": "Escalation Flagged"
+        }
+        confidence = min(type_confidence, _score_missing(location, _LOCATION_CUES, driver_text))
+        return structured_data, confidence
+
+
+# Global extractor instance
+rule_extractor = RuleExtractor()
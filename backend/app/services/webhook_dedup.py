@@ -0,0 +1,121 @@
+# backend/app/services/webhook_dedup.py
+from ..config import settings
+from .local_store import LocalSQLite
+from collections import OrderedDict
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+create table if not exists webhook_dedup (
+    key text primary key,
+    first_seen_at real not null,
+    expires_at real not null,
+    duplicates integer not null default 0
+);
+create index if not exists webhook_dedup_expires on webhook_dedup (expires_at);
+"""
+# Sweep expired keys from the shared file after this many claims
+PRUNE_EVERY_CLAIMS = 500
+
+
+def event_key(retell_call_id: str, event_type: str) -> str:
+    return f"{retell_call_id}:{event_type}"
+
+
+class WebhookDedupStore:
+    """Seen-set of (Retell call_id, event type) with a TTL.
+    
+    The in-memory front is a bounded LRU that answers repeats inside one
+    worker without I/O. The SQLite file under local_state_dir is the source
+    of truth across uvicorn workers: a key is claimed with a single
+    INSERT OR IGNORE, so exactly one delivery of an event wins even when
+    Retell's retries land on different workers.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.local_state_dir, "webhook_dedup.db")
+        self.ttl = settings.webhook_dedup_ttl_seconds
+        self.max_memory_entries = settings.webhook_dedup_memory_entries
+        self._memory: "OrderedDict[str, float]" = OrderedDict()
+        self._db = LocalSQLite(self.path, _SCHEMA)
+        self._claims = 0
+        self.stats = {"claimed": 0, "duplicates": 0, "memory_duplicates": 0, "released": 0}
+    
+    def _remember(self, key: str, expires_at: float) -> None:
+        self._memory[key] = expires_at
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    async def claim(self, retell_call_id: str, event_type: str) -> bool:
+        """True if this is the first delivery of the event within the TTL"""
+        key = event_key(retell_call_id, event_type)
+        now = time.time()
+        
+        expires_at = self._memory.get(key)
+        if expires_at is not None and expires_at > now:
+            self.stats["duplicates"] += 1
+            self.stats["memory_duplicates"] += 1
+            return False
+        
+        self._claims += 1
+        prune = self._claims % PRUNE_EVERY_CLAIMS == 0
+        
+        def insert(conn: sqlite3.Connection) -> Tuple[bool, float]:
+            conn.execute("begin immediate")
+            try:
+                if prune:
+                    conn.execute("delete from webhook_dedup where expires_at <= ?", (now,))
+                else:
+                    conn.execute("delete from webhook_dedup where key = ? and expires_at <= ?", (key, now))
+                cursor = conn.execute(
+                    "insert or ignore into webhook_dedup (key, first_seen_at, expires_at) values (?, ?, ?)",
+                    (key, now, now + self.ttl)
+                )
+                claimed = cursor.rowcount == 1
+                expires_at = now + self.ttl
+                if not claimed:
+                    conn.execute("update webhook_dedup set duplicates = duplicates + 1 where key = ?", (key,))
+                    expires_at = conn.execute(
+                        "select expires_at from webhook_dedup where key = ?", (key,)
+                    ).fetchone()[0]
+                conn.execute("commit")
+                return claimed, expires_at
+            except Exception:
+                conn.execute("rollback")
+                raise
+        
+        claimed, expires_at = await self._db.call(insert)
+        self._remember(key, expires_at)
+        self.stats["claimed" if claimed else "duplicates"] += 1
+        return claimed
+    
+    async def release(self, retell_call_id: str, event_type: str) -> None:
+        """Forget a claim whose event was not persisted, so the redelivery is processed"""
+        key = event_key(retell_call_id, event_type)
+        self._memory.pop(key, None)
+        self.stats["released"] += 1
+        try:
+            await self._db.call(lambda conn: conn.execute("delete from webhook_dedup where key = ?", (key,)))
+        except Exception as e:
+            logger.error(f"Failed to release webhook dedup key {key}: {str(e)}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        deliveries = self.stats["claimed"] + self.stats["duplicates"]
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "duplicate_rate": round(self.stats["duplicates"] / deliveries, 3) if deliveries else None
+        }
+    
+    def close(self) -> None:
+        self._db.close()
+
+
+# Global dedup store instance
+webhook_dedup = WebhookDedupStore()
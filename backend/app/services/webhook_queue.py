@@ -0,0 +1,241 @@
+# backend/app/services/webhook_queue.py
+from ..codec import codec
+from ..config import settings
+from .local_store import LocalSQLite
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+_SCHEMA = """
+create table if not exists webhook_events (
+    id integer primary key autoincrement,
+    event_type text not null,
+    retell_call_id text,
+    payload text not null,
+    status text not null default 'pending',  -- pending | processing | done | dead
+    attempts integer not null default 0,
+    next_attempt_at real not null,
+    last_error text,
+    created_at real not null,
+    updated_at real not null
+);
+create index if not exists webhook_events_ready on webhook_events (status, next_attempt_at);
+"""
+
+
+class WebhookQueue:
+    """Durable local queue for Retell webhook events.
+    
+    Intake only appends a row to SQLite, so the webhook can be acknowledged
+    in milliseconds; a pool of worker tasks drains the queue with retry and
+    exponential backoff. Events that exhaust their attempts are kept as dead
+    letters. Claims happen inside BEGIN IMMEDIATE transactions, so several
+    uvicorn workers can share one queue file.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(settings.local_state_dir, "webhook_queue.db")
+        self._db = LocalSQLite(self.path, _SCHEMA, row_factory=sqlite3.Row)
+        self._handler: Optional[EventHandler] = None
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+    
+    # Intake
+    async def enqueue(self, event_type: str, payload: Union[Dict[str, Any], str],
+                      retell_call_id: Optional[str] = None) -> int:
+        """Persist an event for processing and return its queue ID.
+        
+        payload is the event dict, or the webhook body as received (JSON text),
+        which is stored without a decode/encode round trip.
+        """
+        now = time.time()
+        if isinstance(payload, dict):
+            retell_call_id = retell_call_id or (payload.get("call") or {}).get("call_id")
+            payload = codec.dumps(payload)
+        
+        def insert(conn: sqlite3.Connection) -> int:
+            cursor = conn.execute(
+                "insert into webhook_events (event_type, retell_call_id, payload, next_attempt_at, created_at, updated_at) "
+                "values (?, ?, ?, ?, ?, ?)",
+                (event_type, retell_call_id, payload, now, now, now)
+            )
+            return cursor.lastrowid
+        
+        event_id = await self._db.call(insert)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return event_id
+    
+    # Workers
+    async def start(self, handler: EventHandler) -> None:
+        """Start the worker pool (called from the FastAPI lifespan)"""
+        if self._workers:
+            return
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        
+        # Events a crashed worker was holding become visible again
+        cutoff = time.time() - settings.webhook_processing_timeout
+        await self._db.call(lambda conn: conn.execute(
+            "update webhook_events set status = 'pending' where status = 'processing' and updated_at < ?",
+            (cutoff,)
+        ))
+        
+        self._workers = [
+            asyncio.create_task(self._worker(n)) for n in range(settings.webhook_workers)
+        ]
+        self._workers.append(asyncio.create_task(self._purge_loop()))
+        logger.info(f"Webhook queue started at {self.path} with {settings.webhook_workers} workers")
+    
+    async def close(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._db.close()
+    
+    def _claim(self, conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        now = time.time()
+        conn.execute("begin immediate")
+        try:
+            row = conn.execute(
+                "select * from webhook_events where status = 'pending' and next_attempt_at <= ? "
+                "order by id limit 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "update webhook_events set status = 'processing', attempts = attempts + 1, updated_at = ? "
+                    "where id = ?",
+                    (now, row["id"])
+                )
+            conn.execute("commit")
+            return row
+        except Exception:
+            conn.execute("rollback")
+            raise
+    
+    async def _worker(self, number: int) -> None:
+        while True:
+            try:
+                row = await self._db.call(self._claim)
+            except Exception as e:
+                logger.error(f"Webhook worker {number} failed to claim an event: {str(e)}")
+                row = None
+            
+            if row is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.webhook_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._process(row)
+    
+    async def _process(self, row: sqlite3.Row) -> None:
+        event_id = row["id"]
+        attempts = row["attempts"] + 1
+        started = time.perf_counter()
+        try:
+            await self._handler(row["event_type"], codec.loads(row["payload"]))
+        except asyncio.CancelledError:
+            # Shutting down mid-event: hand it back untouched
+            await self._db.call(lambda conn: conn.execute(
+                "update webhook_events set status = 'pending', attempts = attempts - 1 where id = ?",
+                (event_id,)
+            ))
+            raise
+        except Exception as e:
+            await self._fail(event_id, attempts, str(e))
+            return
+        
+        now = time.time()
+        await self._db.call(lambda conn: conn.execute(
+            "update webhook_events set status = 'done', last_error = null, updated_at = ? where id = ?",
+            (now, event_id)
+        ))
+        logger.info(f"Webhook event {event_id} ({row['event_type']}) processed in {(time.perf_counter() - started) * 1000:.0f}ms")
+    
+    async def _fail(self, event_id: int, attempts: int, error: str) -> None:
+        now = time.time()
+        if attempts >= settings.webhook_max_attempts:
+            status, next_attempt_at = "dead", now
+            logger.error(f"Webhook event {event_id} moved to dead letters after {attempts} attempts: {error}")
+        else:
+            backoff = min(
+                settings.webhook_retry_base_seconds * (2 ** (attempts - 1)),
+                settings.webhook_retry_max_seconds
+            )
+            status, next_attempt_at = "pending", now + backoff * random.uniform(0.8, 1.2)
+            logger.warning(f"Webhook event {event_id} failed (attempt {attempts}), retrying in {backoff:.0f}s: {error}")
+        
+        await self._db.call(lambda conn: conn.execute(
+            "update webhook_events set status = ?, next_attempt_at = ?, last_error = ?, updated_at = ? where id = ?",
+            (status, next_attempt_at, error, now, event_id)
+        ))
+    
+    async def _purge_loop(self) -> None:
+        """Drop processed events after the retention window"""
+        while True:
+            cutoff = time.time() - settings.webhook_done_retention_seconds
+            try:
+                await self._db.call(lambda conn: conn.execute(
+                    "delete from webhook_events where status = 'done' and updated_at < ?", (cutoff,)
+                ))
+            except Exception as e:
+                logger.error(f"Failed to purge webhook events: {str(e)}")
+            await asyncio.sleep(3600)
+    
+    # Dead letters and stats
+    async def get_dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = await self._db.call(lambda conn: conn.execute(
+            "select * from webhook_events where status = 'dead' order by id desc limit ?", (limit,)
+        ).fetchall())
+        return [
+            {
+                "id": row["id"],
+                "event_type": row["event_type"],
+                "retell_call_id": row["retell_call_id"],
+                "attempts": row["attempts"],
+                "last_error": row["last_error"],
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"],
+                "payload": codec.loads(row["payload"])
+            }
+            for row in rows
+        ]
+    
+    async def retry_dead_letter(self, event_id: int) -> bool:
+        """Put a dead event back in the queue with a fresh attempt budget"""
+        now = time.time()
+        updated = await self._db.call(lambda conn: conn.execute(
+            "update webhook_events set status = 'pending', attempts = 0, next_attempt_at = ?, updated_at = ? "
+            "where id = ? and status = 'dead'",
+            (now, now, event_id)
+        ).rowcount)
+        if updated and self._wakeup is not None:
+            self._wakeup.set()
+        return bool(updated)
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        rows = await self._db.call(lambda conn: conn.execute(
+            "select status, count(*) as n, min(created_at) as oldest from webhook_events group by status"
+        ).fetchall())
+        stats: Dict[str, Any] = {"workers": len(self._workers) - 1 if self._workers else 0}
+        for row in rows:
+            stats[row["status"]] = row["n"]
+            if row["status"] == "pending":
+                stats["oldest_pending_age_s"] = round(time.time() - row["oldest"], 1)
+        return stats
+
+# Global queue instance
+webhook_queue = WebhookQueue()
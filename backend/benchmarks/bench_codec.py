@@ -0,0 +1,129 @@
+# backend/benchmarks/bench_codec.py
+"""LLM WebSocket frame decoding: stdlib json vs orjson vs msgspec.
+
+Builds Retell-shaped response_required frames with 10, 100 and 500 turns
+(each utterance carrying word timings, as Retell sends them) and times,
+per installed backend:
+
+  decode     codec.decode_frame plus the reads the socket handler makes
+             (interaction_type, response_id, call metadata, last turns)
+  prompt     decode plus PromptBuilder.build, i.e. all the JSON work of a turn
+  ping       a ping frame in, the pong frame out
+
+    cd backend
+    python -m benchmarks.bench_codec --iterations 2000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+for _key in ("OPENAI_API_KEY", "RETELL_API_KEY", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+
+from app.codec import BACKENDS, _AVAILABLE, get_codec
+from app.services.prompt_builder import prompt_builder
+
+TURN_COUNTS = (10, 100, 500)
+LINES = [
+    ("agent", "Hi, this is Dispatch with a check call on load LD-4821. Can you give me an update on your status?"),
+    ("user", "Yeah, I'm driving, just passed the Love's on I-40 near Amarillo, should be there around 3 PM."),
+    ("agent", "Thanks. Any delays or issues I should know about on the way to the receiver?"),
+    ("user", "Traffic was slow through Oklahoma City but it's clear now. No issues with the load."),
+]
+
+
+def _utterance(role: str, content: str, rng: random.Random, at: float) -> dict:
+    words = []
+    for word in content.split():
+        duration = rng.uniform(0.15, 0.45)
+        words.append({"word": word, "start": round(at, 3), "end": round(at + duration, 3)})
+        at += duration
+    return {"role": role, "content": content, "words": words}
+
+
+def _frame(turns: int) -> str:
+    rng = random.Random(turns)
+    conversation = []
+    at = 0.0
+    for i in range(turns):
+        role, content = LINES[i % len(LINES)]
+        conversation.append(_utterance(role, content, rng, at))
+        at += 8.0
+    return json.dumps({
+        "interaction_type": "response_required",
+        "response_id": turns,
+        "call_id": "retell_call_bench",
+        "call": {
+            "call_id": "retell_call_bench",
+            "metadata": {"call_id": "call-1", "driver_name": "Sam", "load_number": "LD-4821"},
+            "transcript": "\n".join(f"{u['role']}: {u['content']}" for u in conversation)
+        },
+        "conversation": conversation
+    })
+
+
+def _time(fn, iterations: int) -> float:
+    """Median microseconds per call over 5 batches"""
+    batch = max(1, iterations // 5)
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        samples.append((time.perf_counter() - started) * 1e6 / batch)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # stdlib first: it is the baseline for the speedup column
+    backends = [name for name in reversed(list(BACKENDS)) if _AVAILABLE[name]]
+    codecs = {name: get_codec(name) for name in backends}
+    ping = json.dumps({"interaction_type": "ping"})
+    system_prompt = "You are a dispatcher checking in with {driver_name} about load {load_number}."
+
+    print(f"Backends: {', '.join(backends)} (missing: {', '.join(n for n in BACKENDS if not _AVAILABLE[n]) or 'none'})")
+    print()
+    print("  turns  frame KB  backend     decode us   prompt us   prompt speedup")
+    for turns in TURN_COUNTS:
+        data = _frame(turns)
+        baseline = None
+        for name, codec in codecs.items():
+            def decode():
+                frame = codec.decode_frame(data)
+                frame.interaction_type, frame.response_id, frame.call.get("metadata")
+                conversation = frame.conversation
+                for i in range(1, min(len(conversation), 4) + 1):
+                    conversation[-i].get("content")
+
+            def prompt():
+                frame = codec.decode_frame(data)
+                prompt_builder.build(system_prompt, frame.conversation, frame.call.get("metadata"))
+
+            decode_us = _time(decode, args.iterations)
+            prompt_us = _time(prompt, max(args.iterations // 4, 5))
+            baseline = baseline or prompt_us
+            print(
+                f"  {turns:5d}  {len(data) / 1024:8.1f}  {name:8s}  {decode_us:10.1f}  {prompt_us:10.1f}"
+                f"  {baseline / prompt_us:14.2f}x"
+            )
+        print()
+
+    print("  ping in + pong out")
+    for name, codec in codecs.items():
+        us = _time(lambda: (codec.decode_frame(ping), codec.dumps({"response_type": "pong"})), args.iterations * 5)
+        print(f"  {name:8s}  {us:6.2f} us")
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    import logging
+    logging.disable(getattr(logging, logging_level))
+    main()
@@ -0,0 +1,198 @@
+# backend/benchmarks/bench_db_event_loop.py
+"""LLM WebSocket turn latency while /api/calls is under load.
+
+Runs the app in-process under uvicorn with a fake Supabase client whose
+execute() blocks for --db-latency-ms (like a real network round trip) and a
+stub LLM. Ping round trips (pure event-loop responsiveness) and
+response_required turn latency are measured idle and with --concurrency
+GET /api/calls requests in flight, once with the thread-pool data layer and
+once with the old inline execute() behaviour. Turns still wait for their own
+DB lookups, so they also queue for a pool worker unless --db-workers covers
+the load.
+
+    cd backend
+    python -m benchmarks.bench_db_event_loop --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+for _key in ("OPENAI_API_KEY", "RETELL_API_KEY", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+
+import httpx
+import uvicorn
+import websockets
+
+from app.database import db
+from app.main import app
+from app.services.openai_service import openai_service
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST query builder with a blocking execute()"""
+
+    def __init__(self, table: str, latency: float):
+        self.table = table
+        self.latency = latency
+        self.filtered = False
+
+    def eq(self, *args, **kwargs):
+        self.filtered = True
+        return self
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.latency)
+        if not self.filtered:
+            return _Result([])
+        if self.table == "calls":
+            return _Result([{"id": "call-1", "agent_id": "agent-1"}])
+        return _Result([{"id": "agent-1", "system_prompt": "Hi {driver_name}, load {load_number}."}])
+
+
+class FakeClient:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(name, self.latency)
+
+
+async def _stub_llm(**kwargs) -> str:
+    return "Thanks, what's your current location?"
+
+
+async def _stub_llm_stream(**kwargs):
+    yield "Thanks, what's your current location?"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _measure_turns(ws_url: str, turns: int) -> dict:
+    latencies = {"ping": [], "turn": []}
+    async with websockets.connect(ws_url) as ws:
+        await ws.recv()  # config frame sent on connect
+        for i in range(turns):
+            started = time.perf_counter()
+            await ws.send(json.dumps({"interaction_type": "ping"}))
+            await ws.recv()
+            latencies["ping"].append((time.perf_counter() - started) * 1000)
+
+            frame = {
+                "interaction_type": "response_required",
+                "response_id": i,
+                "conversation": [{"role": "user", "content": "I'm on I-40 near Amarillo"}],
+                "call": {"metadata": {"call_id": "call-1", "driver_name": "Sam", "load_number": "LD-1"}},
+            }
+            started = time.perf_counter()
+            await ws.send(json.dumps(frame))
+            while True:
+                response = json.loads(await ws.recv())
+                if response.get("response_type") != "response" or response.get("content_complete"):
+                    break
+            latencies["turn"].append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def _load(base_url: str, concurrency: int, stop: asyncio.Event) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        async def worker():
+            while not stop.is_set():
+                await client.get("/api/calls/")
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _scenario(port: int, concurrency: int, turns: int) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    ws_url = f"ws://127.0.0.1:{port}/llm-websocket"
+
+    idle = await _measure_turns(ws_url, turns)
+
+    stop = asyncio.Event()
+    load_task = asyncio.create_task(_load(base_url, concurrency, stop))
+    await asyncio.sleep(0.2)
+    loaded = await _measure_turns(ws_url, turns)
+    stop.set()
+    await load_task
+
+    return {"idle": idle, "loaded": loaded}
+
+
+def _fmt(samples: list) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"p50={statistics.median(ordered):8.1f}ms  p95={p95:8.1f}ms  max={ordered[-1]:8.1f}ms"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--db-latency-ms", type=float, default=20.0)
+    parser.add_argument("--db-workers", type=int, default=None, help="override settings.db_max_workers")
+    args = parser.parse_args()
+
+    if args.db_workers:
+        db._executor = ThreadPoolExecutor(max_workers=args.db_workers, thread_name_prefix="supabase")
+    db.client = FakeClient(args.db_latency_ms / 1000)
+    openai_service.generate_call_response = _stub_llm
+    openai_service.stream_call_response = _stub_llm_stream
+
+    # The server gets its own thread and event loop so the load generator does not share it
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    thread_pool_execute = db._execute
+
+    async def inline_execute(method, query):
+        return query.execute()
+
+    results = {}
+    try:
+        db._execute = inline_execute
+        results["inline execute()"] = await _scenario(port, args.concurrency, args.turns)
+        db._execute = thread_pool_execute
+        results["thread pool"] = await _scenario(port, args.concurrency, args.turns)
+    finally:
+        server.should_exit = True
+        server_thread.join()
+
+    print(
+        f"LLM WebSocket latency, {args.concurrency} concurrent /api/calls, "
+        f"DB latency {args.db_latency_ms:.0f}ms, {db._executor._max_workers} DB workers"
+    )
+    for mode, phases in results.items():
+        for phase in ("idle", "loaded"):
+            for kind in ("ping", "turn"):
+                print(f"  {mode:17s} {phase:6s} {kind:4s} {_fmt(phases[phase][kind])}")
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    logging.disable(getattr(logging, logging_level))
+    asyncio.run(main())
@@ -0,0 +1,358 @@
+# backend/benchmarks/bench_end_to_end.py
+"""End-to-end latency and throughput against local Retell, OpenAI and Supabase stand-ins.
+
+Runs the app under uvicorn with its lifespan (Retell client, webhook queue
+workers) next to the servers in benchmarks/fakes, with a SQLite-backed
+fake Supabase client as db.client and all local state in a temporary
+directory. No network access or credentials are needed, and a run is
+reproducible from --seed (up to scheduling noise). Phases:
+
+  trigger     --calls POST /api/calls/trigger at --concurrency. Each call is
+              then played by the fake Retell: call_started, --turns LLM
+              WebSocket turns, call_ended with the transcript, call_analyzed
+  webhooks    --webhooks call_analyzed events posted at --concurrency:
+              acknowledgement latency, intake rate, and the rate at which
+              the queue workers process them
+  extraction  --extractions call_ended events carrying fixture transcripts
+              (made unique per call, so the result cache does not answer):
+              webhook-to-summary latency, read from summary_ready events on
+              GET /api/calls/events, and summaries per second
+
+Latencies are reported as p50/p95/p99. OpenAI latency is --llm-first-token-ms
+plus --llm-token-ms per token; Supabase round trips take --db-latency-ms.
+
+    cd backend
+    python -m benchmarks.bench_end_to_end --calls 100 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.fakes import BackgroundServer, FakeOpenAI, FakeRetell, FakeSupabase, free_port
+
+APP_PORT, RETELL_PORT, OPENAI_PORT = free_port(), free_port(), free_port()
+STATE_DIR = tempfile.mkdtemp(prefix="bench_end_to_end_")
+
+for _key in ("OPENAI_API_KEY", "RETELL_API_KEY", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.update({
+    "LOCAL_STATE_DIR": STATE_DIR,
+    "RETELL_BASE_URL": f"http://127.0.0.1:{RETELL_PORT}",
+    "RETELL_HTTP2": "false",
+    "OPENAI_BASE_URL": f"http://127.0.0.1:{OPENAI_PORT}/v1",
+    "WEBHOOK_BASE_URL": f"http://127.0.0.1:{APP_PORT}"
+})
+
+import httpx
+
+from app.config import settings
+from app.database import db
+from app.main import app
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "extraction_transcripts.json")
+AGENTS = [
+    {
+        "name": "Dispatch check call",
+        "scenario_type": "dispatch",
+        "system_prompt": "You are a dispatcher checking in with {driver_name} about load {load_number}. "
+                         "Ask for their location, ETA and any delays.",
+        "voice_settings": {"voice": "female"}
+    },
+    {
+        "name": "Emergency follow-up",
+        "scenario_type": "emergency",
+        "system_prompt": "You are a dispatcher helping {driver_name} with an emergency on load {load_number}. "
+                         "Get the emergency type and exact location.",
+        "voice_settings": {"voice": "male"}
+    }
+]
+
+
+def _percentiles(samples: list) -> str:
+    if not samples:
+        return "no samples"
+    if len(samples) == 1:
+        return f"p50={samples[0]:8.1f}ms  (1 sample)"
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return f"p50={cuts[49]:8.1f}ms  p95={cuts[94]:8.1f}ms  p99={cuts[98]:8.1f}ms  n={len(samples)}"
+
+
+async def _gather_limited(concurrency: int, coros: list) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+async def _timed(fn) -> float:
+    started = time.perf_counter()
+    response = await fn()
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def _wait_for_queue(client: httpx.AsyncClient, timeout: float) -> float:
+    """Poll /stats until the webhook queue is empty; returns when that was seen"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = (await client.get("/stats")).json()["webhook_queue"]
+        if not stats.get("pending") and not stats.get("processing"):
+            return time.perf_counter()
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"webhook queue not drained after {timeout:.0f}s: {stats}")
+
+
+class SummaryWatcher:
+    """Records when each call's summary_ready event arrives on GET /api/calls/events"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.ready_at = {}
+        self._task = None
+        self._connected = asyncio.Event()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+        await asyncio.wait_for(self._connected.wait(), timeout=10.0)
+
+    async def _listen(self) -> None:
+        async with self.client.stream("GET", "/api/calls/events", timeout=None) as response:
+            self._connected.set()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = json.loads(line[len("data: "):])
+                if (data.get("changes") or {}).get("summary_ready"):
+                    self.ready_at[data["call_id"]] = time.perf_counter()
+
+    async def wait_for(self, call_ids: set, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while not call_ids <= self.ready_at.keys():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{len(call_ids - self.ready_at.keys())} summaries missing after {timeout:.0f}s")
+            await asyncio.sleep(0.02)
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, httpx.HTTPError):
+            pass
+
+
+def _seed_calls(client: FakeSupabase, agents: list, count: int, prefix: str, rng: random.Random) -> list:
+    """Call rows in progress, as if placed earlier, for the webhook-only phases"""
+    return client.table("calls").insert([
+        {
+            "agent_id": rng.choice(agents)["id"],
+            "driver_name": rng.choice(["Sam Ortiz", "Dana Lee", "Chris Park"]),
+            "driver_phone": f"+1555{i:07d}",
+            "load_number": f"{prefix}-{i}",
+            "status": "in_progress",
+            "retell_call_id": f"{prefix}_{i}"
+        }
+        for i in range(count)
+    ]).execute().data
+
+
+async def _trigger_phase(client: httpx.AsyncClient, retell: FakeRetell, agents: list, args, rng) -> dict:
+    bodies = [
+        {
+            "agent_id": agents[0 if rng.random() >= 0.2 else 1]["id"],
+            "driver_name": rng.choice(["Sam Ortiz", "Dana Lee", "Chris Park"]),
+            "driver_phone": f"+1666{i:07d}",
+            "load_number": f"LD-{7000 + i}"
+        }
+        for i in range(args.calls)
+    ]
+    started = time.perf_counter()
+    latencies = await _gather_limited(args.concurrency, [
+        _timed(lambda body=body: client.post("/api/calls/trigger", json=body)) for body in bodies
+    ])
+
+    # Fake Retell calls run on their own loop; wait for the last call_analyzed, then the workers
+    deadline = time.monotonic() + args.timeout
+    while retell.finished_calls < args.calls:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{args.calls - retell.finished_calls} simulated calls still running")
+        await asyncio.sleep(0.05)
+    drained_at = await _wait_for_queue(client, args.timeout)
+    return {"trigger": latencies, "elapsed": drained_at - started}
+
+
+async def _webhook_phase(client: httpx.AsyncClient, calls: list, args) -> dict:
+    payloads = [
+        {
+            "event": "call_analyzed",
+            "call": {
+                "call_id": f"bench_webhook_{i}",
+                "metadata": {"call_id": calls[i % len(calls)]["id"]},
+                "call_analysis": {"call_summary": "Status update", "call_successful": True}
+            }
+        }
+        for i in range(args.webhooks)
+    ]
+    started = time.perf_counter()
+    latencies = await _gather_limited(args.concurrency, [
+        _timed(lambda payload=payload: client.post("/webhook/retell", json=payload)) for payload in payloads
+    ])
+    acked_at = time.perf_counter()
+    drained_at = await _wait_for_queue(client, args.timeout)
+    return {
+        "ack": latencies,
+        "intake_per_s": args.webhooks / (acked_at - started),
+        "processed_per_s": args.webhooks / (drained_at - started)
+    }
+
+
+async def _extraction_phase(client: httpx.AsyncClient, watcher: SummaryWatcher, calls: list, args) -> dict:
+    with open(FIXTURES) as f:
+        transcripts = [fixture["transcript"] for fixture in json.load(f)]
+    sent_at = {}
+
+    async def post(i: int, call: dict):
+        payload = {
+            "event": "call_ended",
+            "call": {
+                "call_id": f"bench_extraction_{i}",
+                "metadata": {"call_id": call["id"]},
+                "disconnection_reason": "user_hangup",
+                "end_timestamp": int(time.time() * 1000),
+                # A distinct opening line per call keeps the extraction cache out of the measurement
+                "transcript": f"Agent: Check call {i} for load {call['load_number']}.\n"
+                              + transcripts[i % len(transcripts)]
+            }
+        }
+        sent_at[call["id"]] = time.perf_counter()
+        response = await client.post("/webhook/retell", json=payload)
+        response.raise_for_status()
+
+    before = (await client.get("/stats")).json()["extraction"]
+    started = time.perf_counter()
+    await _gather_limited(args.concurrency, [post(i, call) for i, call in enumerate(calls)])
+    await watcher.wait_for(set(sent_at), args.timeout)
+    after = (await client.get("/stats")).json()["extraction"]
+
+    finished = max(watcher.ready_at[call_id] for call_id in sent_at)
+    return {
+        "latency": [(watcher.ready_at[call_id] - sent) * 1000 for call_id, sent in sent_at.items()],
+        "per_s": len(calls) / (finished - started),
+        "sources": {source: after[source] - before[source] for source in ("rules", "cache", "llm")}
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--webhooks", type=int, default=500)
+    parser.add_argument("--extractions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--phases", default="trigger,webhooks,extraction")
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=15.0)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--turn-gap-ms", type=float, default=200.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    phases = [phase.strip() for phase in args.phases.split(",") if phase.strip()]
+    rng = random.Random(args.seed)
+
+    fake_db = FakeSupabase(os.path.join(STATE_DIR, "supabase.db"), latency=args.db_latency_ms / 1000)
+    db.client = fake_db
+    openai = FakeOpenAI(first_token_ms=args.llm_first_token_ms, token_ms=args.llm_token_ms, seed=args.seed)
+    retell = FakeRetell(
+        webhook_url=f"http://127.0.0.1:{APP_PORT}/webhook/retell",
+        turns=args.turns,
+        turn_gap_ms=args.turn_gap_ms,
+        # Enough caller IDs that every trigger can be in flight at once
+        phone_numbers=args.calls // settings.caller_id_max_concurrent_calls + 1,
+        seed=args.seed
+    )
+
+    servers = [
+        BackgroundServer(openai.app, OPENAI_PORT).start(),
+        BackgroundServer(retell.app, RETELL_PORT).start(),
+        BackgroundServer(app, APP_PORT).start()
+    ]
+    results = {}
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{APP_PORT}",
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=args.concurrency + 4)
+        ) as client:
+            agents = []
+            for agent in AGENTS:
+                response = await client.post("/api/agents/", json=agent)
+                response.raise_for_status()
+                agents.append(response.json())
+
+            watcher = SummaryWatcher(client)
+            await watcher.start()
+            try:
+                if "trigger" in phases:
+                    results["trigger"] = await _trigger_phase(client, retell, agents, args, rng)
+                if "webhooks" in phases:
+                    calls = _seed_calls(fake_db, agents, min(args.webhooks, 200), "bench_webhook", rng)
+                    results["webhooks"] = await _webhook_phase(client, calls, args)
+                if "extraction" in phases:
+                    calls = _seed_calls(fake_db, agents, args.extractions, "bench_extraction", rng)
+                    results["extraction"] = await _extraction_phase(client, watcher, calls, args)
+            finally:
+                await watcher.stop()
+            stats = (await client.get("/stats")).json()
+    finally:
+        for server in reversed(servers):
+            server.stop()
+        fake_db.close()
+        shutil.rmtree(STATE_DIR, ignore_errors=True)
+
+    print(
+        f"End to end: LLM first token {args.llm_first_token_ms:.0f}ms + {args.llm_token_ms:.0f}ms/token, "
+        f"DB round trip {args.db_latency_ms:.0f}ms, concurrency {args.concurrency}, seed {args.seed}"
+    )
+    if "trigger" in results:
+        trigger = results["trigger"]
+        print(f"\n  {args.calls} calls x {args.turns} turns ({trigger['elapsed']:.1f}s until all webhooks processed)")
+        print(f"    POST /api/calls/trigger   {_percentiles(trigger['trigger'])}")
+        print(f"    turn, first chunk         {_percentiles(retell.turn_latencies['first_chunk'])}")
+        print(f"    turn, content_complete    {_percentiles(retell.turn_latencies['complete'])}")
+        print(f"    webhook ack (Retell side) {_percentiles(retell.webhook_latencies)}")
+    if "webhooks" in results:
+        webhooks = results["webhooks"]
+        print(f"\n  {args.webhooks} call_analyzed webhooks")
+        print(f"    ack                       {_percentiles(webhooks['ack'])}")
+        print(f"    intake                    {webhooks['intake_per_s']:8.1f}/s")
+        print(f"    processed                 {webhooks['processed_per_s']:8.1f}/s")
+    if "extraction" in results:
+        extraction = results["extraction"]
+        sources = ", ".join(f"{source} {count}" for source, count in extraction["sources"].items())
+        print(f"\n  {args.extractions} call_ended webhooks with transcripts ({sources})")
+        print(f"    webhook -> summary_ready  {_percentiles(extraction['latency'])}")
+        print(f"    throughput                {extraction['per_s']:8.1f} summaries/s")
+
+    print(
+        f"\n  Fake OpenAI requests: {openai.requests}; fake Supabase queries: {fake_db.queries}; "
+        f"dead-lettered webhooks: {stats['webhook_queue'].get('dead', 0)}"
+    )
+    if retell.errors:
+        print(f"  Simulated call errors ({len(retell.errors)}): {retell.errors[:3]}")
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    logging.disable(getattr(logging, logging_level))
+    asyncio.run(main())
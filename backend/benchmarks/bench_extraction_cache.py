@@ -0,0 +1,109 @@
+# backend/benchmarks/bench_extraction_cache.py
+"""Extraction result cache: miss vs disk hit vs memory hit.
+
+Pushes --transcripts distinct transcripts through
+OpenAIService.extract_call_summary with the rule fast path off and a stub
+LLM that answers after --llm-latency-ms. The first pass fills the cache.
+The second pass is served from memory. A third pass starts a new cache on
+the same SQLite file, as a restarted worker would, and is served from
+disk. Retell-style retries are simulated by firing --duplicates concurrent
+requests per transcript into an empty cache, which should cost one LLM call
+each.
+
+    cd backend
+    python -m benchmarks.bench_extraction_cache --transcripts 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+for _key in ("OPENAI_API_KEY", "RETELL_API_KEY", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+
+from app.config import settings
+from app.services import openai_service as openai_module
+from app.services.extraction_cache import ExtractionCache
+from app.services.openai_service import openai_service
+
+
+def _transcript(i: int) -> str:
+    return (
+        f"Agent: Hi, this is Dispatch with a check call on load {i}. How is it going?\n"
+        f"User: Hmm, hard to say, somewhere past the big outlet mall, maybe a while yet, call {i}."
+    )
+
+
+async def _pass(transcripts: list) -> list:
+    latencies = []
+    for transcript in transcripts:
+        started = time.perf_counter()
+        await openai_service.extract_call_summary(transcript, "dispatch")
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+
+def _fmt(samples: list) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"p50={statistics.median(ordered):10.1f}us  p95={p95:10.1f}us"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transcripts", type=int, default=200)
+    parser.add_argument("--duplicates", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    llm_calls = 0
+
+    async def stub_create(**kwargs):
+        nonlocal llm_calls
+        llm_calls += 1
+        await asyncio.sleep(args.llm_latency_ms / 1000)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"call_outcome": "No Update"}'))],
+            usage=SimpleNamespace(prompt_tokens=180, completion_tokens=20)
+        )
+
+    openai_service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=stub_create)))
+    settings.fast_extraction_enabled = False
+    transcripts = [_transcript(i) for i in range(args.transcripts)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extraction_cache.db")
+        openai_module.extraction_cache = ExtractionCache(path)
+        miss = await _pass(transcripts)
+        memory = await _pass(transcripts)
+
+        openai_module.extraction_cache = ExtractionCache(path)
+        disk = await _pass(transcripts)
+
+        openai_module.extraction_cache = ExtractionCache(os.path.join(tmp, "retries.db"))
+        before = llm_calls
+        await asyncio.gather(*(
+            openai_service.extract_call_summary(transcript, "dispatch")
+            for transcript in transcripts for _ in range(args.duplicates)
+        ))
+        retry_calls = llm_calls - before
+
+    print(f"extract_call_summary over {args.transcripts} transcripts, stub LLM at {args.llm_latency_ms:.0f}ms")
+    print(f"  miss         {_fmt(miss)}")
+    print(f"  disk hit     {_fmt(disk)}")
+    print(f"  memory hit   {_fmt(memory)}")
+    print(
+        f"  {args.duplicates} concurrent duplicates per transcript: "
+        f"{retry_calls} LLM calls for {args.transcripts * args.duplicates} requests"
+    )
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    import logging
+    logging.disable(getattr(logging, logging_level))
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+# backend/benchmarks/bench_fast_extraction.py
+"""Rule-based fast-path extraction vs GPT-4 on labelled transcripts.
+
+Scores the rule extractor against benchmarks/fixtures/extraction_transcripts.json
+at a range of confidence thresholds: how many transcripts it takes off the
+LLM, and how accurate it is on the ones it keeps. Then runs the real
+OpenAIService.extract_call_summary over the fixture set twice - fast path on
+and off - with a stub LLM that answers with the labels after
+--llm-latency-ms, so end-to-end latency and LLM calls can be compared. The
+stub is an oracle, so the combined accuracy is an upper bound on what the
+real model would reach.
+
+    cd backend
+    python -m benchmarks.bench_fast_extraction --llm-latency-ms 1500
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from types import SimpleNamespace
+
+for _key in ("OPENAI_API_KEY", "RETELL_API_KEY", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+
+from app.config import settings
+from app.services.openai_service import openai_service
+from app.services.prompt_builder import estimate_tokens
+from app.services.rule_extractor import rule_extractor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "extraction_transcripts.json")
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95)
+
+
+def _normalise(value) -> str:
+    text = str(value).lower()
+    text = re.sub(r"^(?:the|about|around|roughly)\s+", "", text)
+    return re.sub(r"[^a-z0-9:]", "", text)
+
+
+def _field_hits(actual: dict, expected: dict) -> tuple:
+    hits = sum(_normalise(actual.get(field)) == _normalise(value) for field, value in expected.items())
+    return hits, len(expected)
+
+
+def _rule_results(fixtures: list, repeats: int) -> list:
+    results = []
+    for fixture in fixtures:
+        started = time.perf_counter()
+        for _ in range(repeats):
+            result = rule_extractor.extract(fixture["transcript"], fixture["scenario_type"])
+        elapsed_ms = (time.perf_counter() - started) * 1000 / repeats
+        hits, fields = _field_hits(result["structured_data"], fixture["expected"])
+        results.append({
+            "id": fixture["id"],
+            "confidence": result["confidence_score"],
+            "hits": hits,
+            "fields": fields,
+            "latency_ms": elapsed_ms,
+            "structured_data": result["structured_data"]
+        })
+    return results
+
+
+def _threshold_row(results: list, threshold: float) -> dict:
+    kept = [r for r in results if r["confidence"] >= threshold]
+    hits = sum(r["hits"] for r in kept)
+    fields = sum(r["fields"] for r in kept)
+    return {
+        "threshold": threshold,
+        "fast_path": len(kept),
+        "llm_calls_saved": len(kept) / len(results),
+        "field_accuracy": hits / fields if fields else None,
+        "record_accuracy": sum(r["hits"] == r["fields"] for r in kept) / len(kept) if kept else None
+    }
+
+
+async def _pipeline(fixtures: list, llm_latency: float, fast_path: bool) -> dict:
+    """Run extract_call_summary over the fixtures with an oracle stub LLM"""
+    expected_by_transcript = {f["transcript"]: f["expected"] for f in fixtures}
+    llm_calls = 0
+    llm_tokens = 0
+
+    async def oracle_create(messages, **kwargs):
+        nonlocal llm_calls, llm_tokens
+        prompt = messages[-1]["content"]
+        llm_calls += 1
+        llm_tokens += estimate_tokens(prompt)
+        await asyncio.sleep(llm_latency)
+        transcript = next(t for t in expected_by_transcript if t in prompt)
+        content = json.dumps(expected_by_transcript[transcript])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=estimate_tokens(prompt), completion_tokens=estimate_tokens(content))
+        )
+
+    openai_service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=oracle_create)))
+    settings.fast_extraction_enabled = fast_path
+    # Measure the extractor, not the result cache
+    settings.extraction_cache_enabled = False
+
+    latencies, hits, fields = [], 0, 0
+    for fixture in fixtures:
+        started = time.perf_counter()
+        result = await openai_service.extract_call_summary(fixture["transcript"], fixture["scenario_type"])
+        latencies.append((time.perf_counter() - started) * 1000)
+        fixture_hits, fixture_fields = _field_hits(result["structured_data"], fixture["expected"])
+        hits += fixture_hits
+        fields += fixture_fields
+
+    return {
+        "llm_calls": llm_calls,
+        "llm_prompt_tokens": llm_tokens,
+        "field_accuracy": hits / fields,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": statistics.median(latencies),
+        "total_s": sum(latencies) / 1000
+    }
+
+
+def _pct(value) -> str:
+    return "    -" if value is None else f"{value * 100:5.1f}%"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--repeats", type=int, default=200, help="rule extractor runs per transcript, for timing")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--verbose", action="store_true", help="list per-transcript rule results")
+    args = parser.parse_args()
+
+    with open(args.fixtures) as f:
+        fixtures = json.load(f)
+
+    results = _rule_results(fixtures, args.repeats)
+    latencies = sorted(r["latency_ms"] for r in results)
+    print(f"Rule extractor on {len(fixtures)} labelled transcripts")
+    print(f"  latency  p50={statistics.median(latencies):.3f}ms  max={latencies[-1]:.3f}ms")
+    print(f"  accuracy if used for everything: {_pct(_threshold_row(results, 0.0)['field_accuracy'])} of fields")
+    print()
+    print("  threshold  fast-path  LLM calls saved  field acc  record acc   (on fast-path transcripts)")
+    for threshold in THRESHOLDS:
+        row = _threshold_row(results, threshold)
+        marker = "  <- configured" if threshold == settings.fast_extraction_threshold else ""
+        print(
+            f"  {threshold:9.2f}  {row['fast_path']:9d}  {_pct(row['llm_calls_saved']):>15s}"
+            f"  {_pct(row['field_accuracy']):>9s}  {_pct(row['record_accuracy']):>10s}{marker}"
+        )
+
+    if args.verbose:
+        print()
+        for r in results:
+            print(f"  {r['id']:13s} conf={r['confidence']:.2f} {r['hits']}/{r['fields']} {r['structured_data']}")
+
+    threshold = settings.fast_extraction_threshold
+    llm_only = await _pipeline(fixtures, args.llm_latency_ms / 1000, fast_path=False)
+    settings.fast_extraction_threshold = threshold
+    fast = await _pipeline(fixtures, args.llm_latency_ms / 1000, fast_path=True)
+
+    print()
+    print(f"extract_call_summary, stub LLM at {args.llm_latency_ms:.0f}ms, threshold {threshold}")
+    for label, run in (("LLM only", llm_only), ("fast path", fast)):
+        print(
+            f"  {label:9s}  LLM calls={run['llm_calls']:3d}  prompt tokens={run['llm_prompt_tokens']:6d}"
+            f"  field acc={_pct(run['field_accuracy'])}  mean={run['mean_ms']:7.1f}ms"
+            f"  p50={run['p50_ms']:7.1f}ms  total={run['total_s']:5.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    import logging
+    logging.disable(getattr(logging, logging_level))
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+# backend/benchmarks/bench_http_payloads.py
+"""Bytes on the wire and server CPU for GET /api/calls and GET /api/agents.
+
+Drives the ASGI app directly (no sockets, no client-side decoding), with
+the database layer stubbed to return --calls calls whose transcripts are
+stitched together from benchmarks/fixtures/extraction_transcripts.json, so
+the compressor sees real conversation text. The 34 snippets repeat across
+a page, which flatters gzip and brotli; expect somewhat larger compressed
+bodies on production transcripts. Each endpoint is requested --requests
+times per mode:
+
+  before        no compression middleware, no If-None-Match
+  gzip / br     negotiated compression (br only if the brotli package is installed)
+  304           revalidation with the ETag from the previous response
+
+CPU is process time per request, so it counts the route, serialization
+and compression but not the (stubbed) database round trips.
+
+    cd backend
+    python -m benchmarks.bench_http_payloads --calls 50 --turns 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+for _key in ("OPENAI_API_KEY", "RETELL_API_KEY", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+
+from fastapi import FastAPI
+
+from app.database import db
+from app.middleware import CompressionMiddleware, brotli
+from app.routers import agent, calls
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "extraction_transcripts.json")
+
+
+def _rows(count: int, turns: int) -> tuple:
+    rng = random.Random(7)
+    with open(FIXTURES) as f:
+        snippets = [fixture["transcript"] for fixture in json.load(f)]
+    now = datetime(2025, 1, 1)
+    call_rows = [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "agent_id": "agent-1",
+            "retell_call_id": f"retell_{i:08d}",
+            "driver_name": rng.choice(["Sam Ortiz", "Dana Lee", "Chris Park"]),
+            "driver_phone": f"+1555{i:07d}",
+            "load_number": f"LD-{7000 + i}",
+            "status": "completed",
+            "transcript": "\n".join(rng.choice(snippets) for _ in range(turns)),
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+            "updated_at": (now - timedelta(minutes=i)).isoformat()
+        }
+        for i in range(count)
+    ]
+    agent_rows = [
+        {
+            "id": f"agent-{i}",
+            "name": f"Dispatch agent {i}",
+            "scenario_type": "dispatch",
+            "system_prompt": "You are a dispatcher checking in with {driver_name} about load {load_number}. " * 8,
+            "voice_settings": {"voice_id": "11labs-Adrian", "speed": 1.0},
+            "is_active": True,
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat()
+        }
+        for i in range(12)
+    ]
+    return call_rows, agent_rows
+
+
+def _stub_db(call_rows: list, agent_rows: list) -> None:
+    async def get_calls_version(filters=None):
+        return len(call_rows), call_rows[0]["updated_at"]
+
+    async def get_calls_page(columns, filters=None, before=None, limit=50):
+        return [{key: row[key] for key in columns} for row in call_rows[:limit]]
+
+    async def get_agents_version():
+        return len(agent_rows), agent_rows[0]["updated_at"]
+
+    async def get_all_agents():
+        return agent_rows
+
+    db.get_calls_version = get_calls_version
+    db.get_calls_page = get_calls_page
+    db.get_agents_version = get_agents_version
+    db.get_all_agents = get_all_agents
+
+
+async def _request(app, path: str, headers: dict) -> tuple:
+    """One GET through the ASGI app: (status, header bytes, body bytes, response headers)"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    }
+    sent = {"status": 0, "headers": [], "body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+            sent["headers"] = message["headers"]
+        else:
+            sent["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    header_bytes = sum(len(k) + len(v) + 4 for k, v in sent["headers"]) + len("HTTP/1.1 200 OK\r\n\r\n")
+    response_headers = {k.decode(): v.decode() for k, v in sent["headers"]}
+    return sent["status"], header_bytes, len(sent["body"]), response_headers
+
+
+async def _mode(app, path: str, headers: dict, requests: int) -> dict:
+    status, header_bytes, body_bytes, response_headers = await _request(app, path, headers)
+    started = time.process_time()
+    for _ in range(requests):
+        await _request(app, path, headers)
+    cpu_us = (time.process_time() - started) * 1e6 / requests
+    return {
+        "status": status,
+        "wire_bytes": header_bytes + body_bytes,
+        "body_bytes": body_bytes,
+        "cpu_us": cpu_us,
+        "etag": response_headers.get("etag"),
+        "encoding": response_headers.get("content-encoding", "identity")
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50, help="calls per page")
+    parser.add_argument("--turns", type=int, default=12, help="fixture snippets per transcript")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    _stub_db(*_rows(args.calls, args.turns))
+    plain = FastAPI()
+    plain.include_router(agent.router, prefix="/api")
+    plain.include_router(calls.router, prefix="/api")
+    compressed = CompressionMiddleware(plain)
+
+    for label, path in (("GET /api/calls", f"/api/calls/?limit={args.calls}"), ("GET /api/agents", "/api/agents/")):
+        runs = [("before", await _mode(plain, path, {}, args.requests))]
+        runs.append(("gzip", await _mode(compressed, path, {"Accept-Encoding": "gzip"}, args.requests)))
+        if brotli:
+            runs.append(("br", await _mode(compressed, path, {"Accept-Encoding": "br, gzip"}, args.requests)))
+        etag = runs[-1][1]["etag"]
+        runs.append(("304", await _mode(
+            compressed, path, {"Accept-Encoding": "br, gzip", "If-None-Match": etag}, args.requests
+        )))
+
+        baseline = runs[0][1]
+        print(f"{label} ({args.requests} requests per mode)")
+        print("  mode      status  encoding   wire bytes   vs before   cpu/request")
+        for mode, run in runs:
+            print(
+                f"  {mode:8s}  {run['status']:6d}  {run['encoding']:8s}  {run['wire_bytes']:11d}"
+                f"  {run['wire_bytes'] / baseline['wire_bytes'] * 100:9.1f}%  {run['cpu_us']:9.0f}us"
+            )
+        if not brotli:
+            print("  (br skipped: brotli package not installed)")
+        print()
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    import logging
+    logging.disable(getattr(logging, logging_level))
+    asyncio.run(main())
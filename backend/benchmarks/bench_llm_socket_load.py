@@ -0,0 +1,379 @@
+# backend/benchmarks/bench_llm_socket_load.py
+"""How many concurrent LLM WebSocket sessions one backend worker holds.
+
+Starts the app in a child process (one uvicorn worker, the SQLite-backed
+fake Supabase from benchmarks/fakes with --db-latency-ms round trips, and
+a stub LLM that streams a reply after --llm-first-token-ms plus
+--llm-token-ms per word), then for each level in --sessions opens that many
+/llm-websocket/<call_id> sessions from this process. Each session replays
+a Retell-like frame sequence:
+
+  connect, config frame, call_details
+  per turn: update_only frames while the driver talks, then
+            response_required (or reminder_required, --reminder-rate),
+            read until content_complete, a ping, then a pause while the
+            agent's reply is spoken (--turn-interval-ms, +-30% jitter)
+
+Reported per level: turn latency p50/p95/p99 to the first response frame
+and to content_complete, reminder and ping round trips, the worker's event-loop lag
+(overshoot of a 10 ms sleep, sampled inside the server) and RSS growth
+per connected session. RSS is measured with every session connected,
+against the idle worker before the first level; CPython keeps freed
+memory, so treat it as an upper bound. Latency "degrades" at the first
+level whose p95 first-chunk latency exceeds --degrade-factor times that of
+the first level, or that has failed turns.
+
+    cd backend
+    python -m benchmarks.bench_llm_socket_load --sessions 25,50,100,200 --turns 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+for _key in ("OPENAI_API_KEY", "RETELL_API_KEY", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+
+import httpx
+import websockets
+
+from benchmarks.fakes import free_port
+
+DRIVER_LINES = [
+    "Yeah, I'm driving, just passed the Love's on I-40 near Amarillo.",
+    "Should be at the receiver around 3 PM if traffic holds up.",
+    "Traffic was slow through Oklahoma City but it's clear now.",
+    "No issues with the load, everything's secured and the seals are intact.",
+    "I'll need to stop for fuel in about an hour, then straight through.",
+    "Sounds good, I'll call dispatch if anything changes."
+]
+STUB_REPLY = "Thanks for the update. What's your current location and ETA to the receiver? Any delays on the way?"
+
+
+def _call_id(i: int) -> str:
+    return f"00000000-0000-4000-8000-{i:012d}"
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, in KB on Linux
+
+
+def _serve(args) -> None:
+    """Child process: the app with a fake database and a stub LLM"""
+    os.environ["LOCAL_STATE_DIR"] = tempfile.mkdtemp(prefix="bench_llm_socket_load_")
+
+    import uvicorn
+
+    from app.database import db
+    from app.main import app
+    from app.services.openai_service import openai_service
+    from benchmarks.fakes import FakeSupabase
+
+    client = FakeSupabase(latency=args.db_latency_ms / 1000)
+    agent = client.table("agents").insert({
+        "name": "Dispatch check call",
+        "scenario_type": "dispatch",
+        "system_prompt": "You are a dispatcher checking in with {driver_name} about load {load_number}."
+    }).execute().data[0]
+    client.table("calls").insert([
+        {
+            "id": _call_id(i),
+            "agent_id": agent["id"],
+            "retell_call_id": f"load_{i}",
+            "driver_name": "Sam Ortiz",
+            "driver_phone": f"+1555{i:07d}",
+            "load_number": f"LD-{7000 + i}",
+            "status": "in_progress"
+        }
+        for i in range(args.max_sessions)
+    ]).execute()
+    db.client = client
+
+    rng = random.Random(args.seed)
+
+    def delay(ms: float) -> float:
+        return ms * rng.uniform(0.8, 1.2) / 1000
+
+    async def stub_stream(**kwargs):
+        await asyncio.sleep(delay(args.llm_first_token_ms))
+        for i, sentence in enumerate(STUB_REPLY.split("? ")):
+            words = len(sentence.split())
+            if i:
+                await asyncio.sleep(delay(args.llm_token_ms * words))
+            yield sentence
+
+    openai_service.stream_call_response = stub_stream
+
+    lag_samples = []
+
+    async def lag_monitor():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag_samples.append((time.perf_counter() - started - 0.01) * 1000)
+
+    monitor = []
+
+    @app.get("/_bench/probe")
+    async def probe():
+        """RSS and event-loop lag since the previous probe"""
+        if not monitor:
+            monitor.append(asyncio.create_task(lag_monitor()))
+        samples = sorted(lag_samples)
+        lag_samples.clear()
+        return {
+            "rss_kb": _rss_kb(),
+            "lag_p99_ms": samples[int(len(samples) * 0.99) - 1] if len(samples) >= 100 else (samples[-1] if samples else 0.0),
+            "lag_max_ms": samples[-1] if samples else 0.0
+        }
+
+    # No lifespan: the Retell client and webhook workers play no part in a socket session
+    uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning", lifespan="off")).run()
+
+
+class Session:
+    """One simulated call on the LLM WebSocket"""
+
+    def __init__(self, index: int, url: str, args, rng: random.Random, results: dict):
+        self.index = index
+        self.url = url
+        self.args = args
+        self.rng = rng
+        self.results = results
+        self.conversation = []
+        self.response_id = 0
+
+    async def _reply(self, ws, response_type: str) -> tuple:
+        """(ms to first frame, ms to completion) for the current response_id"""
+        started = time.perf_counter()
+        first = None
+        while True:
+            frame = json.loads(await asyncio.wait_for(ws.recv(), timeout=self.args.timeout))
+            if frame.get("response_id") != self.response_id:
+                continue
+            if frame.get("response_type") == "error":
+                raise RuntimeError(frame.get("error"))
+            if frame.get("response_type") != response_type:
+                continue
+            if first is None:
+                first = time.perf_counter()
+            if response_type != "response" or frame.get("content_complete"):
+                now = time.perf_counter()
+                return (first - started) * 1000, (now - started) * 1000
+
+    async def run(self, connected: asyncio.Event, go: asyncio.Event) -> None:
+        args = self.args
+        try:
+            async with websockets.connect(f"{self.url}/load_{self.index}", open_timeout=args.timeout) as ws:
+                await asyncio.wait_for(ws.recv(), timeout=args.timeout)  # config frame
+                await ws.send(json.dumps({
+                    "interaction_type": "call_details",
+                    "call": {"call_id": f"load_{self.index}", "metadata": {"call_id": _call_id(self.index)}}
+                }))
+                self.results["connected"] += 1
+                if self.results["connected"] == self.results["sessions"]:
+                    connected.set()
+                await go.wait()
+
+                for turn in range(args.turns):
+                    line = DRIVER_LINES[(self.index + turn) % len(DRIVER_LINES)]
+                    words = line.split()
+                    # Partial transcripts while the driver is still talking
+                    for update in range(1, args.updates_per_turn + 1):
+                        await asyncio.sleep(self.rng.uniform(0.1, 0.3))
+                        partial = " ".join(words[:len(words) * update // (args.updates_per_turn + 1)])
+                        await ws.send(json.dumps({
+                            "interaction_type": "update_only",
+                            "conversation": self.conversation + [{"role": "user", "content": partial}],
+                            "turntaking": "user_turn"
+                        }))
+                    self.conversation.append({"role": "user", "content": line})
+                    self.response_id += 1
+
+                    if self.rng.random() < args.reminder_rate:
+                        await ws.send(json.dumps({
+                            "interaction_type": "reminder_required",
+                            "response_id": self.response_id,
+                            "conversation": self.conversation
+                        }))
+                        _, total = await self._reply(ws, "reminder_required")
+                        self.results["reminder"].append(total)
+                    else:
+                        await ws.send(json.dumps({
+                            "interaction_type": "response_required",
+                            "response_id": self.response_id,
+                            "conversation": self.conversation
+                        }))
+                        first, total = await self._reply(ws, "response")
+                        self.results["first_chunk"].append(first)
+                        self.results["complete"].append(total)
+                        self.conversation.append({"role": "agent", "content": STUB_REPLY})
+
+                    started = time.perf_counter()
+                    await ws.send(json.dumps({"interaction_type": "ping"}))
+                    while json.loads(await asyncio.wait_for(ws.recv(), timeout=args.timeout)).get("response_type") != "pong":
+                        pass
+                    self.results["ping"].append((time.perf_counter() - started) * 1000)
+
+                    # The agent's reply is being spoken
+                    await asyncio.sleep(args.turn_interval_ms / 1000 * self.rng.uniform(0.7, 1.3))
+        except Exception as e:
+            self.results["errors"].append(f"session {self.index}: {e!r}")
+        finally:
+            if not connected.is_set() and self.results["connected"] + len(self.results["errors"]) >= self.results["sessions"]:
+                connected.set()
+
+
+def _percentiles(samples: list) -> tuple:
+    if len(samples) < 2:
+        return tuple([samples[0] if samples else float("nan")] * 3)
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def _p99_cell(samples: list, width: int) -> str:
+    """p99 in ms, or "-" when the level produced no samples of that kind"""
+    return f"{_percentiles(samples)[2]:{width}.1f}" if samples else f"{'-':>{width}}"
+
+
+async def _level(client: httpx.AsyncClient, url: str, sessions: int, args, idle_rss_kb: int) -> dict:
+    results = {"sessions": sessions, "connected": 0, "first_chunk": [], "complete": [], "reminder": [], "ping": [], "errors": []}
+    connected, go = asyncio.Event(), asyncio.Event()
+    rng = random.Random(args.seed + sessions)
+    runners = []
+    for i in range(sessions):
+        runners.append(asyncio.create_task(Session(i, url, args, random.Random(rng.random()), results).run(connected, go)))
+        # Spread the connects over --ramp-ms
+        await asyncio.sleep(args.ramp_ms / 1000 / sessions)
+
+    await asyncio.wait_for(connected.wait(), timeout=args.timeout)
+    await client.get("/_bench/probe")  # discard lag from the connect storm
+    rss_kb = (await client.get("/_bench/probe")).json()["rss_kb"]
+    go.set()
+    await asyncio.gather(*runners)
+    probe = (await client.get("/_bench/probe")).json()
+
+    return {
+        **results,
+        "rss_mb": rss_kb / 1024,
+        "kb_per_session": (rss_kb - idle_rss_kb) / max(results["connected"], 1),
+        "lag_p99_ms": probe["lag_p99_ms"],
+        "lag_max_ms": probe["lag_max_ms"]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="25,50,100,200", help="comma-separated concurrency levels")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--updates-per-turn", type=int, default=2)
+    parser.add_argument("--reminder-rate", type=float, default=0.1)
+    parser.add_argument("--turn-interval-ms", type=float, default=2000.0)
+    parser.add_argument("--ramp-ms", type=float, default=1000.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=15.0)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--degrade-factor", type=float, default=1.5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--max-sessions", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.sessions.split(",")]
+
+    if args.serve:
+        _serve(args)
+    else:
+        asyncio.run(_drive(args, levels))
+
+
+async def _drive(args, levels: list) -> None:
+    port = free_port()
+    child_args = [
+        sys.executable, "-m", "benchmarks.bench_llm_socket_load", "--serve",
+        "--port", str(port), "--max-sessions", str(max(levels)), "--seed", str(args.seed),
+        "--llm-first-token-ms", str(args.llm_first_token_ms), "--llm-token-ms", str(args.llm_token_ms),
+        "--db-latency-ms", str(args.db_latency_ms)
+    ]
+    server = subprocess.Popen(child_args, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    base_url = f"http://127.0.0.1:{port}"
+    rows = []
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("benchmark server failed to start")
+                    await asyncio.sleep(0.1)
+
+            await client.get("/_bench/probe")
+            await asyncio.sleep(0.5)
+            idle_rss_kb = (await client.get("/_bench/probe")).json()["rss_kb"]
+            for sessions in levels:
+                rows.append(await _level(client, f"ws://127.0.0.1:{port}/llm-websocket", sessions, args, idle_rss_kb))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print(
+        f"LLM WebSocket load: {args.turns} turns/session, turn every ~{args.turn_interval_ms:.0f}ms, "
+        f"stub LLM {args.llm_first_token_ms:.0f}ms + {args.llm_token_ms:.0f}ms/word, DB {args.db_latency_ms:.0f}ms; "
+        f"idle worker RSS {idle_rss_kb / 1024:.0f} MB"
+    )
+    print()
+    print(
+        "  sessions   first chunk p50/p95/p99 ms      complete p99   reminder p99   ping p99"
+        "   loop lag p99/max ms   RSS MB   KB/session   errors"
+    )
+    baseline = None
+    degraded_at = None
+    for row in rows:
+        first = _percentiles(row["first_chunk"])
+        baseline = baseline or first[1]
+        if degraded_at is None and (row["errors"] or first[1] > baseline * args.degrade_factor):
+            degraded_at = row
+        print(
+            f"  {row['sessions']:8d}   {first[0]:8.1f} {first[1]:8.1f} {first[2]:8.1f}"
+            f"   {_p99_cell(row['complete'], 12)}   {_p99_cell(row['reminder'], 12)}"
+            f"   {_p99_cell(row['ping'], 8)}"
+            f"   {row['lag_p99_ms']:8.1f} {row['lag_max_ms']:8.1f}"
+            f"   {row['rss_mb']:6.0f}   {row['kb_per_session']:10.1f}   {len(row['errors']):6d}"
+        )
+    print()
+    if degraded_at is None:
+        print(f"  No degradation up to {rows[-1]['sessions']} sessions (p95 first chunk within {args.degrade_factor}x of {baseline:.1f}ms)")
+    else:
+        p95 = _percentiles(degraded_at["first_chunk"])[1]
+        print(
+            f"  Latency degrades at {degraded_at['sessions']} sessions: p95 first chunk {p95:.1f}ms "
+            f"vs {baseline:.1f}ms at {rows[0]['sessions']}, {len(degraded_at['errors'])} failed sessions"
+        )
+        for error in degraded_at["errors"][:3]:
+            print(f"    {error}")
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("BENCH_LOG_LEVEL", "WARNING")
+    logging.disable(getattr(logging, logging_level))
+    main()
@@ -0,0 +1,7 @@
+# backend/benchmarks/fakes/__init__.py
+"""In-process stand-ins for Retell, OpenAI and Supabase, so the whole call
+flow can be driven and measured offline (see benchmarks/bench_end_to_end.py)"""
+from .openai_api import FakeOpenAI
+from .retell import FakeRetell
+from .server import BackgroundServer, free_port
+from .supabase import FakeSupabase
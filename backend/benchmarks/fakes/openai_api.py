@@ -0,0 +1,144 @@
+# backend/benchmarks/fakes/openai_api.py
+"""OpenAI-compatible /v1/chat/completions with configurable latency.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1. Replies
+are canned but shaped like the real API, streamed (chat.completion.chunk
+SSE frames ending in [DONE]) or not, with a usage block (for streams, as a
+final chunk when stream_options.include_usage is set):
+
+  live turns   a short dispatcher reply, one token per word
+  extraction   prompts containing "Transcript:" get scenario-appropriate JSON
+
+Latency model: `first_token_ms` until the first token, then `token_ms` per
+token; a non-streamed reply arrives after the whole generation time. Each
+delay is scaled by a seeded uniform factor in [1 - jitter, 1 + jitter], so
+runs with the same seed see the same latencies.
+"""
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LIVE_REPLIES = [
+    "Thanks for the update. What's your current location and ETA to the receiver?",
+    "Got it, I'll note that. Are there any delays or issues with the load so far?",
+    "Understood. Do you expect to make your delivery appointment on time?",
+    "Thanks, drive safe. Call dispatch if anything changes before you arrive."
+]
+EXTRACTION_REPLIES = {
+    "dispatch": {
+        "call_outcome": "In-Transit Update",
+        "driver_status": "Driving",
+        "current_location": "I-40 near Amarillo",
+        "eta": "3 PM"
+    },
+    "emergency": {
+        "call_outcome": "Emergency Detected",
+        "emergency_type": "Breakdown",
+        "emergency_location": "I-40 mile marker 72",
+        "escalation_status": "Escalation Flagged"
+    }
+}
+
+
+def _tokens(text: str) -> List[str]:
+    words = text.split(" ")
+    return [word + " " for word in words[:-1]] + words[-1:]
+
+
+class FakeOpenAI:
+    """The fake server's ASGI app is `.app`; counters are in `.requests`"""
+
+    def __init__(self,
+                 first_token_ms: float = 300.0,
+                 token_ms: float = 15.0,
+                 jitter: float = 0.2,
+                 seed: int = 7):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._reply = 0
+        self.requests = {"live": 0, "extraction": 0, "streamed": 0}
+        self.app = FastAPI(title="Fake OpenAI")
+        self.app.post("/v1/chat/completions")(self.chat_completions)
+
+    def _delay(self, ms: float) -> float:
+        return ms * self._rng.uniform(1 - self.jitter, 1 + self.jitter) / 1000
+
+    def _reply_text(self, messages: List[Dict[str, Any]]) -> str:
+        prompt = (messages[-1].get("content") or "") if messages else ""
+        if "Transcript:" in prompt:
+            self.requests["extraction"] += 1
+            scenario = "emergency" if "emergency call transcript" in prompt else "dispatch"
+            return json.dumps(EXTRACTION_REPLIES[scenario])
+        self.requests["live"] += 1
+        self._reply += 1
+        return LIVE_REPLIES[self._reply % len(LIVE_REPLIES)]
+
+    async def chat_completions(self, request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        model = body.get("model", "gpt-4")
+        text = self._reply_text(messages)
+        tokens = _tokens(text)
+        usage = {
+            "prompt_tokens": sum(len(m.get("content") or "") for m in messages) // 4,
+            "completion_tokens": len(tokens),
+            "total_tokens": 0
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(self._delay(self.first_token_ms) + self._delay(self.token_ms * len(tokens)))
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+
+        self.requests["streamed"] += 1
+
+        def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }) + "\n\n"
+
+        async def stream():
+            await asyncio.sleep(self._delay(self.first_token_ms))
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(self._delay(self.token_ms))
+                yield chunk({"content": token})
+            yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": usage
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
@@ -0,0 +1,253 @@
+# backend/benchmarks/fakes/retell.py
+"""Retell REST stand-in that also plays the phone call.
+
+Serves the endpoints retell_service uses (list-phone-numbers,
+create-retell-llm, update-retell-llm, create-agent, update-agent,
+create-phone-call, get-call). Point the app at it with
+RETELL_BASE_URL=http://127.0.0.1:<port>.
+
+Every created phone call is then simulated the way Retell drives us:
+
+  1. call_started webhook
+  2. LLM WebSocket at the agent's llm_websocket_url + "/<call_id>": wait
+     for the config frame, send call_details, then (after the agent's
+     begin message) `turns` rounds of a driver utterance as
+     response_required, reading the streamed response frames until
+     content_complete
+  3. call_ended webhook with the transcript, then call_analyzed
+
+Per-turn latency (first response frame and content_complete, measured
+from sending response_required) and webhook acknowledgement latency are
+recorded on the instance. Driver lines are picked with a seeded RNG.
+"""
+import asyncio
+import json
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import httpx
+import websockets
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+DISPATCH_LINES = [
+    "Yeah, I'm driving, just passed the Love's on I-40 near Amarillo.",
+    "Should be at the receiver around 3 PM, traffic's clear now.",
+    "No issues with the load, everything's secured.",
+    "Sounds good, I'll call if anything changes."
+]
+EMERGENCY_LINES = [
+    "I've got a blowout, I'm pulled over on I-40 at mile marker 72.",
+    "Nobody's hurt, but I can't move the truck.",
+    "The load looks fine, I've got my hazards on.",
+    "Okay, I'll wait for the tow truck here."
+]
+
+
+class FakeRetell:
+    """The fake server's ASGI app is `.app`; measurements are in `.turn_latencies` and `.webhook_latencies`"""
+
+    def __init__(self,
+                 webhook_url: str,
+                 turns: int = 4,
+                 ring_ms: float = 0.0,
+                 turn_gap_ms: float = 200.0,
+                 emergency_rate: float = 0.2,
+                 phone_numbers: int = 4,
+                 seed: int = 7):
+        self.webhook_url = webhook_url
+        self.turns = turns
+        self.ring_ms = ring_ms
+        self.turn_gap_ms = turn_gap_ms
+        self.emergency_rate = emergency_rate
+        self.phone_numbers = [f"+1555000{i:04d}" for i in range(phone_numbers)]
+        self._rng = random.Random(seed)
+        self.llms: Dict[str, Dict[str, Any]] = {}
+        self.agents: Dict[str, Dict[str, Any]] = {}
+        self.calls: Dict[str, Dict[str, Any]] = {}
+        self.active_calls = 0
+        self.finished_calls = 0
+        self.errors: List[str] = []
+        self.turn_latencies: Dict[str, List[float]] = {"first_chunk": [], "complete": []}
+        self.webhook_latencies: List[float] = []
+        self._tasks = set()
+        self._http: Optional[httpx.AsyncClient] = None
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            yield
+            if self._http is not None:
+                await self._http.aclose()
+
+        self.app = FastAPI(title="Fake Retell", lifespan=lifespan)
+        self.app.get("/list-phone-numbers")(self.list_phone_numbers)
+        self.app.post("/create-retell-llm", status_code=201)(self.create_retell_llm)
+        self.app.patch("/update-retell-llm/{llm_id}")(self.update_retell_llm)
+        self.app.post("/create-agent", status_code=201)(self.create_agent)
+        self.app.patch("/update-agent/{agent_id}")(self.update_agent)
+        self.app.post("/create-phone-call", status_code=201)(self.create_phone_call)
+        self.app.get("/get-call/{call_id}")(self.get_call)
+        self.app.middleware("http")(self._authorize)
+
+    async def _authorize(self, request: Request, call_next):
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"error_message": "Missing API key"}, status_code=401)
+        return await call_next(request)
+
+    # REST API
+    async def list_phone_numbers(self):
+        return [{"phone_number": number, "phone_number_type": "retell-twilio"} for number in self.phone_numbers]
+
+    async def create_retell_llm(self, request: Request):
+        llm = {**await request.json(), "llm_id": f"llm_{uuid.uuid4().hex[:24]}"}
+        self.llms[llm["llm_id"]] = llm
+        return llm
+
+    async def update_retell_llm(self, llm_id: str, request: Request):
+        if llm_id not in self.llms:
+            raise HTTPException(status_code=404, detail="LLM not found")
+        self.llms[llm_id].update(await request.json())
+        return self.llms[llm_id]
+
+    async def create_agent(self, request: Request):
+        agent = {**await request.json(), "agent_id": f"agent_{uuid.uuid4().hex[:24]}"}
+        if agent.get("response_engine", {}).get("llm_id") not in self.llms:
+            raise HTTPException(status_code=400, detail="Unknown llm_id")
+        self.agents[agent["agent_id"]] = agent
+        return agent
+
+    async def update_agent(self, agent_id: str, request: Request):
+        if agent_id not in self.agents:
+            raise HTTPException(status_code=404, detail="Agent not found")
+        self.agents[agent_id].update(await request.json())
+        return self.agents[agent_id]
+
+    async def create_phone_call(self, request: Request):
+        body = await request.json()
+        if body.get("agent_id") not in self.agents:
+            raise HTTPException(status_code=400, detail="Unknown agent_id")
+        if body.get("from_number") not in self.phone_numbers:
+            raise HTTPException(status_code=400, detail="Unknown from_number")
+
+        call = {
+            "call_id": f"call_{uuid.uuid4().hex[:24]}",
+            "call_type": "phone_call",
+            "agent_id": body["agent_id"],
+            "call_status": "registered",
+            "from_number": body["from_number"],
+            "to_number": body.get("to_number"),
+            "metadata": body.get("metadata") or {},
+            "retell_llm_dynamic_variables": body.get("retell_llm_dynamic_variables") or {}
+        }
+        self.calls[call["call_id"]] = call
+        self.active_calls += 1
+        task = asyncio.create_task(self._run_call(call))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return call
+
+    async def get_call(self, call_id: str):
+        if call_id not in self.calls:
+            raise HTTPException(status_code=404, detail="Call not found")
+        return self.calls[call_id]
+
+    # Call simulation
+    async def _run_call(self, call: Dict[str, Any]) -> None:
+        try:
+            if self.ring_ms:
+                await asyncio.sleep(self.ring_ms / 1000)
+            call.update(call_status="ongoing", start_timestamp=int(time.time() * 1000))
+            await self.send_webhook("call_started", call)
+
+            conversation = await self._converse(call)
+
+            call.update(
+                call_status="ended",
+                end_timestamp=int(time.time() * 1000),
+                disconnection_reason="user_hangup",
+                transcript="\n".join(
+                    f"{'Agent' if turn['role'] == 'agent' else 'User'}: {turn['content']}" for turn in conversation
+                )
+            )
+            await self.send_webhook("call_ended", call)
+
+            call["call_analysis"] = {
+                "call_summary": "The driver gave a status update on the load.",
+                "user_sentiment": "Neutral",
+                "call_successful": True
+            }
+            await self.send_webhook("call_analyzed", call)
+        except Exception as e:
+            self.errors.append(f"{call['call_id']}: {e!r}")
+        finally:
+            self.active_calls -= 1
+            self.finished_calls += 1
+
+    async def _converse(self, call: Dict[str, Any]) -> List[Dict[str, str]]:
+        llm = self.llms[self.agents[call["agent_id"]]["response_engine"]["llm_id"]]
+        url = llm["llm_websocket_url"].replace("https://", "wss://").replace("http://", "ws://")
+        lines = EMERGENCY_LINES if self._rng.random() < self.emergency_rate else DISPATCH_LINES
+        variables = call["retell_llm_dynamic_variables"]
+        # The agent's begin message, spoken before the first turn
+        conversation: List[Dict[str, str]] = [{
+            "role": "agent",
+            "content": f"Hi {variables.get('driver_name') or 'there'}, this is Dispatch with a check call on load "
+                       f"{variables.get('load_number') or 'your load'}. Can you give me an update on your status?"
+        }]
+
+        async with websockets.connect(f"{url}/{call['call_id']}") as ws:
+            await asyncio.wait_for(ws.recv(), timeout=30.0)  # config frame
+            await ws.send(json.dumps({
+                "interaction_type": "call_details",
+                "call": {key: call.get(key) for key in ("call_id", "agent_id", "from_number", "to_number", "metadata")}
+            }))
+
+            for turn in range(self.turns):
+                conversation.append({"role": "user", "content": lines[turn % len(lines)]})
+                response_id = turn + 1
+                started = time.perf_counter()
+                await ws.send(json.dumps({
+                    "interaction_type": "response_required",
+                    "response_id": response_id,
+                    "conversation": conversation
+                }))
+
+                reply = ""
+                first_chunk_at = None
+                while True:
+                    frame = json.loads(await asyncio.wait_for(ws.recv(), timeout=30.0))
+                    if frame.get("response_id") != response_id:
+                        continue
+                    if frame.get("response_type") == "error":
+                        raise RuntimeError(f"LLM socket error: {frame.get('error')}")
+                    if frame.get("response_type") != "response":
+                        continue
+                    if first_chunk_at is None:
+                        first_chunk_at = time.perf_counter()
+                    reply += frame.get("content") or ""
+                    if frame.get("content_complete"):
+                        break
+
+                completed_at = time.perf_counter()
+                self.turn_latencies["first_chunk"].append((first_chunk_at - started) * 1000)
+                self.turn_latencies["complete"].append((completed_at - started) * 1000)
+                conversation.append({"role": "agent", "content": reply.strip()})
+
+                if self.turn_gap_ms:
+                    await asyncio.sleep(self.turn_gap_ms / 1000)
+
+        return conversation
+
+    async def send_webhook(self, event: str, call: Dict[str, Any]) -> int:
+        """POST one webhook to the app; returns the status code"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=30.0)
+        started = time.perf_counter()
+        response = await self._http.post(self.webhook_url, json={"event": event, "call": call})
+        self.webhook_latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            self.errors.append(f"{call['call_id']}: {event} webhook returned {response.status_code}")
+        return response.status_code
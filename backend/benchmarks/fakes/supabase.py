@@ -0,0 +1,406 @@
+# backend/benchmarks/fakes/supabase.py
+"""SQLite-backed stand-in for the supabase-py client.
+
+Implements the slice of the PostgREST query builder that app/database.py
+uses (select with count and embedded agents(...), eq/neq/gt/gte/lt/lte,
+is_ and not_, or_ with and(...) groups, order, limit, insert, upsert,
+update and the call_statistics RPC). Each table is one SQLite table of
+JSON documents, filtered and ordered with json_extract over expression
+indexes, so query cost grows with the data like the real thing and not
+with the number of rows in memory.
+
+execute() sleeps `latency` seconds before touching SQLite, standing in for
+the network round trip to Supabase.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Column defaults the real schema fills in on insert
+DEFAULTS = {
+    "agents": {"is_active": True, "voice_settings": {}},
+    "calls": {"status": "pending"},
+    "summaries": {"structured_data": {}, "processing_errors": []}
+}
+# Tables with a set_updated_at trigger (see database/schema.sql)
+UPDATED_AT_TRIGGER = ("agents", "calls")
+# Unique keys besides id; inserts that collide raise like a Postgres unique violation
+UNIQUE_KEYS = {"summaries": "call_id", "retell_provisioning": "agent_id"}
+INDEXED = {"calls": ("retell_call_id", "agent_id", "status", "created_at", "updated_at")}
+
+OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class _Result:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _column(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Unsupported column: {name}")
+    return f"json_extract(data, '$.{name}')"
+
+
+def _param(value: Any) -> Any:
+    # json_extract returns JSON booleans as 1/0
+    if isinstance(value, bool):
+        return int(value)
+    if hasattr(value, "value"):  # str enums such as CallStatus
+        return value.value
+    return value
+
+
+def _split(expr: str) -> List[str]:
+    """Split a PostgREST filter list on top-level commas"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _condition(expr: str) -> Tuple[str, List[Any]]:
+    """SQL for one PostgREST condition, e.g. created_at.lt."x" or and(a.eq.1,b.gt.2)"""
+    for joiner in ("and", "or"):
+        if expr.startswith(f"{joiner}(") and expr.endswith(")"):
+            parts = [_condition(part) for part in _split(expr[len(joiner) + 1:-1])]
+            sql = f" {joiner} ".join(part_sql for part_sql, _ in parts)
+            return f"({sql})", [param for _, params in parts for param in params]
+
+    column, operator, value = expr.split(".", 2)
+    if len(value) >= 2 and value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    if operator == "is":
+        return f"{_column(column)} is {'null' if value == 'null' else 'not null'}", []
+    if operator not in OPERATORS:
+        raise ValueError(f"Unsupported operator: {operator}")
+    return f"{_column(column)} {OPERATORS[operator]} ?", [value]
+
+
+def _parse_columns(columns: str) -> Tuple[List[str], Dict[str, List[str]]]:
+    """("*, agents(name, scenario_type)") -> (["*"], {"agents": ["name", "scenario_type"]})"""
+    plain, embeds = [], {}
+    for part in _split(columns):
+        match = re.match(r"^(\w+)\((.*)\)$", part)
+        if match:
+            embeds[match.group(1)] = _split(match.group(2))
+        else:
+            plain.append(part)
+    return plain, embeds
+
+
+def _project(row: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+    if "*" in columns:
+        return dict(row)
+    return {column: row.get(column) for column in columns}
+
+
+class FakeQuery:
+    """One PostgREST request being built; execute() runs it against SQLite"""
+
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.count = None
+        self.payload: Any = None
+        self.on_conflict = "id"
+        self.where: List[str] = []
+        self.params: List[Any] = []
+        self.orders: List[str] = []
+        self.limit_rows: Optional[int] = None
+        self._negate = False
+
+    # Actions
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "FakeQuery":
+        self.columns = columns
+        self.count = count
+        return self
+
+    def insert(self, data) -> "FakeQuery":
+        self.action, self.payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict: str = "id") -> "FakeQuery":
+        self.action, self.payload, self.on_conflict = "upsert", data, on_conflict
+        return self
+
+    def update(self, data: Dict[str, Any]) -> "FakeQuery":
+        self.action, self.payload = "update", data
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self.action = "delete"
+        return self
+
+    # Filters
+    @property
+    def not_(self) -> "FakeQuery":
+        self._negate = True
+        return self
+
+    def _filter(self, sql: str, params: List[Any]) -> "FakeQuery":
+        if self._negate:
+            sql = f"not ({sql})"
+            self._negate = False
+        self.where.append(sql)
+        self.params.extend(params)
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(f"{_column(column)} = ?", [_param(value)])
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(f"{_column(column)} != ?", [_param(value)])
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(f"{_column(column)} > ?", [_param(value)])
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(f"{_column(column)} >= ?", [_param(value)])
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(f"{_column(column)} < ?", [_param(value)])
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(f"{_column(column)} <= ?", [_param(value)])
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        placeholders = ", ".join("?" for _ in values) or "null"
+        return self._filter(f"{_column(column)} in ({placeholders})", [_param(value) for value in values])
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        if value in (None, "null"):
+            return self._filter(f"{_column(column)} is null", [])
+        return self._filter(f"{_column(column)} = ?", [_param(value in (True, "true"))])
+
+    def or_(self, filters: str) -> "FakeQuery":
+        parts = [_condition(part) for part in _split(filters)]
+        sql = " or ".join(part_sql for part_sql, _ in parts)
+        return self._filter(f"({sql})", [param for _, params in parts for param in params])
+
+    # Modifiers
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self.orders.append(f"{_column(column)} {'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, rows: int) -> "FakeQuery":
+        self.limit_rows = rows
+        return self
+
+    def execute(self) -> _Result:
+        if self.client.latency:
+            time.sleep(self.client.latency)
+        return self.client._run(lambda conn: getattr(self, f"_{self.action}")(conn), self.table)
+
+    # Execution (holding the client lock)
+    def _where(self) -> str:
+        return " and ".join(self.where) or "1"
+
+    def _matching(self, conn: sqlite3.Connection, rowid: bool = False) -> List[Any]:
+        sql = f'select rowid, data from "{self.table}" where {self._where()}'
+        if self.orders:
+            sql += " order by " + ", ".join(self.orders)
+        if self.limit_rows is not None:
+            sql += f" limit {int(self.limit_rows)}"
+        rows = conn.execute(sql, self.params).fetchall()
+        return [(row_id, json.loads(data)) for row_id, data in rows] if rowid else [json.loads(data) for _, data in rows]
+
+    def _select(self, conn: sqlite3.Connection) -> _Result:
+        columns, embeds = _parse_columns(self.columns)
+        rows = []
+        for row in self._matching(conn):
+            projected = _project(row, columns)
+            for embed_table, embed_columns in embeds.items():
+                # agents(...) resolves through calls.agent_id
+                foreign_key = row.get(f"{embed_table.rstrip('s')}_id")
+                related = self.client._get(conn, embed_table, "id", foreign_key) if foreign_key else None
+                projected[embed_table] = _project(related, embed_columns) if related else None
+            rows.append(projected)
+
+        count = None
+        if self.count:
+            count = conn.execute(
+                f'select count(*) from "{self.table}" where {self._where()}', self.params
+            ).fetchone()[0]
+        return _Result(rows, count)
+
+    def _insert(self, conn: sqlite3.Connection) -> _Result:
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        return _Result([self.client._insert_row(conn, self.table, row) for row in rows])
+
+    def _upsert(self, conn: sqlite3.Connection) -> _Result:
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        saved = []
+        for row in rows:
+            existing = self.client._get(conn, self.table, self.on_conflict, row.get(self.on_conflict), rowid=True)
+            if existing:
+                saved.append(self.client._update_row(conn, self.table, existing[0], {**existing[1], **row}))
+            else:
+                saved.append(self.client._insert_row(conn, self.table, row))
+        return _Result(saved)
+
+    def _update(self, conn: sqlite3.Connection) -> _Result:
+        return _Result([
+            self.client._update_row(conn, self.table, row_id, {**row, **self.payload})
+            for row_id, row in self._matching(conn, rowid=True)
+        ])
+
+    def _delete(self, conn: sqlite3.Connection) -> _Result:
+        matching = self._matching(conn, rowid=True)
+        conn.executemany(f'delete from "{self.table}" where rowid = ?', [(row_id,) for row_id, _ in matching])
+        return _Result([row for _, row in matching])
+
+
+class FakeRpc:
+    def __init__(self, client: "FakeSupabase", name: str, params: Dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self) -> _Result:
+        if self.name != "call_statistics":
+            raise ValueError(f"Unknown RPC: {self.name}")
+        if self.client.latency:
+            time.sleep(self.client.latency)
+        return self.client._run(lambda conn: _Result(self.client._call_statistics(conn, self.params.get("since"))))
+
+
+class FakeSupabase:
+    """Drop-in for db.client: `db.client = FakeSupabase(path, latency=0.02)`"""
+
+    def __init__(self, path: str = ":memory:", latency: float = 0.0):
+        self.latency = latency
+        self.queries = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=normal")
+        self._tables = set()
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    def _run(self, fn, table: Optional[str] = None):
+        with self._lock:
+            self.queries += 1
+            if table:
+                self._ensure_table(self._conn, table)
+            return fn(self._conn)
+
+    def _ensure_table(self, conn: sqlite3.Connection, table: str) -> None:
+        if table in self._tables:
+            return
+        conn.execute(f'create table if not exists "{table}" (data text not null)')
+        conn.execute(f'create unique index if not exists "{table}_id" on "{table}" ({_column("id")})')
+        if table in UNIQUE_KEYS:
+            column = UNIQUE_KEYS[table]
+            conn.execute(f'create unique index if not exists "{table}_{column}" on "{table}" ({_column(column)})')
+        for column in INDEXED.get(table, ()):
+            conn.execute(f'create index if not exists "{table}_{column}" on "{table}" ({_column(column)})')
+        self._tables.add(table)
+
+    def _get(self, conn: sqlite3.Connection, table: str, column: str, value: Any, rowid: bool = False):
+        self._ensure_table(conn, table)
+        row = conn.execute(
+            f'select rowid, data from "{table}" where {_column(column)} = ? limit 1', (_param(value),)
+        ).fetchone()
+        if row is None:
+            return None
+        return (row[0], json.loads(row[1])) if rowid else json.loads(row[1])
+
+    def _insert_row(self, conn: sqlite3.Connection, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        self._ensure_table(conn, table)
+        now = _now()
+        row = {
+            "id": str(uuid.uuid4()),
+            **DEFAULTS.get(table, {}),
+            "created_at": now,
+            **({"updated_at": now} if table in UPDATED_AT_TRIGGER else {}),
+            **{key: _param(value) if hasattr(value, "value") else value for key, value in row.items()}
+        }
+        conn.execute(f'insert into "{table}" (data) values (?)', (json.dumps(row),))
+        return row
+
+    def _update_row(self, conn: sqlite3.Connection, table: str, row_id: int, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = {key: _param(value) if hasattr(value, "value") else value for key, value in row.items()}
+        if table in UPDATED_AT_TRIGGER:
+            row["updated_at"] = _now()
+        conn.execute(f'update "{table}" set data = ? where rowid = ?', (json.dumps(row), row_id))
+        return row
+
+    def _call_statistics(self, conn: sqlite3.Connection, since: Optional[str]) -> Dict[str, Any]:
+        """Python version of the call_statistics function in database/schema.sql"""
+        self._ensure_table(conn, "calls")
+        self._ensure_table(conn, "agents")
+        agents = {row["id"]: row for row in map(json.loads, (data for (data,) in conn.execute('select data from "agents"')))}
+        calls = [json.loads(data) for (data,) in conn.execute('select data from "calls"')]
+        if since:
+            calls = [call for call in calls if call["created_at"] >= since]
+
+        def group(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+            durations = [
+                (row["ended_at"] - row["start_timestamp"]) / 1000.0 for row in rows
+                if isinstance(row.get("start_timestamp"), (int, float)) and isinstance(row.get("ended_at"), (int, float))
+            ]
+            return {
+                "total": len(rows),
+                "completed": sum(1 for row in rows if row.get("status") == "completed"),
+                "failed": sum(1 for row in rows if row.get("status") == "failed"),
+                "avg_duration_seconds": round(sum(durations) / len(durations), 1) if durations else None
+            }
+
+        by_agent: Dict[Any, List[Dict[str, Any]]] = {}
+        by_scenario: Dict[Any, List[Dict[str, Any]]] = {}
+        by_status: Dict[str, int] = {}
+        for call in calls:
+            agent = agents.get(call.get("agent_id")) or {}
+            by_agent.setdefault(call.get("agent_id"), []).append(call)
+            by_scenario.setdefault(agent.get("scenario_type"), []).append(call)
+            by_status[call.get("status")] = by_status.get(call.get("status"), 0) + 1
+
+        agent_groups = [
+            {
+                "agent_id": agent_id,
+                "agent_name": (agents.get(agent_id) or {}).get("name"),
+                "scenario_type": (agents.get(agent_id) or {}).get("scenario_type"),
+                **group(rows)
+            }
+            for agent_id, rows in by_agent.items()
+        ]
+        scenario_groups = [{"scenario_type": scenario, **group(rows)} for scenario, rows in by_scenario.items()]
+        return {
+            "generated_at": _now(),
+            "overall": group(calls),
+            "by_status": by_status,
+            "by_agent": sorted(agent_groups, key=lambda g: -g["total"]),
+            "by_scenario": sorted(scenario_groups, key=lambda g: -g["total"])
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
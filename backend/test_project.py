@@ -174,6 +174,11 @@ class ProjectTester:
             ws_url = f"ws://localhost:8000/llm-websocket"
             
             async with websockets.connect(ws_url) as websocket:
+                # The server opens with a config frame requesting call details
+                config_message = json.loads(await asyncio.wait_for(websocket.recv(), timeout=5.0))
+                if config_message.get("response_type") != "config":
+                    print(f"   ⚠️ Expected config frame, got: {config_message}")
+                
                 # Send ping
                 ping_message = {
                     "interaction_type": "ping",
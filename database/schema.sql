@@ -0,0 +1,149 @@
+-- database/schema.sql
+
+-- Retell LLM/agent objects provisioned for each of our agents.
+-- config_hash is a sha256 over system_prompt + voice_settings; a mismatch
+-- means the Retell objects must be updated before they are reused.
+create table if not exists retell_provisioning (
+    agent_id uuid primary key references agents(id) on delete cascade,
+    config_hash text not null,
+    retell_llm_id text not null,
+    retell_agent_id text not null,
+    created_at timestamptz not null default now()
+);
+
+-- One summary per call, so re-extraction can upsert on call_id
+create unique index if not exists summaries_call_id_key on summaries (call_id);
+
+-- Keyset paging for GET /api/calls: newest first on (created_at, id),
+-- optionally within one status / agent / driver / load
+create index if not exists calls_created_at_id_idx on calls (created_at desc, id desc);
+create index if not exists calls_status_created_at_idx on calls (status, created_at desc, id desc);
+create index if not exists calls_agent_created_at_idx on calls (agent_id, created_at desc, id desc);
+create index if not exists calls_driver_phone_created_at_idx on calls (driver_phone, created_at desc, id desc);
+create index if not exists calls_load_number_created_at_idx on calls (load_number, created_at desc, id desc);
+
+-- Aggregate call statistics for GET /api/calls/stats in one round trip.
+-- start_timestamp and ended_at hold the epoch-millisecond values Retell
+-- sends in its call_started / call_ended webhooks.
+create or replace function call_statistics(since timestamptz default null)
+returns jsonb
+language sql
+stable
+as $$
+    with scoped as (
+        select
+            c.status,
+            c.agent_id,
+            a.name as agent_name,
+            a.scenario_type,
+            case
+                when c.start_timestamp is not null and c.ended_at is not null
+                then (c.ended_at - c.start_timestamp) / 1000.0
+            end as duration_seconds
+        from calls c
+        left join agents a on a.id = c.agent_id
+        where since is null or c.created_at >= since
+    ),
+    by_agent as (
+        select agent_id, agent_name, scenario_type,
+               count(*) as total,
+               count(*) filter (where status = 'completed') as completed,
+               count(*) filter (where status = 'failed') as failed,
+               avg(duration_seconds) as avg_duration_seconds
+        from scoped
+        group by agent_id, agent_name, scenario_type
+    ),
+    by_scenario as (
+        select scenario_type,
+               count(*) as total,
+               count(*) filter (where status = 'completed') as completed,
+               count(*) filter (where status = 'failed') as failed,
+               avg(duration_seconds) as avg_duration_seconds
+        from scoped
+        group by scenario_type
+    )
+    select jsonb_build_object(
+        'generated_at', now(),
+        'overall', (
+            select jsonb_build_object(
+                'total', count(*),
+                'completed', count(*) filter (where status = 'completed'),
+                'failed', count(*) filter (where status = 'failed'),
+                'avg_duration_seconds', round(avg(duration_seconds), 1)
+            )
+            from scoped
+        ),
+        'by_status', (
+            select coalesce(jsonb_object_agg(status, total), '{}'::jsonb)
+            from (select status, count(*) as total from scoped group by status) s
+        ),
+        'by_agent', (
+            select coalesce(jsonb_agg(jsonb_build_object(
+                'agent_id', agent_id,
+                'agent_name', agent_name,
+                'scenario_type', scenario_type,
+                'total', total,
+                'completed', completed,
+                'failed', failed,
+                'avg_duration_seconds', round(avg_duration_seconds, 1)
+            ) order by total desc), '[]'::jsonb)
+            from by_agent
+        ),
+        'by_scenario', (
+            select coalesce(jsonb_agg(jsonb_build_object(
+                'scenario_type', scenario_type,
+                'total', total,
+                'completed', completed,
+                'failed', failed,
+                'avg_duration_seconds', round(avg_duration_seconds, 1)
+            ) order by total desc), '[]'::jsonb)
+            from by_scenario
+        )
+    );
+$$;
+
+-- ETags for GET /api/agents and GET /api/calls are built from the row count
+-- and max(updated_at) of the listed rows, so every update must bump updated_at
+create or replace function set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+drop trigger if exists calls_set_updated_at on calls;
+create trigger calls_set_updated_at before update on calls
+    for each row execute function set_updated_at();
+
+drop trigger if exists agents_set_updated_at on agents;
+create trigger agents_set_updated_at before update on agents
+    for each row execute function set_updated_at();
+
+create index if not exists calls_updated_at_idx on calls (updated_at desc);
+
+-- Timeline of each response_required turn on the LLM WebSocket, written in
+-- one insert when the call's socket closes. Durations are milliseconds from
+-- frame receipt, except generation_ms (prompt built to last model token).
+-- outcome is ok, error or cancelled (superseded by a newer response_id).
+create table if not exists call_turn_metrics (
+    id bigint generated always as identity primary key,
+    call_id uuid not null references calls(id) on delete cascade,
+    response_id integer,
+    received_at timestamptz not null,
+    context_ms real,
+    first_token_ms real,
+    first_chunk_ms real,
+    generation_ms real,
+    sent_ms real,
+    sent_at timestamptz,
+    prompt_tokens integer,
+    model text,
+    streamed boolean not null default true,
+    outcome text not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists call_turn_metrics_call_id_idx on call_turn_metrics (call_id, received_at);
@@ -1,7 +1,7 @@
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Phone, Clock, User, FileText, Eye, X } from 'lucide-react';
-import { getCalls, getCallSummary } from '../services/api';
+import { getCall, getCalls, getCallSummary, subscribeCallEvents } from '../services/api';
 
 const CallHistory = () => {
   const [calls, setCalls] = useState([]);
@@ -10,14 +10,35 @@ const CallHistory = () => {
   const [selectedCall, setSelectedCall] = useState(null);
   const [callSummary, setCallSummary] = useState(null);
   const [summaryLoading, setSummaryLoading] = useState(false);
+  const selectedIdRef = useRef(null);
+
+  useEffect(() => {
+    selectedIdRef.current = selectedCall?.id ?? null;
+  }, [selectedCall]);
 
   useEffect(() => {
     fetchCalls();
+    // Status changes arrive as pushed deltas instead of re-fetching the list
+    return subscribeCallEvents({
+      onCreated: (call) => {
+        setCalls((current) => (
+          current.some((c) => c.id === call.id) ? current : [call, ...current]
+        ));
+      },
+      onUpdated: (callId, changes) => {
+        setCalls((current) => current.map((c) => (c.id === callId ? { ...c, ...changes } : c)));
+        setSelectedCall((current) => (current?.id === callId ? { ...current, ...changes } : current));
+        if (changes.summary_ready && selectedIdRef.current === callId) {
+          refreshSummary(callId);
+        }
+      },
+      onResync: () => fetchCalls(false),
+    });
   }, []);
 
-  const fetchCalls = async () => {
+  const fetchCalls = async (showLoading = true) => {
     try {
-      setLoading(true);
+      setLoading(showLoading);
       const response = await getCalls();
       setCalls(response.calls);
     } catch (err) {
@@ -27,11 +48,29 @@ const CallHistory = () => {
     }
   };
 
+  const refreshSummary = async (callId) => {
+    try {
+      const summary = await getCallSummary(callId);
+      if (selectedIdRef.current === callId) {
+        setCallSummary(summary);
+      }
+    } catch (err) {
+      console.error('Failed to fetch summary:', err);
+    }
+  };
+
   const handleViewDetails = async (call) => {
     setSelectedCall(call);
     setSummaryLoading(true);
     setCallSummary(null);
 
+    // List rows and pushed deltas carry no transcript; load the full call
+    getCall(call.id)
+      .then((fullCall) => {
+        setSelectedCall((current) => (current?.id === call.id ? { ...current, ...fullCall } : current));
+      })
+      .catch((err) => console.error('Failed to fetch call:', err));
+
     try {
       const summary = await getCallSummary(call.id);
       setCallSummary(summary);
@@ -62,8 +62,15 @@ export const triggerCall = async (callData) => {
   return response.data;
 };
 
-export const getCalls = async () => {
-  const response = await api.get('/calls');
+// params: limit, cursor, status, agent_id, driver_phone, load_number,
+// created_after, created_before, fields (comma-separated)
+export const getCalls = async (params = {}) => {
+  const response = await api.get('/calls', { params });
+  return response.data;
+};
+
+export const getCallStats = async (params = {}) => {
+  const response = await api.get('/calls/stats', { params });
   return response.data;
 };
 
@@ -77,4 +84,20 @@ export const getCallSummary = async (callId) => {
   return response.data;
 };
 
+// Live call deltas over Server-Sent Events. handlers: onCreated(call),
+// onUpdated(callId, changes), onResync(). Returns a function that closes
+// the stream. The browser reconnects on its own and replays missed events.
+export const subscribeCallEvents = ({ onCreated, onUpdated, onResync }) => {
+  const source = new EventSource(`${API_BASE_URL}/calls/events`);
+  source.addEventListener('call.created', (e) => {
+    onCreated?.(JSON.parse(e.data).call);
+  });
+  source.addEventListener('call.updated', (e) => {
+    const { call_id, changes } = JSON.parse(e.data);
+    onUpdated?.(call_id, changes);
+  });
+  source.addEventListener('resync', () => onResync?.());
+  return () => source.close();
+};
+
 export default api;